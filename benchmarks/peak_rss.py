@@ -0,0 +1,157 @@
+"""
+Peak memory (RSS) of mod resolution data structures.
+
+Each scenario runs in a fresh interpreter and reports its peak RSS above an
+idle interpreter:
+
+- cf-files-json / cf-files-stream: pick the newest compatible file from a
+  synthetic CurseForge file listing, parsed in full vs. streamed
+- records-dataclass / records-slots: hold resolved file records as regular
+  vs. __slots__ dataclasses
+
+Usage:
+    python benchmarks/peak_rss.py [--files 5000] [--records 200000]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+SCENARIOS = ["idle", "cf-files-json", "cf-files-stream", "records-dataclass", "records-slots"]
+GAME_VERSIONS = ["1.20.1", "1.20.2", "1.20.4", "1.20.6", "1.21", "1.21.1"]
+LOADERS = ["Forge", "Fabric", "NeoForge", "Quilt"]
+
+
+def peak_rss_kib() -> int:
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def write_listing(path: str, count: int) -> None:
+    """Write a CurseForge-shaped /mods/{id}/files response with `count` files."""
+    with open(path, "w") as f:
+        f.write('{"data": [')
+        for i in range(count):
+            game_version = GAME_VERSIONS[i % len(GAME_VERSIONS)]
+            loader = LOADERS[i % len(LOADERS)]
+            file_data = {
+                "id": 4000000 + i, "gameId": 432, "modId": 238222, "isAvailable": True,
+                "displayName": f"examplemod-{loader.lower()}-{game_version}-{i}.jar",
+                "fileName": f"examplemod-{loader.lower()}-{game_version}-{i}.jar",
+                "releaseType": 1, "fileStatus": 4,
+                "hashes": [{"value": f"{i:040x}", "algo": 1}, {"value": f"{i:032x}", "algo": 2}],
+                "fileDate": f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}T12:00:00.000Z",
+                "fileLength": 1048576 + i, "downloadCount": 1000 * i,
+                "downloadUrl": f"https://edge.forgecdn.net/files/{4000 + i // 1000}/{i % 1000}/examplemod-{i}.jar",
+                "gameVersions": [game_version, loader, "Server", "Client"],
+                "sortableGameVersions": [
+                    {"gameVersionName": v, "gameVersionPadded": v.replace(".", "000"), "gameVersion": v,
+                     "gameVersionReleaseDate": "2024-06-13T00:00:00Z", "gameVersionTypeId": 75125}
+                    for v in (game_version, loader, "Server", "Client")
+                ],
+                "dependencies": [{"modId": 306612 + d, "relationType": 3} for d in range(4)],
+                "alternateFileId": 0, "isServerPack": False, "fileFingerprint": 2824650221 + i,
+                "modules": [{"name": name, "fingerprint": 1000 + i} for name in
+                            ("META-INF", "com", "assets", "data", "pack.mcmeta", "fabric.mod.json")],
+            }
+            f.write(("," if i else "") + json.dumps(file_data))
+        f.write('], "pagination": {"index": 0, "pageSize": %d, "resultCount": %d, "totalCount": %d}}' % (count, count, count))
+
+
+def is_compatible(file_data) -> bool:
+    game_versions = file_data.get("gameVersions", [])
+    return "1.20.1" in game_versions and "forge" in [v.lower() for v in game_versions]
+
+
+def run_cf_files_json(path: str) -> None:
+    with open(path, "rb") as f:
+        files_data = json.loads(f.read())
+    compatible_files = [f for f in files_data.get("data", []) if is_compatible(f)]
+    compatible_files.sort(key=lambda x: x.get("fileDate", ""), reverse=True)
+    assert compatible_files
+
+
+def run_cf_files_stream(path: str) -> None:
+    from json_stream import iter_json_array
+    from mod_platforms import CURSEFORGE_FILE_FIELDS, STREAM_CHUNK_SIZE, compact_record
+
+    latest_file = None
+    with open(path, "rb") as f:
+        for file_data in iter_json_array(iter(lambda: f.read(STREAM_CHUNK_SIZE), b""), "data"):
+            if is_compatible(file_data) and (
+                latest_file is None or file_data["fileDate"] > latest_file["fileDate"]
+            ):
+                latest_file = compact_record(file_data, CURSEFORGE_FILE_FIELDS)
+    assert latest_file
+
+
+@dataclass
+class DictPackFile:
+    path: str
+    url: Optional[str] = None
+    hashes: Dict[str, str] = field(default_factory=dict)
+    curseforge_file_id: Optional[int] = None
+
+
+def run_records(count: int, slots: bool) -> None:
+    if slots:
+        from modpacks import PackFile as record_type
+    else:
+        record_type = DictPackFile
+    records = [
+        record_type(f"mods/mod-{i}.jar", f"https://cdn.modrinth.com/data/{i:08d}/mod-{i}.jar", {}, i)
+        for i in range(count)
+    ]
+    assert len(records) == count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure peak RSS of mod resolution data structures")
+    parser.add_argument("--files", type=int, default=5000, help="Files in the synthetic CurseForge listing.")
+    parser.add_argument("--records", type=int, default=200000, help="Resolved file records to hold.")
+    parser.add_argument("--scenario", choices=SCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument("--listing", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        # Every scenario (including idle) imports the same modules, so only data structures are compared
+        import json_stream, mod_platforms, modpacks  # noqa: F401
+
+        if args.scenario == "cf-files-json":
+            run_cf_files_json(args.listing)
+        elif args.scenario == "cf-files-stream":
+            run_cf_files_stream(args.listing)
+        elif args.scenario.startswith("records-"):
+            run_records(args.records, args.scenario == "records-slots")
+        print(peak_rss_kib())
+        return
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        listing = os.path.join(temp_dir, "files.json")
+        write_listing(listing, args.files)
+        print(f"CurseForge listing: {args.files} files, {os.path.getsize(listing) / 1024 / 1024:.1f} MiB")
+        print(f"Records: {args.records}\n")
+
+        results = {}
+        for scenario in SCENARIOS:
+            output = subprocess.run(
+                [sys.executable, __file__, "--scenario", scenario, "--listing", listing, "--records", str(args.records)],
+                capture_output=True, text=True, check=True
+            ).stdout
+            results[scenario] = int(output.split()[-1])
+
+    idle = results.pop("idle")
+    for scenario, rss in results.items():
+        print(f"{scenario:<20} {(rss - idle) / 1024:8.1f} MiB above idle")
+
+
+if __name__ == "__main__":
+    main()
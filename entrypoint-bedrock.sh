@@ -0,0 +1,8 @@
+#!/bin/bash
+
+# Bedrock Dedicated Server loads its bundled libraries from the working directory
+export LD_LIBRARY_PATH=.
+
+# Start the Bedrock server
+echo "Starting Bedrock Dedicated Server..."
+exec ./bedrock_server
@@ -0,0 +1,137 @@
+#!/bin/bash
+
+# Shared start-up logic for the Java server entrypoints (sourced, not executed)
+
+# JVM options used by every launch mode (java -jar and the Forge/NeoForge run.sh)
+XMX=${XMX:-1024M}
+XMS=${XMS:-1024M}
+JVM_ARGS=(-Xmx$XMX -Xms$XMS $JVM_OPTS)
+
+# Rotated GC log (read by 'gc-report'), next to the server logs so it is on the data or logs volume.
+# GC_LOG=off disables it; a GC log set up in JVM_OPTS takes precedence.
+GC_LOG=${GC_LOG:-logs/gc.log}
+if [ "$GC_LOG" != "off" ] && [[ "$JVM_OPTS" != *-Xlog:gc* && "$JVM_OPTS" != *-Xloggc* ]]; then
+    mkdir -p "$(dirname "$GC_LOG")"
+    if java -version 2>&1 | grep -q 'version "1\.'; then
+        # Java 8: one line per collection, the current file is $GC_LOG.<n>.current
+        JVM_ARGS+=(-Xloggc:$GC_LOG -XX:+PrintGCDateStamps -XX:+UseGCLogFileRotation -XX:NumberOfGCLogFiles=5 -XX:GCLogFileSize=10M)
+    else
+        JVM_ARGS+=(-Xlog:gc:file=$GC_LOG:time,uptime:filecount=5,filesize=10m)
+    fi
+fi
+
+# Console commands written to this FIFO are passed to the server's stdin, e.g.
+#   docker exec <name> sh -c 'echo "say hello" > /tmp/minecraft-console'
+CONSOLE_FIFO=/tmp/minecraft-console
+
+# Seconds the server gets to save and exit after 'stop' before it is terminated
+STOP_TIMEOUT=${STOP_TIMEOUT:-90}
+
+# Optional world directory outside /app (separate world volume); passed to the server as --universe
+WORLD_DIR=${WORLD_DIR:-}
+
+# World staging in RAM: the world runs from a tmpfs at $WORLD_DIR and is
+# copied back to the persistent volume at /worlds-disk periodically and on shutdown
+WORLD_DISK=/worlds-disk
+WORLD_SYNC_INTERVAL=${WORLD_SYNC_INTERVAL:-300}
+
+UNIVERSE_ARGS=()
+if [ -n "$WORLD_DIR" ]; then
+    mkdir -p "$WORLD_DIR"
+    UNIVERSE_ARGS=(--universe "$WORLD_DIR")
+fi
+
+# Write the JVM options where run.sh reads them (it passes @user_jvm_args.txt to java)
+write_user_jvm_args() {
+    {
+        echo "# Generated on every start from XMX, XMS and JVM_OPTS; edits are overwritten"
+        printf '%s\n' "${JVM_ARGS[@]}"
+    } > user_jvm_args.txt
+}
+
+send_command() {
+    echo "$1" > "$CONSOLE_FIFO"
+}
+
+sync_world() {
+    # Only copy files changed since the last sync
+    cp -au "$WORLD_DIR"/. "$WORLD_DISK"/
+}
+
+stage_world() {
+    if [ -z "$WORLD_DIR" ] || [ ! -d "$WORLD_DISK" ]; then
+        return
+    fi
+    echo "Staging world in memory ($WORLD_DISK -> $WORLD_DIR)..."
+    cp -a "$WORLD_DISK"/. "$WORLD_DIR"/
+    (
+        while sleep "$WORLD_SYNC_INTERVAL"; do
+            # Flush and pause autosaves so the copy is a consistent snapshot
+            send_command "save-off"
+            send_command "save-all flush"
+            sleep 5
+            sync_world
+            send_command "save-on"
+        done
+    ) &
+    WORLD_SYNC_PID=$!
+}
+
+# Stop the server through its console, terminating it if it does not exit within STOP_TIMEOUT
+stop_server() {
+    if [ -n "$STOPPING" ]; then
+        return
+    fi
+    STOPPING=1
+    echo "Stopping server (timeout ${STOP_TIMEOUT}s)..."
+    if [ -n "$WORLD_SYNC_PID" ]; then
+        kill $WORLD_SYNC_PID 2>/dev/null
+        WORLD_SYNC_PID=
+    fi
+    send_command "stop"
+
+    local waited=0
+    while kill -0 $SERVER_PID 2>/dev/null; do
+        if [ $waited -ge $STOP_TIMEOUT ]; then
+            echo "Server did not stop within ${STOP_TIMEOUT}s, terminating it"
+            kill -TERM $SERVER_PID
+            break
+        fi
+        sleep 1
+        waited=$((waited + 1))
+    done
+}
+
+# Run the server command with the console FIFO as stdin. The server is
+# stopped cleanly on SIGTERM/SIGINT (docker stop), and a staged world is
+# synced back after it exits.
+run_server() {
+    rm -f "$CONSOLE_FIFO"
+    mkfifo "$CONSOLE_FIFO"
+    # Hold the FIFO open for reading and writing so the server never sees end of input
+    exec 3<>"$CONSOLE_FIFO"
+
+    stage_world
+    SYNC_ON_EXIT=${WORLD_SYNC_PID:+1}
+
+    "$@" <&3 &
+    SERVER_PID=$!
+    trap stop_server TERM INT
+
+    wait $SERVER_PID
+    EXIT_CODE=$?
+    if [ -n "$STOPPING" ]; then
+        # 'wait' returned early because of the signal; collect the server's own exit status
+        wait $SERVER_PID
+        EXIT_CODE=$?
+    fi
+
+    if [ -n "$WORLD_SYNC_PID" ]; then
+        kill $WORLD_SYNC_PID 2>/dev/null
+    fi
+    if [ -n "$SYNC_ON_EXIT" ]; then
+        echo "Syncing world to disk..."
+        sync_world
+    fi
+    exit $EXIT_CODE
+}
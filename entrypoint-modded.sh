@@ -5,9 +5,8 @@ if [ "$EULA" = "TRUE" ]; then
     echo "eula=true" > eula.txt
 fi
 
-# Default memory settings if not provided
-XMX=${XMX:-1024M}
-XMS=${XMS:-1024M}
+# JVM options, console, signal handling and world directory handling
+source /usr/local/bin/entrypoint-common.sh
 
 # Detect which server JAR to use
 if [ -f "fabric-server-launch.jar" ]; then
@@ -23,13 +22,15 @@ elif [ -f "run.sh" ]; then
     else
         echo "Starting Forge/NeoForge server with run script..."
     fi
-    chmod +x run.sh
-    exec ./run.sh --nogui
+    # run.sh reads the JVM options from user_jvm_args.txt
+    write_user_jvm_args
+    echo "JVM options: ${JVM_ARGS[*]}"
+    run_server bash run.sh --nogui "${UNIVERSE_ARGS[@]}"
 else
     echo "Error: No server JAR found!"
     exit 1
 fi
 
 # Start the Minecraft server
-echo "Memory settings: -Xmx$XMX -Xms$XMS"
-exec java -Xmx$XMX -Xms$XMS -jar $SERVER_JAR nogui
+echo "JVM options: ${JVM_ARGS[*]}"
+run_server java "${JVM_ARGS[@]}" -jar $SERVER_JAR nogui "${UNIVERSE_ARGS[@]}"
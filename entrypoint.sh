@@ -5,9 +5,9 @@ if [ "$EULA" = "TRUE" ]; then
     echo "eula=true" > eula.txt
 fi
 
-# Default memory settings if not provided
-XMX=${XMX:-1024M}
-XMS=${XMS:-1024M}
+# JVM options, console, signal handling and world directory handling
+source /usr/local/bin/entrypoint-common.sh
 
 # Start the Minecraft server
-java -Xmx$XMX -Xms$XMS -jar server.jar nogui
+echo "JVM options: ${JVM_ARGS[*]}"
+run_server java "${JVM_ARGS[@]}" -jar server.jar nogui "${UNIVERSE_ARGS[@]}"
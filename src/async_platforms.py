@@ -0,0 +1,463 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+from urllib.parse import quote
+
+import aiohttp
+import requests
+
+from http_client import get_mirror_location, is_recording_mirror
+from json_stream import JsonArrayParser
+from mirror import mirror_key
+from mod_platforms import (
+    CURSEFORGE_FILE_FIELDS,
+    CURSEFORGE_MOD_FIELDS,
+    MODRINTH_PROJECT_FIELDS,
+    STREAM_CHUNK_SIZE,
+    CurseForgeClient,
+    ModrinthClient,
+    compact_modrinth_version,
+    compact_record,
+    is_compatible_curseforge_file,
+)
+
+# Connections shared by all requests of a client, and per API/CDN host
+DEFAULT_CONNECTION_LIMIT = 64
+DEFAULT_HOST_CONNECTION_LIMIT = 16
+
+
+async def download_to_file(session: aiohttp.ClientSession, url: str, output_path: str,
+                           expected_hash: Optional[str] = None, hash_algorithm: str = "sha256") -> bool:
+    """
+    Stream a download to disk without blocking the event loop.
+
+    Chunks are written from a worker thread while the next chunk is received.
+    The file is written under a temporary name and only moved into place once
+    complete (and hash-verified, if a hash is given).
+
+    Args:
+        session: aiohttp session
+        url: Download URL
+        output_path: Destination path
+        expected_hash: Hex digest to verify, if known
+        hash_algorithm: hashlib algorithm of expected_hash
+
+    Returns:
+        True if the file was downloaded (and verified)
+    """
+    part_path = f"{output_path}.part"
+    digest = hashlib.new(hash_algorithm) if expected_hash else None
+
+    try:
+        async with session.get(url) as response:
+            response.raise_for_status()
+            f = await asyncio.to_thread(open, part_path, "wb")
+            try:
+                async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                    await asyncio.to_thread(f.write, chunk)
+                    if digest:
+                        digest.update(chunk)
+            finally:
+                await asyncio.to_thread(f.close)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"Error downloading {url}: {e}")
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        return False
+
+    if digest and digest.hexdigest() != expected_hash.lower():
+        print(f"Hash mismatch for {os.path.basename(output_path)}: expected {expected_hash}, got {digest.hexdigest()}")
+        os.remove(part_path)
+        return False
+
+    os.replace(part_path, output_path)
+    return True
+
+
+class _MirrorFile:
+    """Response-like view of a file in a local mirror, read without blocking the event loop."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.status = 200
+        self.content = self
+
+    def raise_for_status(self) -> None:
+        pass
+
+    async def iter_chunked(self, size: int) -> AsyncIterator[bytes]:
+        f = await asyncio.to_thread(open, self.path, "rb")
+        try:
+            while True:
+                chunk = await asyncio.to_thread(f.read, size)
+                if not chunk:
+                    return
+                yield chunk
+        finally:
+            await asyncio.to_thread(f.close)
+
+    async def read(self) -> bytes:
+        return b"".join([chunk async for chunk in self.iter_chunked(STREAM_CHUNK_SIZE)])
+
+    async def json(self, content_type: Optional[str] = None) -> Any:
+        return json.loads(await self.read())
+
+
+class _MirrorSession:
+    """
+    Stand-in for an aiohttp session that resolves every GET against the mirror.
+
+    The async counterpart of mirror.MirrorAdapter, using the same keys, so a
+    mirror recorded by either kind of client serves both. A mirror URL is
+    fetched with a separate session, so API keys are never sent to it.
+    """
+
+    def __init__(self, upstream: aiohttp.ClientSession, location: str, record: bool, connector: aiohttp.TCPConnector):
+        self.upstream = upstream  # The client's own session, used to record
+        self.location = location
+        self.remote = location.startswith(("http://", "https://"))
+        self.record = record
+        self.mirror_session = aiohttp.ClientSession(connector=connector) if self.remote else None
+
+    @property
+    def closed(self) -> bool:
+        return self.upstream.closed
+
+    async def close(self) -> None:
+        await self.upstream.close()
+        if self.mirror_session is not None:
+            await self.mirror_session.close()
+
+    def _missing(self, url: str) -> aiohttp.ClientConnectionError:
+        return aiohttp.ClientConnectionError(f"GET {url} is not in the mirror at {self.location}")
+
+    @asynccontextmanager
+    async def get(self, url: str, params=None):
+        # Build the URL the way requests does, so the keys match those of the blocking clients
+        url = requests.Request("GET", url, params=params).prepare().url
+        key = mirror_key("GET", url)
+
+        if self.remote:
+            async with self.mirror_session.get(f"{self.location.rstrip('/')}/{quote(key)}") as response:
+                if response.status == 404:
+                    raise self._missing(url)
+                yield response
+            return
+
+        path = os.path.join(self.location, *key.split("/"))
+        if self.record:
+            async with self.upstream.get(url) as response:
+                if response.status != 200:
+                    yield response
+                    return
+                await asyncio.to_thread(os.makedirs, os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.{id(response)}.part"
+                f = await asyncio.to_thread(open, tmp_path, "wb")
+                try:
+                    async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                        await asyncio.to_thread(f.write, chunk)
+                finally:
+                    await asyncio.to_thread(f.close)
+                os.replace(tmp_path, path)
+
+        if not os.path.exists(path):
+            raise self._missing(url)
+        yield _MirrorFile(path)
+
+
+class _AsyncClient:
+    """
+    Owns an aiohttp session with connection limits; use as 'async with Client() as client'.
+
+    With a mirror configured (--mirror or MCSM_MIRROR), every request is
+    resolved against it, like the blocking clients' requests.
+    """
+
+    BASE_URL = ""
+    USER_AGENT = ""
+
+    def __init__(self, limit: int = DEFAULT_CONNECTION_LIMIT, limit_per_host: int = DEFAULT_HOST_CONNECTION_LIMIT):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.headers = {"User-Agent": self.USER_AGENT}
+        self._session: Optional[Union[aiohttp.ClientSession, _MirrorSession]] = None
+
+    @property
+    def session(self) -> Union[aiohttp.ClientSession, _MirrorSession]:
+        # Sessions must be created inside a running event loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host)
+            self._session = aiohttp.ClientSession(headers=self.headers, connector=connector)
+            location = get_mirror_location()
+            if location:
+                mirror_connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host)
+                self._session = _MirrorSession(self._session, location, is_recording_mirror(), mirror_connector)
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _iter_json_array(self, url: str, key: Optional[str] = None, params=None) -> AsyncIterator[Any]:
+        """
+        GET an array (or the array under a top-level key) and yield its elements as they arrive.
+
+        Raises:
+            ValueError: If the response is not a complete JSON array
+        """
+        async with self.session.get(url, params=params) as response:
+            response.raise_for_status()
+            parser = JsonArrayParser(key)
+            async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                for element in parser.feed(chunk):
+                    yield element
+                if parser.done:
+                    return
+            for element in parser.close():
+                yield element
+
+    async def _first_json_array_element(self, url: str, key: Optional[str] = None, params=None) -> Optional[Any]:
+        """First element of a streamed array (the rest is not downloaded), or None if it is empty."""
+        elements = self._iter_json_array(url, key, params)
+        try:
+            return await anext(elements, None)
+        finally:
+            await elements.aclose()
+
+
+class AsyncModrinthClient(_AsyncClient):
+    """Async counterpart of ModrinthClient built on aiohttp."""
+
+    BASE_URL = ModrinthClient.BASE_URL
+    USER_AGENT = ModrinthClient.USER_AGENT
+
+    async def search_mod(self, slug: str, game_version: str, mod_loader: Union[str, List[str]]) -> Optional[Dict[str, Any]]:
+        """
+        Search for a mod by slug and filter by game version and mod loader.
+
+        Args:
+            slug: The mod's slug (e.g., 'sodium', 'fabric-api')
+            game_version: Minecraft version (e.g., '1.21.1')
+            mod_loader: Mod loader type, or a list of accepted loaders
+
+        Returns:
+            Dict containing project info and matching version, or None if not found
+        """
+        loaders = mod_loader if isinstance(mod_loader, list) else [mod_loader]
+        params = {"game_versions": json.dumps([game_version]), "loaders": json.dumps(loaders)}
+
+        try:
+            async with self.session.get(f"{self.BASE_URL}/project/{slug}") as project_response:
+                project_response.raise_for_status()
+                project_data = compact_record(await project_response.json(content_type=None), MODRINTH_PROJECT_FIELDS)
+
+            # Versions are listed newest first; only the first one is decoded
+            latest_version = await self._first_json_array_element(f"{self.BASE_URL}/project/{slug}/version", params=params)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            print(f"Error searching for mod '{slug}' on Modrinth: {e}")
+            return None
+
+        if not latest_version:
+            print(f"No compatible version found for {slug} (MC {game_version}, {mod_loader})")
+            return None
+
+        return {"project": project_data, "version": compact_modrinth_version(latest_version)}
+
+    def get_mod_download_url(self, version_data: Dict[str, Any]) -> Optional[str]:
+        """
+        Extract the download URL from version data.
+
+        Args:
+            version_data: Version data from the API
+
+        Returns:
+            Download URL string or None
+        """
+        files = version_data.get("files", [])
+        if not files:
+            return None
+        return next((f for f in files if f.get("primary", False)), files[0]).get("url")
+
+    async def download_mod(self, slug: str, game_version: str, mod_loader: str, output_dir: str) -> Optional[str]:
+        """
+        Download a mod from Modrinth, verified against its published SHA-512.
+
+        Args:
+            slug: The mod's slug
+            game_version: Minecraft version
+            mod_loader: Mod loader type
+            output_dir: Directory to save the mod file
+
+        Returns:
+            Path to downloaded file or None if failed
+        """
+        mod_data = await self.search_mod(slug, game_version, mod_loader)
+        if not mod_data:
+            return None
+
+        files = mod_data["version"].get("files", [])
+        if not files:
+            print(f"No download URL found for {slug}")
+            return None
+
+        primary_file = next((f for f in files if f.get("primary", False)), files[0])
+        output_path = os.path.join(output_dir, primary_file.get("filename", f"{slug}.jar"))
+        sha512 = primary_file.get("hashes", {}).get("sha512")
+
+        if not await download_to_file(self.session, primary_file["url"], output_path, sha512, "sha512"):
+            return None
+        return output_path
+
+
+class AsyncCurseForgeClient(_AsyncClient):
+    """Async counterpart of CurseForgeClient built on aiohttp."""
+
+    BASE_URL = CurseForgeClient.BASE_URL
+    USER_AGENT = CurseForgeClient.USER_AGENT
+    MINECRAFT_GAME_ID = CurseForgeClient.MINECRAFT_GAME_ID
+
+    def __init__(self, api_key: str, **kwargs):
+        """
+        Initialize CurseForge client with API key.
+
+        Args:
+            api_key: CurseForge API key from https://console.curseforge.com/
+            **kwargs: Connection limits (limit, limit_per_host)
+        """
+        if not api_key:
+            raise ValueError("CurseForge API key is required")
+
+        super().__init__(**kwargs)
+        self.headers["x-api-key"] = api_key
+
+    async def search_mod(self, slug: str, game_version: str, mod_loader: str) -> Optional[Dict[str, Any]]:
+        """
+        Search for a mod by slug and filter by game version and mod loader.
+
+        Args:
+            slug: The mod's slug or name
+            game_version: Minecraft version (e.g., '1.20.1')
+            mod_loader: Mod loader type ('fabric' or 'forge')
+
+        Returns:
+            Dict containing mod info and matching file, or None if not found
+        """
+        params = {"gameId": self.MINECRAFT_GAME_ID, "slug": slug, "classId": 6}
+
+        try:
+            mod = await self._first_json_array_element(f"{self.BASE_URL}/mods/search", "data", params)
+            if not mod:
+                print(f"Mod '{slug}' not found on CurseForge")
+                return None
+            mod = compact_record(mod, CURSEFORGE_MOD_FIELDS)
+
+            # Keep only the newest compatible file while the file list streams in
+            latest_file = None
+            async for file in self._iter_json_array(f"{self.BASE_URL}/mods/{mod['id']}/files", "data"):
+                if is_compatible_curseforge_file(file, game_version, mod_loader) and (
+                    latest_file is None or file.get("fileDate", "") > latest_file.get("fileDate", "")
+                ):
+                    latest_file = compact_record(file, CURSEFORGE_FILE_FIELDS)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            print(f"Error searching for mod '{slug}' on CurseForge: {e}")
+            return None
+
+        if not latest_file:
+            print(f"No compatible files found for {slug} (MC {game_version}, {mod_loader})")
+            return None
+
+        return {"mod": mod, "file": latest_file}
+
+    async def get_mod_file_url(self, mod_id: int, file_id: int) -> Optional[str]:
+        """
+        Get download URL for a specific mod file.
+
+        Args:
+            mod_id: CurseForge mod ID
+            file_id: CurseForge file ID
+
+        Returns:
+            Download URL or None
+        """
+        try:
+            async with self.session.get(f"{self.BASE_URL}/mods/{mod_id}/files/{file_id}/download-url") as response:
+                response.raise_for_status()
+                return (await response.json(content_type=None)).get("data")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Error getting download URL: {e}")
+            return None
+
+    async def download_mod(self, slug: str, game_version: str, mod_loader: str, output_dir: str) -> Optional[str]:
+        """
+        Download a mod from CurseForge, verified against its published SHA-1.
+
+        Args:
+            slug: The mod's slug
+            game_version: Minecraft version
+            mod_loader: Mod loader type
+            output_dir: Directory to save the mod file
+
+        Returns:
+            Path to downloaded file or None if failed
+        """
+        mod_data = await self.search_mod(slug, game_version, mod_loader)
+        if not mod_data:
+            return None
+
+        file_data = mod_data["file"]
+        download_url = file_data.get("downloadUrl") or await self.get_mod_file_url(mod_data["mod"]["id"], file_data["id"])
+        if not download_url:
+            print(f"No download URL found for {slug}")
+            return None
+
+        output_path = os.path.join(output_dir, file_data["fileName"])
+        sha1 = next((h["value"] for h in file_data.get("hashes", []) if h.get("algo") == 1), None)
+
+        if not await download_to_file(self.session, download_url, output_path, sha1, "sha1"):
+            return None
+        return output_path
+
+
+async def download_mods_from_config_async(config, output_dir: str, cf_api_key: Optional[str] = None) -> Tuple[List[str], List[str]]:
+    """
+    Resolve and download every mod in a configuration concurrently on one event loop.
+
+    Args:
+        config: ModConfig object containing mod specifications
+        output_dir: Directory to save mods
+        cf_api_key: Optional CurseForge API key for CurseForge mods
+
+    Returns:
+        Tuple of (downloaded file paths, slugs that failed)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    async with AsyncModrinthClient() as modrinth_client:
+        curseforge_client = AsyncCurseForgeClient(cf_api_key) if cf_api_key else None
+        try:
+            async def download(mod):
+                if mod.platform == "modrinth":
+                    return await modrinth_client.download_mod(mod.slug, config.minecraft_version, config.mod_loader, output_dir)
+                if not curseforge_client:
+                    print(f"Skipping {mod.slug}: CurseForge API key not provided")
+                    return None
+                return await curseforge_client.download_mod(mod.slug, config.minecraft_version, config.mod_loader, output_dir)
+
+            results = await asyncio.gather(*(download(mod) for mod in config.mods))
+        finally:
+            if curseforge_client:
+                await curseforge_client.close()
+
+    downloaded = [path for path in results if path]
+    failed = [mod.slug for mod, path in zip(config.mods, results) if not path]
+    return downloaded, failed
@@ -0,0 +1,363 @@
+import os
+import re
+import secrets
+import shlex
+import subprocess
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from docker_manager import (
+    SERVER_STOP_TIMEOUT,
+    container_action,
+    get_container_stats,
+    get_data_volume,
+    inspect_container,
+    run_container,
+    run_in_volume,
+    wait_for_log,
+)
+from rcon import RCON_PORT, RconClient, RconError, generate_rcon_password
+from server_properties import update_properties
+from utils import parse_memory_size
+
+# Simulation distances tried, smallest first; each trial extends the previous one's workload
+SIMULATION_DISTANCES = (4, 6, 8, 10, 12)
+
+# View distances considered once the simulation distance is chosen, at most
+# MAX_VIEW_DISTANCE_EXTRA chunks beyond it (the extra chunks are estimated, not measured)
+VIEW_DISTANCES = (6, 8, 10, 12, 14, 16)
+MAX_VIEW_DISTANCE_EXTRA = 4
+
+# Trial containers are named '<prefix><id>'
+AUTOTUNE_PREFIX = "mcsm-autotune-"
+
+# Fixed seed so trials of the same image generate the same terrain
+AUTOTUNE_SEED = "mcsm-autotune"
+
+# Blocks between the virtual players of the workload (no two share a chunk at any distance tried)
+PLAYER_SPACING = 1024
+
+# Mobs summoned around each virtual player, cycled through these types
+LOAD_MOBS = ("cow", "sheep", "pig", "chicken", "villager")
+
+# 'forceload add' accepts at most this many chunks per command
+MAX_FORCELOAD_CHUNKS = 256
+
+# Share of the memory budget a configuration may use (the rest is left for spikes)
+MEMORY_HEADROOM = 0.85
+
+# Maximum time the trial server may take to boot
+BOOT_TIMEOUT = 600
+
+# Console commands reporting the tick time, tried in order: vanilla 1.20.3+, Forge/NeoForge, Paper.
+# Forge prints 'Overall : Mean tick time', NeoForge 'Overall: Mean tick time'
+MSPT_QUERIES = (
+    ("tick query", re.compile(r"Average time per tick: ([\d.]+)\s*ms"), re.compile(r"P95: ([\d.]+)\s*ms")),
+    ("neoforge tps", re.compile(r"Overall\s*: Mean tick time: ([\d.]+) ms"), None),
+    ("forge tps", re.compile(r"Overall\s*: Mean tick time: ([\d.]+) ms"), None),
+    ("mspt", re.compile(r"◴\s*([\d.]+)/"), None),
+)
+
+# Minecraft formatting codes in command output (e.g. '§a')
+_FORMATTING = re.compile("§.")
+
+
+@dataclass(slots=True)
+class Trial:
+    """Measurements of the workload at one simulation distance."""
+    simulation_distance: int
+    ticking_chunks: int
+    mspt: float
+    mspt_p95: Optional[float]
+    memory: int
+
+
+def _chunk_squares(players: int, radius: int) -> List[Tuple[int, int, int, int]]:
+    """Block-coordinate squares covering `radius` chunks around each virtual player, split for 'forceload add'."""
+    rows_per_command = max(1, MAX_FORCELOAD_CHUNKS // (2 * radius + 1))
+    squares = []
+    for player in range(players):
+        center_x = player * PLAYER_SPACING // 16
+        for first_row in range(-radius, radius + 1, rows_per_command):
+            last_row = min(radius, first_row + rows_per_command - 1)
+            squares.append(((center_x - radius) * 16, first_row * 16, (center_x + radius) * 16 + 15, last_row * 16 + 15))
+    return squares
+
+
+class TrialServer:
+    """Throwaway server booted from an image under the hardware budget, driven over RCON."""
+
+    def __init__(self, image: str, xmx: str, xms: str, cpus: Optional[float], memory: Optional[str],
+                 properties: Optional[Dict[str, object]] = None, env: Optional[Dict[str, str]] = None,
+                 files: Optional[Dict[str, str]] = None, prefix: str = AUTOTUNE_PREFIX):
+        """
+        Args:
+            image: Server image
+            xmx: Maximum heap size
+            xms: Initial heap size
+            cpus: Docker --cpus limit
+            memory: Docker --memory limit
+            properties: Extra server.properties entries
+            env: Extra container environment
+            files: Files written into /app before the first boot, by path relative to /app
+            prefix: Container name prefix
+        """
+        self.name = f"{prefix}{secrets.token_hex(4)}"
+        self.image = image
+        self.xmx = xmx
+        self.xms = xms
+        self.cpus = cpus
+        self.memory = memory
+        self.properties = properties or {}
+        self.env = env or {}
+        self.files = files or {}
+        self.password = generate_rcon_password()
+        self.host: Optional[str] = None
+        self.rcon: Optional[RconClient] = None
+        self.mspt_query = None
+
+    def start(self, players: int) -> bool:
+        """Create the container, enable RCON and boot it."""
+        limits = []
+        if self.cpus:
+            limits += ["--cpus", str(self.cpus)]
+        if self.memory:
+            limits += ["--memory", self.memory]
+        if not run_container(
+            self.name, self.image,
+            ports=[],
+            env={"EULA": "TRUE", "XMX": self.xmx, "XMS": self.xms, **self.env},
+            volumes={f"{self.name}-data": "/app"},
+            extra_args=["--stop-timeout", str(SERVER_STOP_TIMEOUT)] + limits,
+            start=False
+        ):
+            return False
+
+        properties = {"enable-rcon": "true", "rcon.port": RCON_PORT, "rcon.password": self.password,
+                      "level-seed": AUTOTUNE_SEED, "max-players": players, "spawn-protection": 0, **self.properties}
+        lines = " ".join(shlex.quote(f"{key}={value}") for key, value in properties.items())
+        script = f"printf '%s\\n' {lines} >> /app/server.properties"
+        for path, content in self.files.items():
+            script += f" && printf '%s' {shlex.quote(content)} > {shlex.quote('/app/' + path)}"
+        if run_in_volume(f"{self.name}-data", script) is None:
+            return False
+
+        print(f"Booting trial server '{self.name}' from {self.image}...")
+        if not container_action("start", self.name) or not wait_for_log(self.name, "Done (", BOOT_TIMEOUT):
+            print("Trial server did not boot")
+            return False
+
+        hosts = inspect_container(self.name, "{{range .NetworkSettings.Networks}}{{.IPAddress}} {{end}}") or ""
+        self.host = hosts.split(" ")[0]
+        self.rcon = RconClient(self.host, RCON_PORT, self.password, timeout=120)
+        try:
+            self.rcon.connect()
+        except RconError as e:
+            print(f"Could not connect to the trial server: {e}")
+            return False
+        return True
+
+    def command(self, command: str) -> str:
+        return _FORMATTING.sub("", self.rcon.command(command))
+
+    def measure_mspt(self) -> Optional[Tuple[float, Optional[float]]]:
+        """
+        Get the current mean tick time and, if the server reports it, the 95th percentile.
+
+        Returns:
+            Tuple of (mean, p95) in milliseconds, or None if no supported command reports it
+        """
+        queries = [self.mspt_query] if self.mspt_query else MSPT_QUERIES
+        for query in queries:
+            command, mean_pattern, p95_pattern = query
+            output = self.command(command)
+            mean = mean_pattern.search(output)
+            if mean:
+                self.mspt_query = query
+                p95 = p95_pattern.search(output) if p95_pattern else None
+                return float(mean.group(1)), float(p95.group(1)) if p95 else None
+        return None
+
+    def add_workload(self, players: int, radius: int, mobs_per_player: int, summon_mobs: bool) -> None:
+        """
+        Extend the synthetic workload to `radius` chunks around each virtual player.
+
+        Forceloaded chunks tick like the chunks within a player's simulation
+        distance. The mobs are only summoned with the first trial.
+        """
+        # Chunks forceloaded by an earlier trial are skipped by the server
+        for x1, z1, x2, z2 in _chunk_squares(players, radius):
+            self.command(f"forceload add {x1} {z1} {x2} {z2}")
+
+        if not summon_mobs:
+            return
+        for player in range(players):
+            x = player * PLAYER_SPACING
+            tag = f"mcsm_load_{player}"
+            for i in range(mobs_per_player):
+                mob = LOAD_MOBS[i % len(LOAD_MOBS)]
+                self.command(f'summon minecraft:{mob} {x} 200 0 {{Tags:["{tag}"],PersistenceRequired:1b}}')
+            self.command(f"spreadplayers {x} 0 1 48 false @e[tag={tag}]")
+
+    def remove(self) -> None:
+        if self.rcon:
+            self.rcon.close()
+        subprocess.run(["docker", "rm", "-f", self.name], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        subprocess.run(["docker", "volume", "rm", f"{self.name}-data"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def run_trials(server: TrialServer, players: int, mobs_per_player: int, duration: int,
+               target_mspt: float, memory_limit: Optional[int]) -> List[Trial]:
+    """
+    Measure the workload at increasing simulation distances.
+
+    Trials stop at the first simulation distance over the MSPT target or the
+    memory budget, since larger ones only add chunks.
+
+    Returns:
+        Trials in order, including the first failing one
+    """
+    trials = []
+    for distance in SIMULATION_DISTANCES:
+        print(f"\nTrial: simulation-distance {distance} for {players} player(s)...")
+        server.add_workload(players, distance, mobs_per_player, summon_mobs=not trials)
+
+        # Let chunk generation and mob spawning settle before measuring
+        time.sleep(min(30, duration))
+        samples = []
+        for _ in range(max(1, duration // 5)):
+            sample = server.measure_mspt()
+            if sample is None:
+                print("The server does not report its tick time ('tick query' needs Minecraft 1.20.3+)")
+                return trials
+            samples.append(sample)
+            time.sleep(5)
+
+        p95s = [p95 for _, p95 in samples if p95 is not None]
+        trial = Trial(
+            simulation_distance=distance,
+            ticking_chunks=players * (2 * distance + 1) ** 2,
+            mspt=sum(mean for mean, _ in samples) / len(samples),
+            mspt_p95=max(p95s) if p95s else None,
+            memory=(get_container_stats(server.name) or {}).get("memory", 0),
+        )
+        trials.append(trial)
+        p95 = f", p95 {trial.mspt_p95:.1f} ms" if trial.mspt_p95 is not None else ""
+        print(f"  {trial.ticking_chunks} ticking chunks: {trial.mspt:.1f} ms/tick{p95}, "
+              f"{trial.memory / (1024 * 1024):.0f} MiB")
+
+        if trial.mspt > target_mspt or (memory_limit and trial.memory > memory_limit):
+            break
+    return trials
+
+
+def choose_settings(trials: List[Trial], baseline_memory: int, players: int, target_mspt: float,
+                    memory_limit: Optional[int], cpus: Optional[float]) -> Optional[Dict[str, object]]:
+    """
+    Pick server.properties for the measured trials.
+
+    The simulation distance is the largest one measured within the MSPT
+    target and memory budget. Chunks beyond it are only loaded for view
+    distance, which cannot be measured without connected clients; their
+    memory is estimated from the measured memory per ticking chunk.
+
+    Returns:
+        Properties to write, or None if no trial fits
+    """
+    fitting = [t for t in trials if t.mspt <= target_mspt and not (memory_limit and t.memory > memory_limit)]
+    if not fitting:
+        return None
+    best = fitting[-1]
+
+    per_chunk = max(0, best.memory - baseline_memory) / best.ticking_chunks
+    view_distance = best.simulation_distance
+    for distance in VIEW_DISTANCES:
+        estimate = baseline_memory + per_chunk * players * (2 * distance + 1) ** 2
+        if best.simulation_distance <= distance <= best.simulation_distance + MAX_VIEW_DISTANCE_EXTRA \
+                and (not memory_limit or estimate <= memory_limit):
+            view_distance = distance
+
+    # Little tick headroom or few cores: compress fewer packets and track entities less far
+    constrained = best.mspt > target_mspt * 0.6 or (cpus is not None and cpus <= 2)
+    return {
+        "view-distance": view_distance,
+        "simulation-distance": best.simulation_distance,
+        "network-compression-threshold": 512 if constrained else 256,
+        "entity-broadcast-range-percentage": 75 if constrained else 100,
+        "max-players": players,
+    }
+
+
+def write_settings(server_name: str, settings: Dict[str, object]) -> bool:
+    """Set the settings in the server.properties of a server's data volume, replacing existing keys."""
+    volume = get_data_volume(server_name)
+    if volume is None:
+        return False
+    current = run_in_volume(volume, "cat /app/server.properties 2>/dev/null; true")
+    if current is None:
+        return False
+
+    with tempfile.TemporaryDirectory(prefix="mcsm-autotune-") as staging_dir:
+        properties_path = os.path.join(staging_dir, "server.properties")
+        with open(properties_path, "w") as f:
+            f.write(current)
+        update_properties(properties_path, settings)
+        # Overwrite the contents rather than the file, so its owner and mode are kept
+        return run_in_volume(volume, "cat /staging/server.properties > /app/server.properties",
+                             {staging_dir: "/staging:ro"}) is not None
+
+
+def autotune(args) -> None:
+    """Entry point for the 'autotune' command."""
+    image = args.image
+    if args.server_name:
+        if inspect_container(args.server_name, "{{.Name}}") is None:
+            print(f"Server '{args.server_name}' does not exist")
+            return
+        image = image or inspect_container(args.server_name, "{{.Config.Image}}")
+
+    memory_limit = parse_memory_size(args.memory) if args.memory else None
+    if args.memory and not memory_limit:
+        print(f"Invalid --memory: {args.memory}")
+        return
+    heap = parse_memory_size(args.xmx)
+    if not heap:
+        print(f"Invalid --xmx: {args.xmx}")
+        return
+    if memory_limit and heap >= memory_limit:
+        print(f"Warning: --xmx {args.xmx} leaves no room for the JVM's own memory within --memory {args.memory}")
+    budget = int(memory_limit * MEMORY_HEADROOM) if memory_limit else None
+
+    server = TrialServer(image, args.xmx, args.xms, args.cpus, args.memory)
+    try:
+        if not server.start(args.players):
+            return
+        baseline_memory = (get_container_stats(server.name) or {}).get("memory", 0)
+        trials = run_trials(server, args.players, args.autotune_mobs, args.autotune_duration, args.target_mspt, budget)
+    except RconError as e:
+        print(f"Lost the trial server: {e}")
+        return
+    finally:
+        server.remove()
+
+    settings = choose_settings(trials, baseline_memory, args.players, args.target_mspt, budget, args.cpus)
+    print(f"\n{'='*60}")
+    if not settings:
+        print(f"No configuration keeps {args.players} player(s) within {args.target_mspt} ms/tick"
+              + (f" and {args.memory}" if args.memory else "") + ". Lower --players or raise the budget.")
+        print(f"{'='*60}")
+        return
+
+    print(f"Best configuration for {args.players} player(s)"
+          + (f" on {args.cpus} CPU(s)" if args.cpus else "") + (f" with {args.memory}" if args.memory else "") + ":")
+    for key, value in settings.items():
+        print(f"  {key}={value}")
+
+    if args.server_name:
+        if write_settings(args.server_name, settings):
+            print(f"\nWritten to the server.properties of '{args.server_name}'. Restart the server to apply it.")
+        else:
+            print(f"\n'{args.server_name}' has no data volume (split layout); set these in server.properties yourself.")
+    print(f"{'='*60}")
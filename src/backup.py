@@ -0,0 +1,99 @@
+import os
+import subprocess
+import time
+from typing import Dict, Optional
+
+from cache import get_cache_path
+from docker_manager import inspect_container, run_in_volume
+
+# Seconds to wait after 'save-all flush' before the world files are read
+SAVE_FLUSH_WAIT = 5
+
+# Script archiving the volume mounted at /app into /backup
+BACKUP_SCRIPT = 'tar -czf "/backup/{archive}" -C /app . && {chown}true'
+
+
+def get_server_volumes(server_name: str) -> Optional[Dict[str, str]]:
+    """
+    Get the named volumes of a server container.
+
+    Args:
+        server_name: Container name
+
+    Returns:
+        Dict mapping volume name to mount point, or None if the container does not exist
+    """
+    output = inspect_container(
+        server_name, '{{range .Mounts}}{{if eq .Type "volume"}}{{.Name}}={{.Destination}};{{end}}{{end}}'
+    )
+    if output is None:
+        return None
+    return dict(mount.split("=", 1) for mount in output.split(";") if mount)
+
+
+def send_console_command(server_name: str, command: str) -> bool:
+    """Write a command to the console FIFO of a running Java server."""
+    result = subprocess.run(
+        ["docker", "exec", server_name, "sh", "-c", f"echo '{command}' > /tmp/minecraft-console"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    return result.returncode == 0
+
+
+def backup_server(server_name: str, backup_dir: str) -> Optional[str]:
+    """
+    Archive every volume of a server.
+
+    A running server keeps running: autosaves are paused and the world is
+    flushed to disk (and a tmpfs world synced to its volume) while the
+    volumes are archived.
+
+    Args:
+        server_name: Container name
+        backup_dir: Directory the backup folder is created in
+
+    Returns:
+        Path of the backup folder, or None if the backup failed
+    """
+    volumes = get_server_volumes(server_name)
+    if volumes is None:
+        print(f"Server '{server_name}' does not exist")
+        return None
+
+    target = os.path.abspath(os.path.join(backup_dir, f"{server_name}-{time.strftime('%Y%m%d-%H%M%S')}"))
+    os.makedirs(target, exist_ok=True)
+
+    running = inspect_container(server_name, "{{.State.Status}}") == "running"
+    paused_saves = running and send_console_command(server_name, "save-off")
+    if paused_saves:
+        send_console_command(server_name, "save-all flush")
+        time.sleep(SAVE_FLUSH_WAIT)
+        if "/worlds-disk" in volumes.values():
+            subprocess.run(
+                ["docker", "exec", server_name, "bash", "-c", "source /usr/local/bin/entrypoint-common.sh && sync_world"],
+                stdout=subprocess.DEVNULL
+            )
+
+    # Files written by the helper container are owned by root; hand them back to the host user
+    chown = f"chown {os.getuid()}:{os.getgid()} /backup/*; " if hasattr(os, "getuid") else ""
+    ok = True
+    try:
+        for volume, mount_point in volumes.items():
+            archive = f"{volume}.tar.gz"
+            print(f"Archiving volume '{volume}' ({mount_point})...")
+            if run_in_volume(volume, BACKUP_SCRIPT.format(archive=archive, chown=chown), {target: "/backup"}) is None:
+                ok = False
+    finally:
+        if paused_saves:
+            send_console_command(server_name, "save-on")
+
+    if not ok:
+        print(f"Backup of '{server_name}' is incomplete: {target}")
+        return None
+    print(f"Backup of '{server_name}' saved to {target}")
+    return target
+
+
+def backup(args) -> None:
+    """Entry point for the 'backup' command."""
+    backup_server(args.server_name, args.backup_dir or get_cache_path("backups", ""))
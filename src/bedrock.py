@@ -0,0 +1,125 @@
+import os
+import shutil
+import zipfile
+from typing import Optional
+
+from build_context import BuildContext
+from cache import get_cache_path, get_cached_artifact, get_json_cached
+from http_client import get_session
+from server_properties import update_properties
+
+BEDROCK_LINKS_URL = "https://net-secondary.web.minecraft-services.net/api/v1.0/download/links"
+BEDROCK_DOWNLOAD_URL = "https://www.minecraft.net/bedrockdedicatedserver/bin-linux/bedrock-server-{version}.zip"
+
+# minecraft.net rejects requests without a browser-like User-Agent
+BEDROCK_USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) Minecraft-Server-Management/0.0.1"
+
+# Tuned server.properties defaults for Bedrock Dedicated Server
+BEDROCK_PROPERTIES = {
+    "view-distance": 10,   # Default is 32, which is far more than most clients render
+    "tick-distance": 4,    # Minimum simulation radius (in chunks) around players
+    "max-threads": 0,      # As many as the server's machine has cores (the default is 8)
+}
+
+
+def get_bedrock_download_url(version: str) -> Optional[str]:
+    """
+    Get the Bedrock Dedicated Server (Linux) download URL.
+
+    Args:
+        version: BDS version (e.g., '1.21.44.01') or 'latest'
+
+    Returns:
+        Download URL or None if not found
+    """
+    if version != "latest":
+        return BEDROCK_DOWNLOAD_URL.format(version=version)
+
+    links_data = get_json_cached(BEDROCK_LINKS_URL, "bedrock-download-links")
+    if not links_data:
+        return None
+
+    for link in links_data.get("result", {}).get("links", []):
+        if link.get("downloadType") == "serverBedrockLinux":
+            return link.get("downloadUrl")
+
+    print("No Linux Bedrock server download found")
+    return None
+
+
+def get_extracted_bedrock_server(version: str) -> Optional[str]:
+    """
+    Download and extract a Bedrock Dedicated Server release, once per version.
+
+    The zip and its extracted contents are kept in the cache, so later builds
+    reference identical files and Docker can reuse the image layer built from them.
+
+    Args:
+        version: BDS version or 'latest'
+
+    Returns:
+        Path to the extracted server directory or None if failed
+    """
+    download_url = get_bedrock_download_url(version)
+    if not download_url:
+        print("Failed to get Bedrock server download URL.")
+        return None
+
+    zip_name = os.path.basename(download_url)
+    extract_dir = get_cache_path("bedrock", os.path.splitext(zip_name)[0], "")
+    marker_path = os.path.join(extract_dir, ".extracted")
+    if os.path.exists(marker_path):
+        print(f"Using cached Bedrock server: {zip_name}")
+        return extract_dir
+
+    session = get_session({"User-Agent": BEDROCK_USER_AGENT})
+    zip_path = get_cached_artifact(download_url, os.path.join("bedrock", zip_name), session=session)
+    if not zip_path:
+        return None
+
+    print(f"Extracting {zip_name}...")
+    try:
+        with zipfile.ZipFile(zip_path) as archive:
+            archive.extractall(extract_dir)
+    except zipfile.BadZipFile as e:
+        print(f"Invalid Bedrock server archive: {e}")
+        os.remove(zip_path)
+        return None
+
+    os.chmod(os.path.join(extract_dir, "bedrock_server"), 0o755)
+    with open(marker_path, "w") as f:
+        f.write(download_url)
+
+    return extract_dir
+
+
+def add_bedrock_server(version: str, build_context: BuildContext) -> bool:
+    """
+    Reference Bedrock Dedicated Server files and tuned settings in a build context.
+
+    The server files are referenced straight from the cache instead of copied.
+    The tuned server.properties is added separately so the large server layer
+    stays identical between builds.
+
+    Args:
+        version: BDS version or 'latest'
+        build_context: Build context to add the files to
+
+    Returns:
+        True if the server files are ready
+    """
+    server_dir = get_extracted_bedrock_server(version)
+    if not server_dir:
+        return False
+
+    build_context.add_tree(server_dir, "bedrock-server")
+    build_context.remove("bedrock-server/.extracted")
+
+    properties_path = f"{server_dir.rstrip(os.sep)}.server.properties"
+    shutil.copy(os.path.join(server_dir, "server.properties"), properties_path)
+    update_properties(properties_path, BEDROCK_PROPERTIES)
+    build_context.add_file(properties_path, "server.properties")
+    print("Applied tuned server.properties defaults: " +
+          ", ".join(f"{k}={v}" for k, v in BEDROCK_PROPERTIES.items()))
+
+    return True
@@ -0,0 +1,170 @@
+import hashlib
+import io
+import json
+import os
+import tarfile
+from typing import Dict, List, Union
+
+from cache import get_file_hashes, load_cached_json, save_cached_json
+
+
+class BuildContext:
+    """
+    A Docker build context assembled from references to existing files.
+
+    Files are added by path (e.g. straight from the artifact cache) and are
+    only read while the context tar is streamed to Docker, so nothing is
+    copied into a staging directory. Large, rarely-changing subtrees can be
+    split into a separate base context that is only sent when it changes.
+    """
+
+    # Marker file so the base context image is never empty
+    BASE_MARKER = ".context-base"
+
+    def __init__(self):
+        self.files: Dict[str, Union[str, bytes]] = {}  # arcname -> source path or file content
+        self.base_prefixes: List[str] = []
+
+    def add_file(self, source_path: str, arcname: str) -> None:
+        """
+        Reference a file at a path inside the context.
+
+        Args:
+            source_path: Path of the file on disk
+            arcname: Path of the file inside the context
+        """
+        self.files[arcname.replace(os.sep, "/")] = source_path
+
+    def add_bytes(self, data: bytes, arcname: str) -> None:
+        """
+        Add generated file content to the context.
+
+        Args:
+            data: File content
+            arcname: Path of the file inside the context
+        """
+        self.files[arcname.replace(os.sep, "/")] = data
+
+    def add_tree(self, source_dir: str, arcname: str = "") -> None:
+        """
+        Reference every file below a directory.
+
+        Args:
+            source_dir: Directory on disk
+            arcname: Directory inside the context ('' for the context root)
+        """
+        for root, _, filenames in os.walk(source_dir):
+            rel_root = os.path.relpath(root, source_dir)
+            for filename in filenames:
+                rel_path = filename if rel_root == "." else os.path.join(rel_root, filename)
+                self.add_file(os.path.join(root, filename), os.path.join(arcname, rel_path))
+
+    def remove(self, arcname: str) -> None:
+        """
+        Drop a file from the context if present.
+
+        Args:
+            arcname: Path of the file inside the context
+        """
+        self.files.pop(arcname.replace(os.sep, "/"), None)
+
+    def split_base(self, prefixes: List[str]) -> None:
+        """
+        Move the given top-level directories into the base context.
+
+        Args:
+            prefixes: Directory names inside the context (e.g., ['libraries'])
+        """
+        self.base_prefixes = [p.strip("/") for p in prefixes]
+
+    def _is_base(self, arcname: str) -> bool:
+        return any(arcname == p or arcname.startswith(f"{p}/") for p in self.base_prefixes)
+
+    def _entries(self, base: bool) -> Dict[str, Union[str, bytes]]:
+        entries = {name: src for name, src in self.files.items() if self._is_base(name) == base}
+        if base:
+            copies = "".join(f"COPY {p} /{p}\n" for p in self.base_prefixes
+                             if any(name == p or name.startswith(f"{p}/") for name in entries))
+            entries[self.BASE_MARKER] = b"base context\n"
+            entries["Dockerfile"] = f"FROM scratch\nCOPY {self.BASE_MARKER} /{self.BASE_MARKER}\n{copies}".encode()
+        return entries
+
+    def has_base(self) -> bool:
+        """Whether any referenced file belongs to the base context."""
+        return any(self._is_base(name) for name in self.files)
+
+    def manifest(self, base: bool = False) -> Dict[str, str]:
+        """
+        Get the content manifest (arcname -> sha256) of the main or base context.
+
+        File hashes come from the persistent hash index, so unchanged files
+        are not read again.
+
+        Args:
+            base: True for the base context, False for the main context
+
+        Returns:
+            Dict mapping arcnames to content hashes
+        """
+        entries = self._entries(base)
+        paths = [src for src in entries.values() if isinstance(src, str)]
+        file_hashes = get_file_hashes(paths)
+        return {
+            name: file_hashes[src] if isinstance(src, str) else hashlib.sha256(src).hexdigest()
+            for name, src in sorted(entries.items())
+        }
+
+    def base_digest(self) -> str:
+        """Short digest identifying the exact content of the base context."""
+        manifest_json = json.dumps(self.manifest(base=True), sort_keys=True).encode()
+        return hashlib.sha256(manifest_json).hexdigest()[:16]
+
+    def size(self, base: bool = False) -> int:
+        """Total size in bytes of the main or base context."""
+        return sum(os.path.getsize(src) if isinstance(src, str) else len(src)
+                   for src in self._entries(base).values())
+
+    def write_tar(self, fileobj, base: bool = False) -> None:
+        """
+        Stream the main or base context as an uncompressed tar.
+
+        Args:
+            fileobj: Writable binary stream (e.g., a process's stdin)
+            base: True for the base context, False for the main context
+        """
+        with tarfile.open(fileobj=fileobj, mode="w|") as tar:
+            for arcname, src in sorted(self._entries(base).items()):
+                if isinstance(src, bytes):
+                    info = tarfile.TarInfo(arcname)
+                    info.size = len(src)
+                    info.mode = 0o644
+                    tar.addfile(info, io.BytesIO(src))
+                    continue
+
+                info = tar.gettarinfo(src, arcname)
+                if info.isreg():
+                    with open(src, "rb") as f:
+                        tar.addfile(info, f)
+                else:
+                    tar.addfile(info)
+
+
+def report_context_changes(image_name: str, context: BuildContext) -> None:
+    """
+    Compare the main context with the one last sent for an image and print what changed.
+
+    Args:
+        image_name: Image the context is built for
+        context: Build context about to be sent
+    """
+    manifest_key = "context-" + image_name.replace("/", "_").replace(":", "_")
+    previous = load_cached_json(manifest_key) or {}
+    current = context.manifest()
+
+    changed = [name for name, digest in current.items() if previous.get(name) != digest]
+    removed = [name for name in previous if name not in current]
+    if previous:
+        print(f"Build context: {len(changed)} changed, {len(removed)} removed, "
+              f"{len(current) - len(changed)} unchanged file(s)")
+
+    save_cached_json(manifest_key, current)
@@ -0,0 +1,275 @@
+import hashlib
+import json
+import os
+import struct
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from http_client import get_session
+
+# Root directory for cached metadata and downloaded artifacts.
+# Can be overridden with the MCSM_CACHE_DIR environment variable.
+CACHE_DIR = os.environ.get(
+    "MCSM_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "minecraft-server-management")
+)
+
+# Default lifetime of cached API metadata (build lists, version manifests, ...)
+DEFAULT_METADATA_MAX_AGE = 60 * 60
+
+# Parsed metadata documents by path, with the modification time they were read at.
+# Long-running processes (the daemon) serve repeated lookups from memory; callers
+# must not modify returned documents without saving them back.
+_parsed_json: Dict[str, Tuple[int, Any]] = {}
+
+
+def get_cache_path(*parts: str) -> str:
+    """
+    Build a path inside the cache directory, creating parent directories.
+
+    Args:
+        *parts: Path components relative to the cache root
+
+    Returns:
+        Absolute path inside the cache directory
+    """
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def murmur2_fingerprint(file_path: str) -> str:
+    """
+    Compute the CurseForge fingerprint of a file.
+
+    CurseForge identifies files by MurmurHash2 (seed 1) of their content with
+    tab, newline, carriage return and space bytes removed.
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        Fingerprint as a decimal string
+    """
+    with open(file_path, "rb") as f:
+        data = f.read().translate(None, b"\t\n\r ")
+
+    m = 0x5BD1E995
+    mask = 0xFFFFFFFF
+    length = len(data)
+    h = (1 ^ length) & mask
+
+    aligned = length - length % 4
+    for (k,) in struct.iter_unpack("<I", data[:aligned]):
+        k = (k * m) & mask
+        k ^= k >> 24
+        h = ((h * m) & mask) ^ ((k * m) & mask)
+
+    tail = data[aligned:]
+    if len(tail) == 3:
+        h ^= tail[2] << 16
+    if len(tail) >= 2:
+        h ^= tail[1] << 8
+    if tail:
+        h = ((h ^ tail[0]) * m) & mask
+
+    h ^= h >> 13
+    h = (h * m) & mask
+    h ^= h >> 15
+    return str(h)
+
+
+def file_hash(file_path: str, algorithm: str = "sha256") -> str:
+    """
+    Compute the hex digest of a file.
+
+    Args:
+        file_path: Path to the file
+        algorithm: hashlib algorithm name (e.g., 'sha256', 'sha1', 'md5'),
+            or 'murmur2' for the CurseForge fingerprint
+
+    Returns:
+        Hex digest string
+    """
+    if algorithm == "murmur2":
+        return murmur2_fingerprint(file_path)
+
+    digest = hashlib.new(algorithm)
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_cached_json(key: str, max_age: Optional[float] = None) -> Optional[Any]:
+    """
+    Load a cached JSON document.
+
+    Args:
+        key: Cache key (relative file name under 'metadata/')
+        max_age: Maximum age in seconds, or None to accept any age
+
+    Returns:
+        Parsed JSON data or None if missing, expired or unreadable
+    """
+    path = get_cache_path("metadata", f"{key}.json")
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    if max_age is not None and time.time() - stat.st_mtime > max_age:
+        return None
+
+    parsed = _parsed_json.get(path)
+    if parsed and parsed[0] == stat.st_mtime_ns:
+        return parsed[1]
+
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    _parsed_json[path] = (stat.st_mtime_ns, data)
+    return data
+
+
+def save_cached_json(key: str, data: Any) -> None:
+    """
+    Store a JSON document in the cache.
+
+    Args:
+        key: Cache key (relative file name under 'metadata/')
+        data: JSON-serializable data
+    """
+    path = get_cache_path("metadata", f"{key}.json")
+    # Daemon jobs run in parallel threads, so every writer gets its own temporary file
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    # Stat our own file: by the time the replace returns, another writer's file may be in place
+    mtime_ns = os.stat(tmp_path).st_mtime_ns
+    os.replace(tmp_path, path)
+    _parsed_json[path] = (mtime_ns, data)
+
+
+def get_json_cached(url: str, key: str, max_age: float = DEFAULT_METADATA_MAX_AGE,
+                    session: Optional[requests.Session] = None,
+                    params: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+    """
+    Fetch a JSON document, serving it from the metadata cache while fresh.
+
+    If the request fails, a stale cached copy is returned when available.
+
+    Args:
+        url: URL of the JSON document
+        key: Cache key for the document
+        max_age: Maximum age of the cached copy in seconds
+        session: Optional requests session to use
+        params: Optional query parameters
+
+    Returns:
+        Parsed JSON data or None if unavailable
+    """
+    cached = load_cached_json(key, max_age)
+    if cached is not None:
+        return cached
+
+    try:
+        getter = (session or get_session()).get
+        response = getter(url, params=params)
+        response.raise_for_status()
+        data = response.json()
+        save_cached_json(key, data)
+        return data
+    except requests.exceptions.RequestException as e:
+        stale = load_cached_json(key)
+        if stale is not None:
+            print(f"Warning: could not refresh {url} ({e}), using cached copy")
+            return stale
+        print(f"Error fetching {url}: {e}")
+        return None
+
+
+def get_cached_artifact(url: str, filename: str, expected_hash: Optional[str] = None,
+                        hash_algorithm: str = "sha256",
+                        session: Optional[requests.Session] = None) -> Optional[str]:
+    """
+    Return a path to a downloaded artifact, downloading it only once.
+
+    Artifacts are stored under 'artifacts/' in the cache directory. When an
+    expected hash is given, a cached copy is only reused if it matches.
+
+    Args:
+        url: Download URL
+        filename: File name (may include subdirectories) inside the artifact cache
+        expected_hash: Optional expected hex digest
+        hash_algorithm: Algorithm of expected_hash
+        session: Optional requests session to download with
+
+    Returns:
+        Path to the cached artifact or None if download failed
+    """
+    from downloader import download_file
+
+    path = get_cache_path("artifacts", filename)
+    if os.path.exists(path):
+        if not expected_hash or file_hash(path, hash_algorithm) == expected_hash.lower():
+            print(f"Using cached {filename}")
+            return path
+        print(f"Cached {filename} failed hash verification, downloading again")
+
+    # Parallel jobs may fetch the same artifact; each downloads to its own file and the last one wins
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+    if not download_file(url, tmp_path, expected_hash, hash_algorithm, session=session):
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+    os.replace(tmp_path, path)
+    return path
+
+
+def get_file_hashes(file_paths, algorithm: str = "sha256", max_workers: int = 8) -> Dict[str, str]:
+    """
+    Hash many files in parallel, reusing results from a persistent hash index.
+
+    The index is keyed by absolute path, size and modification time, so files
+    that have not changed since the last run are not read again.
+
+    Args:
+        file_paths: Iterable of file paths
+        algorithm: hashlib algorithm name
+        max_workers: Number of files hashed concurrently
+
+    Returns:
+        Dict mapping each given path to its hex digest
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    index_key = f"hash-index-{algorithm}"
+    index = dict(load_cached_json(index_key) or {})
+    hashes = {}
+    pending = []
+
+    for path in file_paths:
+        stat = os.stat(path)
+        abs_path = os.path.abspath(path)
+        entry = index.get(abs_path)
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            hashes[path] = entry[2]
+        else:
+            pending.append((path, abs_path, stat))
+
+    if pending:
+        # hashlib releases the GIL on large buffers, so threads hash in parallel
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            digests = executor.map(lambda item: file_hash(item[0], algorithm), pending)
+            for (path, abs_path, stat), digest in zip(pending, digests):
+                hashes[path] = digest
+                index[abs_path] = [stat.st_size, stat.st_mtime_ns, digest]
+        save_cached_json(index_key, index)
+
+    return hashes
@@ -1,16 +1,181 @@
 import argparse
 
-def parse_args():
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(description="Minecraft Server Management Tool")
-    parser.add_argument("--server-type", choices=["vanilla", "plugins", "mods", "bedrock"], required=True, help="Type of server to create.")
-    parser.add_argument("--server-version", required=True, help="Version of the Minecraft server to install.")
+    parser.add_argument("command", nargs="?", default="create", choices=["create", "update-mods", "check-updates", "mirror", "pool", "hibernate", "backup", "daemon", "scan-jars", "autotune", "loadtest", "fleet", "logs", "gc-report"], help="Action to perform. Default: create.")
+    parser.add_argument("subcommand", nargs="?", choices=["sync", "fill", "get", "drain", "status", "add", "remove", "place", "index", "search"], help="Subcommand (mirror: sync; pool: fill, get, drain, status; fleet: add, remove, status, drain, place; logs: index, search).")
+    parser.add_argument("--server-type", choices=["vanilla", "plugins", "mods", "bedrock"], help="Type of server to create (required for create).")
+    parser.add_argument("--server-version", help="Version of the Minecraft server to install (required for create).")
     parser.add_argument("--server-name", help="Optional name for the server container and volume.")
+    parser.add_argument("--yes", action="store_true", help="Answer yes to every confirmation prompt.")
     parser.add_argument("--xmx", default="1024M", help="Maximum memory allocation for the server (e.g., 1024M, 2G).")
     parser.add_argument("--xms", default="1024M", help="Initial memory allocation for the server (e.g., 1024M, 2G).")
+    parser.add_argument("--java-runtime", choices=["jre", "jlink"], default="jre", help="Java runtime for the server image: Temurin JRE or a jlink-trimmed runtime. Default: jre.")
+    parser.add_argument("--java-version", type=int, help="Override the Java major version (defaults to the version Mojang specifies for --server-version).")
+    parser.add_argument("--jvm-opts", help="Extra JVM options for the server (e.g., \"-XX:+UseZGC\"), used by every launch mode including Forge/NeoForge run.sh.")
+    parser.add_argument("--data-layout", choices=["volume", "split"], default="volume", help="Java server data layout: 'volume' keeps everything in one data volume at /app; 'split' keeps server files in the image and the world and logs on their own volumes. Default: volume.")
+    parser.add_argument("--world-tmpfs", help="With --data-layout split: run the world from a tmpfs of this size (e.g., 2g), synced back to the world volume periodically and on shutdown.")
+    parser.add_argument("--resource-profile", choices=["none", "shared", "dedicated"], default="none", help="Java server resource limits: 'shared' sets a memory limit from the heap and a CPU quota (--cpus); 'dedicated' also pins the server to --cpus whole cores no other server uses. The host is never overcommitted. Default: none.")
+    parser.add_argument("--world-sync-interval", type=int, default=300, help="Seconds between syncs of a tmpfs world back to its volume. Default: 300.")
     
     # Modded server arguments
     parser.add_argument("--mod-loader", choices=["forge", "fabric", "neoforge"], help="Mod loader type (required for --server-type mods).")
     parser.add_argument("--mod-config", help="Path to mod configuration JSON file (optional for --server-type mods).")
+    parser.add_argument("--modpack", help="Path to a Modrinth .mrpack or CurseForge modpack (zip or manifest.json) to install (for --server-type mods).")
     parser.add_argument("--curseforge-api-key", help="CurseForge API key for downloading CurseForge mods.")
+    parser.add_argument("--install-in-docker", action="store_true", help="Run the mod loader installer as a cached stage of the Docker build instead of on the host (no host Java needed).")
+    parser.add_argument("--keep-client-mods", action="store_true", help="Do not exclude client-only mods (detected from Modrinth project data and jar metadata) from the server.")
+    parser.add_argument("--build-cache", help="Registry reference for importing/exporting the BuildKit layer cache (e.g., registry.example.com/mc-cache).")
     
-    return parser.parse_args()
+    # Plugin server arguments
+    parser.add_argument("--server-software", choices=["paper", "purpur"], default="paper", help="Plugin server software (for --server-type plugins). Default: paper.")
+    parser.add_argument("--plugin-config", help="Path to plugin configuration JSON file (optional for --server-type plugins).")
+    
+    # Mirror arguments
+    parser.add_argument("--mirror", help="Local mirror directory or URL to resolve and download everything from (also MCSM_MIRROR). For 'mirror sync', the directory to fill.")
+    parser.add_argument("--config", action="append", help="mirror sync: mod config, plugin config or modpack to prefetch (repeatable).")
+    
+    # Standby pool arguments
+    parser.add_argument("--template", help="pool: name of the standby pool template. loadtest: template whose image, heap and properties are tested.")
+    parser.add_argument("--image", help="pool fill: server image the template's standbys run (defines or updates the template). scan-jars: server image to scan. autotune, loadtest: image to benchmark (default: the image of --server-name).")
+    parser.add_argument("--pool-size", type=int, default=2, help="pool fill: number of standby servers to keep booted. Default: 2.")
+    parser.add_argument("--property", action="append", help="pool fill: server.properties override KEY=VALUE for standbys (repeatable).")
+    parser.add_argument("--port", type=int, default=25565, help="Host port of the server (create, pool get), or the port the hibernation proxy listens on. Default: 25565.")
+    parser.add_argument("--pool-command", action="append", help="pool get: console command to run on the handed-out server (repeatable).")
+    
+    # Hibernation arguments
+    parser.add_argument("--proxy", action="append", help="hibernate: NAME:PORT of a server container and the public port to listen on for it (repeatable).")
+    parser.add_argument("--idle-timeout", type=int, default=600, help="hibernate: seconds without players before a server is hibernated. Default: 600.")
+    parser.add_argument("--hibernate-mode", choices=["stop", "pause"], default="stop", help="hibernate: 'stop' frees the server's memory, 'pause' freezes it for instant wake-up. Default: stop.")
+    
+    # Mod update arguments
+    parser.add_argument("--keep-unlisted", action="store_true", help="update-mods: keep installed mods that are not in the mod config or modpack.")
+    parser.add_argument("--no-restart", action="store_true", help="update-mods: stage the new mods without restarting the server.")
+    parser.add_argument("--mods-dir", help="check-updates, scan-jars: local mods folder to check instead of a server's data volume.")
+    
+    # Backup arguments
+    parser.add_argument("--backup-dir", help="backup: directory backups are written to. Default: backups/ in the cache directory.")
+    
+    # Jar scan arguments
+    parser.add_argument("--server-dir", help="scan-jars: local server folder whose mods/ and libraries/ are scanned.")
+    
+    # Autotune arguments
+    parser.add_argument("--players", type=int, default=10, help="autotune: player count the configuration must handle. Default: 10.")
+    parser.add_argument("--cpus", type=float, help="CPUs of the server with --resource-profile (default: 2), or the CPU budget (docker --cpus) autotune and loadtest run the benchmark server with.")
+    parser.add_argument("--memory", help="Memory limit of the server with --resource-profile (default: heap plus off-heap headroom), or the memory budget (docker --memory, e.g., 4g) autotune and loadtest run the benchmark server with.")
+    parser.add_argument("--target-mspt", type=float, default=40.0, help="autotune: highest acceptable mean tick time in milliseconds. Default: 40.")
+    parser.add_argument("--autotune-duration", type=int, default=60, help="autotune: seconds each setting is measured for. Default: 60.")
+    parser.add_argument("--autotune-mobs", type=int, default=50, help="autotune: mobs summoned around each simulated player. Default: 50.")
+    
+    # Load test arguments
+    parser.add_argument("--max-bots", type=int, default=200, help="loadtest: most bots connected. Default: 200.")
+    parser.add_argument("--bots-per-step", type=int, default=10, help="loadtest: bots added per step. Default: 10.")
+    parser.add_argument("--step-duration", type=int, default=60, help="loadtest: seconds each step is measured for. Default: 60.")
+    parser.add_argument("--min-tps", type=float, default=19.0, help="loadtest: TPS below which the server is considered over capacity. Default: 19.")
+    parser.add_argument("--bot-speed", type=float, default=10.0, help="loadtest: blocks per second the bots fly at. Default: 10.")
+    
+    # Fleet arguments
+    parser.add_argument("--host", help="Fleet host to act on (fleet add, remove, drain), to place on (fleet place), to create the server on ('auto' picks one), or whose servers' logs to index ('all' for every host).")
+    parser.add_argument("--endpoint", help="fleet add: Docker endpoint of the host (a DOCKER_HOST value, e.g., ssh://user@host or tcp://localhost:23750).")
+    parser.add_argument("--host-ports", default="25565-25664", help="fleet add: host ports handed out to servers on the host. Default: 25565-25664.")
+    parser.add_argument("--plan", help="fleet place: JSON file listing the 'create' arguments of each server.")
+    
+    # Log index arguments
+    parser.add_argument("--exception", help="logs search: only events with this exception in the chain (e.g., java.lang.NullPointerException or NullPointerException).")
+    parser.add_argument("--mod-id", help="logs search: only events whose stack trace or crash report points at this mod or plugin.")
+    parser.add_argument("--since", help="logs search: only events after this age (e.g., 6h, 7d) or UTC date and time (e.g., 2026-10-19 14:00).")
+    parser.add_argument("--until", help="logs search: only events before this age or UTC date and time.")
+    parser.add_argument("--kind", choices=["crash", "error", "warn"], help="logs search: only crash reports, logged errors, or warnings with a stack trace.")
+    parser.add_argument("--grep", help="logs search: only events whose message contains this text.")
+    parser.add_argument("--limit", type=int, default=20, help="logs search: most recent events listed. Default: 20.")
+    
+    # GC report arguments
+    parser.add_argument("--restart-window", help="gc-report: daily local time window (HH:MM-HH:MM) in which servers with a likely memory leak are restarted.")
+    parser.add_argument("--restart-max-players", type=int, default=0, help="gc-report: most players online for a restart in --restart-window. Default: 0.")
+    parser.add_argument("--watch", type=int, help="gc-report: check again every this many seconds until interrupted.")
+    
+    # Daemon arguments
+    parser.add_argument("--listen", help="daemon: Unix socket path or HOST:PORT to serve the API on. Default: daemon.sock in the cache directory.")
+    parser.add_argument("--daemon-workers", type=int, default=2, help="daemon: number of jobs run at the same time. Default: 2.")
+    
+    args = parser.parse_args(argv)
+    
+    if args.command == "create":
+        if not args.server_type:
+            parser.error("--server-type is required for create")
+        if not args.server_version:
+            parser.error("--server-version is required for create")
+        if args.data_layout == "split" and args.server_type == "bedrock":
+            parser.error("--data-layout split is only supported for Java servers")
+        if args.resource_profile != "none" and args.server_type == "bedrock":
+            parser.error("--resource-profile is only supported for Java servers")
+        if (args.cpus or args.memory) and args.resource_profile == "none":
+            parser.error("--cpus and --memory require --resource-profile shared or dedicated for create")
+        if args.world_tmpfs and args.data_layout != "split":
+            parser.error("--world-tmpfs requires --data-layout split")
+        if args.host and (args.resource_profile == "none" or not args.server_name):
+            parser.error("--host requires --resource-profile shared or dedicated and --server-name")
+    elif args.command == "update-mods":
+        if not args.server_name:
+            parser.error("--server-name is required for update-mods")
+        if not args.mod_config and not args.modpack:
+            parser.error("--mod-config or --modpack is required for update-mods")
+    elif args.command == "mirror":
+        if args.subcommand != "sync":
+            parser.error("mirror requires a subcommand: sync")
+        if not args.mirror or args.mirror.startswith(("http://", "https://")):
+            parser.error("--mirror must be a local directory for mirror sync")
+        if not args.config and not args.server_version:
+            parser.error("mirror sync requires --config and/or --server-version")
+    elif args.command == "pool":
+        if args.subcommand not in ["fill", "get", "drain", "status"]:
+            parser.error("pool requires a subcommand: fill, get, drain or status")
+        if args.subcommand != "status" and not args.template:
+            parser.error(f"--template is required for pool {args.subcommand}")
+        if args.subcommand == "get" and not args.server_name:
+            parser.error("--server-name is required for pool get")
+        if any("=" not in p for p in args.property or []):
+            parser.error("--property must be KEY=VALUE")
+    elif args.command == "hibernate":
+        if not args.proxy and not args.server_name:
+            parser.error("hibernate requires --proxy NAME:PORT or --server-name (with --port)")
+        if any(":" not in p for p in args.proxy or []):
+            parser.error("--proxy must be NAME:PORT")
+    elif args.command == "backup":
+        if not args.server_name:
+            parser.error("--server-name is required for backup")
+    elif args.command == "scan-jars":
+        if not (args.mods_dir or args.server_dir or args.image):
+            parser.error("--mods-dir, --server-dir or --image is required for scan-jars")
+    elif args.command == "autotune":
+        if not (args.image or args.server_name):
+            parser.error("--image or --server-name is required for autotune")
+        if args.players < 1:
+            parser.error("--players must be at least 1")
+    elif args.command == "loadtest":
+        if not (args.template or args.image or args.server_name):
+            parser.error("--template, --image or --server-name is required for loadtest")
+        if args.bots_per_step < 1 or args.max_bots < 1:
+            parser.error("--bots-per-step and --max-bots must be at least 1")
+    elif args.command == "fleet":
+        if args.subcommand not in ["add", "remove", "status", "drain", "place"]:
+            parser.error("fleet requires a subcommand: add, remove, status, drain or place")
+        if args.subcommand in ["add", "remove", "drain"] and not args.host:
+            parser.error(f"--host is required for fleet {args.subcommand}")
+        if args.subcommand == "add" and not args.endpoint:
+            parser.error("--endpoint is required for fleet add")
+        if args.subcommand == "place" and not args.plan:
+            parser.error("--plan is required for fleet place")
+    elif args.command == "logs":
+        if args.subcommand not in ["index", "search"]:
+            parser.error("logs requires a subcommand: index or search")
+    elif args.command == "gc-report":
+        if args.watch is not None and args.watch < 1:
+            parser.error("--watch must be at least 1 second")
+    elif args.command == "check-updates":
+        if not args.server_name and not args.mods_dir:
+            parser.error("--server-name or --mods-dir is required for check-updates")
+        if not args.mod_loader or not args.server_version:
+            parser.error("--mod-loader and --server-version are required for check-updates")
+    
+    return args
@@ -0,0 +1,381 @@
+import asyncio
+import io
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+from typing import Any, Dict, List, Optional
+
+# Commands that can be submitted as jobs. 'hibernate' and 'daemon' run forever, and
+# 'mirror' swaps the process-wide cache directory, so they are not available
+# ('gc-report' is, but not with --watch, which also runs forever).
+JOB_COMMANDS = ("create", "update-mods", "check-updates", "scan-jars", "autotune", "loadtest", "fleet", "logs", "gc-report", "pool", "backup")
+
+# Commands sharing the working directory's build context folder; they run one at a time
+EXCLUSIVE_COMMANDS = ("create",)
+
+# Finished jobs kept for status and log queries
+MAX_FINISHED_JOBS = 200
+
+# Modules imported at start-up so jobs do not pay for it
+WARM_MODULES = ("main", "downloader", "mod_loaders", "mod_platforms", "modpacks", "plugin_servers",
+                "mod_updates", "update_check", "jar_scanner", "autotune", "loadtest", "fleet", "log_index", "gc_telemetry", "pool", "backup", "hibernation")
+
+# The job run by the current thread, if any
+_current = threading.local()
+
+
+class Job:
+    """A command run by the daemon, with its captured output."""
+
+    def __init__(self, argv: List[str]):
+        self.id = uuid.uuid4().hex[:12]
+        self.argv = argv
+        self.command = argv[0]
+        self.state = "queued"  # queued, running, succeeded, failed
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.output: List[str] = []
+        self.changed = threading.Condition()
+
+    @property
+    def done(self) -> bool:
+        return self.state in ("succeeded", "failed")
+
+    def write(self, text: str) -> None:
+        with self.changed:
+            self.output.append(text)
+            self.changed.notify_all()
+
+    def set_state(self, state: str, error: Optional[str] = None) -> None:
+        with self.changed:
+            self.state = state
+            self.error = error
+            if state == "running":
+                self.started = time.time()
+            elif self.done:
+                self.finished = time.time()
+            self.changed.notify_all()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "argv": self.argv,
+            "state": self.state,
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+
+class JobOutput(io.TextIOBase):
+    """
+    sys.stdout/sys.stderr replacement sending each job's output to the job.
+
+    Output of threads that do not run a job (and of helper threads started
+    by a job, e.g. download workers) goes to the daemon's own stream.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text: str) -> int:
+        job = getattr(_current, "job", None)
+        if job is None:
+            return self.stream.write(text)
+        job.write(text)
+        return len(text)
+
+    def flush(self) -> None:
+        if getattr(_current, "job", None) is None:
+            self.stream.flush()
+
+
+class Daemon:
+    """Job queue running CLI commands in one long-lived process."""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.started = time.time()
+        self.jobs: Dict[str, Job] = {}
+        self.jobs_lock = threading.Lock()
+        self.exclusive_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+
+    def submit(self, argv: List[str]) -> Job:
+        """
+        Validate a command line and queue it.
+
+        Raises:
+            ValueError: If the command line is invalid
+        """
+        from cli import parse_args
+
+        if not argv or argv[0] not in JOB_COMMANDS:
+            raise ValueError(f"Command must be one of: {', '.join(JOB_COMMANDS)}")
+        if "--mirror" in argv:
+            raise ValueError("--mirror applies to the whole daemon; start it with --mirror instead")
+
+        # argparse prints the usage and error on stderr and exits; capture them for the response
+        job = Job(argv)
+        _current.job = job
+        try:
+            args = parse_args(argv)
+        except SystemExit:
+            raise ValueError("".join(job.output).strip().splitlines()[-1])
+        finally:
+            _current.job = None
+        if args.watch:
+            raise ValueError("--watch runs until interrupted and would hold a worker forever; run it outside the daemon")
+
+        with self.jobs_lock:
+            self.jobs[job.id] = job
+            finished = [j for j in self.jobs.values() if j.done]
+            for old in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+                del self.jobs[old.id]
+        self.executor.submit(self.run, job)
+        return job
+
+    def run(self, job: Job) -> None:
+        from main import main
+
+        _current.job = job
+        lock = self.exclusive_lock if job.command in EXCLUSIVE_COMMANDS else None
+        try:
+            if lock:
+                lock.acquire()
+            job.set_state("running")
+            main(job.argv)
+            job.set_state("succeeded")
+        except SystemExit as e:
+            if e.code:
+                job.set_state("failed", f"Exited with status {e.code}")
+            else:
+                job.set_state("succeeded")
+        except Exception as e:
+            job.write(f"\nJob failed: {e!r}\n")
+            job.set_state("failed", repr(e))
+        finally:
+            if lock:
+                lock.release()
+            _current.job = None
+
+    def get_job(self, job_id: str) -> Optional[Job]:
+        with self.jobs_lock:
+            return self.jobs.get(job_id)
+
+    def list_jobs(self) -> List[Job]:
+        with self.jobs_lock:
+            return list(self.jobs.values())
+
+    def status(self) -> Dict[str, Any]:
+        from http_client import get_mirror_location
+
+        states: Dict[str, int] = {}
+        for job in self.list_jobs():
+            states[job.state] = states.get(job.state, 0) + 1
+        return {
+            "uptime": round(time.time() - self.started, 1),
+            "workers": self.workers,
+            "jobs": states,
+            "mirror": get_mirror_location(),
+        }
+
+
+def server_status(server_name: str) -> Optional[Dict[str, Any]]:
+    """
+    Get a server's container state and, if it answers, its Server List Ping status.
+
+    Returns:
+        Status dict, or None if the container does not exist
+    """
+    from docker_manager import inspect_container
+    from hibernation import query_status
+
+    state = inspect_container(server_name, "{{.State.Status}}")
+    if state is None:
+        return None
+
+    status = {"name": server_name, "state": state, "players": None, "version": None}
+    hosts = inspect_container(server_name, "{{range .NetworkSettings.Networks}}{{.IPAddress}} {{end}}") or ""
+    host = hosts.split(" ")[0]
+    if state == "running" and host:
+        ping = asyncio.run(query_status(host, timeout=2))
+        if ping:
+            status["players"] = ping.get("players")
+            status["version"] = ping.get("version", {}).get("name")
+    return status
+
+
+class DaemonRequestHandler(BaseHTTPRequestHandler):
+    """
+    HTTP API of the daemon.
+
+        GET  /status                 Daemon status and job counts
+        GET  /servers/<name>         Container state and players of a server
+        GET  /jobs                   All jobs
+        POST /jobs                   Queue a job: {"argv": ["create", "--server-type", ...]}
+        GET  /jobs/<id>              Job state
+        GET  /jobs/<id>/log          Job output; streamed until the job ends with ?follow=1
+    """
+
+    server_version = "mcsm-daemon"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, data: Any, status: int = 200) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        daemon: Daemon = self.server.daemon
+        path, _, query = self.path.partition("?")
+        parts = [p for p in path.split("/") if p]
+
+        if parts == ["status"]:
+            self.send_json(daemon.status())
+        elif len(parts) == 2 and parts[0] == "servers":
+            status = server_status(parts[1])
+            if status is None:
+                self.send_json({"error": f"Server '{parts[1]}' does not exist"}, 404)
+            else:
+                self.send_json(status)
+        elif parts == ["jobs"]:
+            self.send_json([job.to_dict() for job in daemon.list_jobs()])
+        elif len(parts) in (2, 3) and parts[0] == "jobs":
+            job = daemon.get_job(parts[1])
+            if job is None:
+                self.send_json({"error": f"Unknown job {parts[1]}"}, 404)
+            elif len(parts) == 2:
+                self.send_json(job.to_dict())
+            elif parts[2] == "log":
+                self.stream_log(job, "follow=1" in query.split("&"))
+            else:
+                self.send_json({"error": "Not found"}, 404)
+        else:
+            self.send_json({"error": "Not found"}, 404)
+
+    def do_POST(self):
+        daemon: Daemon = self.server.daemon
+        if self.path.rstrip("/") != "/jobs":
+            self.send_json({"error": "Not found"}, 404)
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            argv = json.loads(self.rfile.read(length) or b"{}").get("argv")
+            if not isinstance(argv, list) or not all(isinstance(a, str) for a in argv):
+                raise ValueError('Body must be {"argv": [...]}')
+            job = daemon.submit(argv)
+        except (ValueError, AttributeError) as e:
+            self.send_json({"error": str(e)}, 400)
+            return
+        self.send_json(job.to_dict(), 202)
+
+    def stream_log(self, job: Job, follow: bool) -> None:
+        """Send a job's output, and with follow, keep sending it as it is written until the job ends."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.end_headers()
+
+        sent = 0
+        while True:
+            with job.changed:
+                while follow and sent == len(job.output) and not job.done:
+                    job.changed.wait()
+                chunks = job.output[sent:]
+                sent += len(chunks)
+                finished = job.done or not follow
+            try:
+                if chunks:
+                    self.wfile.write("".join(chunks).encode())
+                    self.wfile.flush()
+            except OSError:
+                return
+            if finished and sent == len(job.output):
+                return
+
+
+class UnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ("local", 0)
+
+
+def create_server(listen: str) -> Any:
+    """
+    Create the API server.
+
+    Args:
+        listen: 'HOST:PORT' for TCP, or a Unix socket path
+
+    Returns:
+        Server instance
+    """
+    if ":" in listen and not listen.startswith(("/", ".")):
+        host, port = listen.rsplit(":", 1)
+        return ThreadingHTTPServer((host, int(port)), DaemonRequestHandler)
+
+    if os.path.exists(listen):
+        # Refuse to take over the socket of a daemon that is still running
+        probe = socket.socket(socket.AF_UNIX)
+        try:
+            probe.connect(listen)
+            raise OSError(f"A daemon is already listening on {listen}")
+        except ConnectionRefusedError:
+            os.remove(listen)
+        finally:
+            probe.close()
+
+    server = UnixHTTPServer(listen, DaemonRequestHandler)
+    os.chmod(listen, 0o600)
+    return server
+
+
+def run_daemon(args) -> None:
+    """Entry point for the 'daemon' command."""
+    import importlib
+    import utils
+    from cache import get_cache_path
+
+    listen = args.listen or get_cache_path("daemon.sock")
+    try:
+        server = create_server(listen)
+    except OSError as e:
+        print(f"Could not listen on {listen}: {e}")
+        return
+
+    # Jobs cannot answer prompts; their output is captured per job
+    utils.ASSUME_YES = True
+    sys.stdout = JobOutput(sys.stdout)
+    sys.stderr = JobOutput(sys.stderr)
+
+    for module in WARM_MODULES:
+        importlib.import_module(module)
+
+    server.daemon = Daemon(args.daemon_workers)
+    print(f"Daemon listening on {listen} ({args.daemon_workers} worker(s))")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopped")
+    finally:
+        server.server_close()
+        if isinstance(server, UnixHTTPServer) and os.path.exists(listen):
+            os.remove(listen)
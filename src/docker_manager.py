@@ -0,0 +1,459 @@
+import io
+import re
+import subprocess
+import sys
+import threading
+from typing import Dict, List, Optional, Union
+
+from build_context import BuildContext, report_context_changes
+from utils import parse_memory_size
+
+# Repository for images holding the base part of a split build context
+CONTEXT_BASE_IMAGE = "mcsm-context-base"
+
+# Java major versions published as eclipse-temurin images
+TEMURIN_VERSIONS = [8, 11, 17, 21, 25]
+
+# Modules kept in jlink-trimmed runtimes; covers the vanilla server, Paper and common mods
+JLINK_MODULES = [
+    "java.base", "java.compiler", "java.desktop", "java.instrument", "java.logging",
+    "java.management", "java.naming", "java.net.http", "java.rmi", "java.scripting",
+    "java.sql", "java.xml", "jdk.management", "jdk.naming.dns", "jdk.net",
+    "jdk.unsupported", "jdk.zipfs", "jdk.localedata",
+]
+
+
+def get_java_build_args(java_version: int, java_runtime: str = "jre") -> Dict[str, str]:
+    """
+    Get the Docker build arguments selecting the Java runtime of a server image.
+
+    Args:
+        java_version: Required Java major version (from Mojang's javaVersion)
+        java_runtime: 'jre' for the Temurin JRE image, 'jlink' for a trimmed runtime
+
+    Returns:
+        Dict of build arguments for the Java Dockerfiles
+    """
+    # Use the closest published Temurin release that satisfies the requirement
+    image_version = next((v for v in TEMURIN_VERSIONS if v >= java_version), TEMURIN_VERSIONS[-1])
+
+    if java_runtime == "jlink" and image_version < 11:
+        print(f"jlink is not available for Java {image_version}, using the JRE image instead")
+        java_runtime = "jre"
+
+    modules = list(JLINK_MODULES)
+    if image_version < 22:
+        # EC crypto (needed for TLS to Mojang's auth servers) lives in java.base from Java 22
+        modules.append("jdk.crypto.ec")
+
+    print(f"Using Java {image_version} ({java_runtime}) runtime")
+    return {
+        "JAVA_VERSION": str(image_version),
+        "JAVA_RUNTIME": java_runtime,
+        "BASE_DISTRO": "jammy" if image_version <= 21 else "noble",
+        "JLINK_MODULES": ",".join(modules),
+    }
+
+
+def image_exists(image_name: str) -> bool:
+    """
+    Check whether an image exists in the local Docker daemon.
+
+    Args:
+        image_name: Image name or tag
+
+    Returns:
+        True if the image exists
+    """
+    result = subprocess.run(["docker", "image", "inspect", image_name],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return result.returncode == 0
+
+
+def _stdout_is_captured() -> bool:
+    """True if sys.stdout is not a real file (e.g. output captured per job by the daemon)."""
+    try:
+        sys.stdout.fileno()
+        return False
+    except (AttributeError, ValueError, io.UnsupportedOperation):
+        return True
+
+
+def _run_with_output(command: List[str], context: Optional[BuildContext] = None, base: bool = False) -> bool:
+    """
+    Run a command whose output the user should see, optionally streaming a context tar to its stdin.
+
+    The command writes to the terminal directly, unless sys.stdout is
+    captured; then its output is copied to sys.stdout line by line.
+    """
+    captured = _stdout_is_captured()
+    process = subprocess.Popen(
+        command,
+        stdin=subprocess.PIPE if context else None,
+        stdout=subprocess.PIPE if captured else None,
+        stderr=subprocess.STDOUT if captured else None
+    )
+
+    def send_context():
+        try:
+            context.write_tar(process.stdin, base)
+        except BrokenPipeError:
+            pass
+        finally:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+
+    sender = None
+    if context and captured:
+        # Send the context from a thread so the output pipe is drained meanwhile
+        sender = threading.Thread(target=send_context, daemon=True)
+        sender.start()
+    elif context:
+        send_context()
+
+    if captured:
+        for line in process.stdout:
+            print(line.decode(errors="replace"), end="")
+    if sender:
+        sender.join()
+    return process.wait() == 0
+
+
+def _stream_build(build_command: List[str], context: BuildContext, base: bool = False) -> bool:
+    """Run a 'docker build ... -' command, streaming the context tar to its stdin."""
+    return _run_with_output(build_command, context, base)
+
+
+def build_context_base(context: BuildContext) -> Optional[str]:
+    """
+    Build the base context image holding the large, rarely-changing files.
+
+    The image is tagged with a digest of the base content manifest, so it is
+    only sent to Docker when that content changes.
+
+    Args:
+        context: Build context with base prefixes set
+
+    Returns:
+        Base image tag or None if the build failed
+    """
+    base_tag = f"{CONTEXT_BASE_IMAGE}:{context.base_digest()}"
+    size_mb = context.size(base=True) / (1024 * 1024)
+
+    if image_exists(base_tag):
+        print(f"Reusing unchanged base context {base_tag} ({size_mb:.1f} MB not sent)")
+        return base_tag
+
+    print(f"Sending base context {base_tag} ({size_mb:.1f} MB)...")
+    if not _stream_build(["docker", "build", "-t", base_tag, "-"], context, base=True):
+        print("Failed to build base context image")
+        return None
+    return base_tag
+
+
+def build_image(image_name: str, context: Union[str, BuildContext],
+                build_args: Optional[Dict[str, str]] = None,
+                cache_ref: Optional[str] = None) -> bool:
+    """
+    Build a Docker image from a build context.
+
+    A BuildContext is streamed to Docker as a tar without being copied to
+    disk first. Its base part (if any) is built as a separate image that is
+    reused while unchanged and passed to the Dockerfile as CONTEXT_BASE.
+
+    Args:
+        image_name: Tag for the built image
+        context: BuildContext, or directory containing the Dockerfile and server files
+        build_args: Optional Docker build arguments
+        cache_ref: Optional registry reference used to import and export the
+            BuildKit layer cache (shares cached stages across hosts and CI runners)
+
+    Returns:
+        True if the image was built successfully
+    """
+    build_args = dict(build_args or {})
+
+    if isinstance(context, BuildContext):
+        report_context_changes(image_name, context)
+        if context.has_base():
+            if cache_ref:
+                # buildx builders cannot see images in the local daemon, so send everything
+                context.split_base([])
+            else:
+                base_tag = build_context_base(context)
+                if not base_tag:
+                    return False
+                build_args["CONTEXT_BASE"] = base_tag
+
+    print(f"\nBuilding Docker image '{image_name}'...")
+    if cache_ref:
+        build_command = [
+            "docker", "buildx", "build", "--load", "-t", image_name,
+            "--cache-from", f"type=registry,ref={cache_ref}",
+            "--cache-to", f"type=registry,ref={cache_ref},mode=max",
+        ]
+    else:
+        build_command = ["docker", "build", "-t", image_name]
+    for key, value in build_args.items():
+        build_command += ["--build-arg", f"{key}={value}"]
+
+    if isinstance(context, BuildContext):
+        build_command.append("-")
+        success = _stream_build(build_command, context)
+    else:
+        build_command.append(context)
+        success = _run_with_output(build_command)
+
+    if success:
+        print(f"Docker image '{image_name}' built successfully.")
+    else:
+        print(f"Failed to build Docker image '{image_name}'")
+    return success
+
+
+# Seconds 'docker stop' waits for a Java server before killing it. The entrypoint
+# sends 'stop' to the console and terminates the JVM itself after STOP_TIMEOUT (90s)
+SERVER_STOP_TIMEOUT = 120
+
+
+def run_container(server_name: str, image_name: str, ports: List[str],
+                  env: Dict[str, str], volumes: Dict[str, str],
+                  extra_args: Optional[List[str]] = None, start: bool = True) -> bool:
+    """
+    Start a detached Docker container for a server.
+
+    Args:
+        server_name: Container name
+        image_name: Image to run
+        ports: Port mappings in 'host:container[/proto]' form
+        env: Environment variables to set inside the container
+        volumes: Mapping of volume name (or host path) to mount point
+        extra_args: Additional 'docker run' arguments
+        start: False to only create the container (and populate its volumes)
+
+    Returns:
+        True if the container was started (or created) successfully
+    """
+    print(f"\nRunning Docker container '{server_name}' from image '{image_name}'...")
+    run_command = ["docker", "run", "-d"] if start else ["docker", "create"]
+    run_command += ["--name", server_name]
+    for port in ports:
+        run_command += ["-p", port]
+    for key, value in env.items():
+        run_command += ["-e", f"{key}={value}"]
+    for source, target in volumes.items():
+        run_command += ["-v", f"{source}:{target}"]
+    run_command += extra_args or []
+    run_command.append(image_name)
+
+    try:
+        subprocess.run(run_command, check=True)
+        return True
+    except subprocess.CalledProcessError as e:
+        print(f"Failed to run Docker container: {e}")
+        return False
+
+
+# Small image used for one-off helper containers that work on data volumes
+HELPER_IMAGE = "alpine:3.20"
+
+
+def run_in_volume(volume: str, script: str, mounts: Optional[Dict[str, str]] = None) -> Optional[str]:
+    """
+    Run a shell script in a throwaway helper container with a data volume mounted at /app.
+
+    Args:
+        volume: Data volume name
+        script: Shell script to run
+        mounts: Optional extra mounts (host path or volume -> container path)
+
+    Returns:
+        The script's standard output, or None if it failed
+    """
+    command = ["docker", "run", "--rm", "-v", f"{volume}:/app"]
+    for source, target in (mounts or {}).items():
+        command += ["-v", f"{source}:{target}"]
+    command += [HELPER_IMAGE, "sh", "-c", script]
+
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"Helper container failed: {result.stderr.strip()}")
+        return None
+    return result.stdout
+
+
+def container_action(action: str, server_name: str) -> bool:
+    """
+    Run a lifecycle action ('start', 'stop', 'restart', 'pause', 'unpause') on a container.
+
+    Args:
+        action: Docker container subcommand
+        server_name: Container name
+
+    Returns:
+        True if the action succeeded
+    """
+    result = subprocess.run(["docker", action, server_name], capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"Failed to {action} container '{server_name}': {result.stderr.strip()}")
+        return False
+    return True
+
+
+def rename_container(server_name: str, new_name: str) -> bool:
+    """
+    Rename a container.
+
+    Args:
+        server_name: Current container name
+        new_name: New container name
+
+    Returns:
+        True if the container was renamed
+    """
+    result = subprocess.run(["docker", "rename", server_name, new_name], capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"Failed to rename container '{server_name}': {result.stderr.strip()}")
+        return False
+    return True
+
+
+def ensure_network(network: str) -> bool:
+    """
+    Create a user-defined bridge network if it does not exist yet.
+
+    Args:
+        network: Network name
+
+    Returns:
+        True if the network exists
+    """
+    if subprocess.run(["docker", "network", "inspect", network],
+                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode == 0:
+        return True
+    return subprocess.run(["docker", "network", "create", network], stdout=subprocess.DEVNULL).returncode == 0
+
+
+def inspect_container(server_name: str, template: str) -> Optional[str]:
+    """
+    Read a value from 'docker inspect' with a Go template.
+
+    Args:
+        server_name: Container name
+        template: Go template (e.g., '{{.State.Status}}')
+
+    Returns:
+        The rendered value, or None if the container does not exist
+    """
+    result = subprocess.run(["docker", "inspect", "-f", template, server_name], capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip()
+
+
+def list_containers(label: str) -> List[Dict[str, str]]:
+    """
+    List containers (running or not) carrying a label.
+
+    Args:
+        label: Label filter ('key' or 'key=value')
+
+    Returns:
+        List of dicts with 'name', 'state' and 'labels' (comma-separated key=value pairs)
+    """
+    result = subprocess.run(
+        ["docker", "ps", "-a", "--filter", f"label={label}", "--format", "{{.Names}}\t{{.State}}\t{{.Labels}}"],
+        capture_output=True, text=True
+    )
+    containers = []
+    for line in result.stdout.splitlines():
+        name, state, labels = (line.split("\t") + ["", ""])[:3]
+        containers.append({"name": name, "state": state, "labels": labels})
+    return containers
+
+
+def get_data_volume(server_name: str) -> Optional[str]:
+    """
+    Get the data volume mounted at /app of a server container.
+
+    Servers created by this tool use '<name>-data'; containers handed out
+    from a standby pool keep the volume they were created with.
+
+    Args:
+        server_name: Container name
+
+    Returns:
+        Volume name, or None if the container has no data volume (split data layout)
+    """
+    volume = inspect_container(server_name, '{{range .Mounts}}{{if eq .Destination "/app"}}{{.Name}}{{end}}{{end}}')
+    if volume is None:
+        return f"{server_name}-data"
+    return volume or None
+
+
+def wait_for_log(server_name: str, text: str, timeout: float = 300) -> bool:
+    """
+    Wait until a container's log contains some text.
+
+    Args:
+        server_name: Container name
+        text: Text to wait for (e.g., 'Done (' once the server has started)
+        timeout: Maximum time to wait in seconds
+
+    Returns:
+        True if the text appeared before the timeout and the container is still running
+    """
+    process = subprocess.Popen(["docker", "logs", "-f", "--since", "0", server_name],
+                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    timer = threading.Timer(timeout, process.kill)
+    timer.start()
+    try:
+        for line in process.stdout:
+            if text in line:
+                return True
+        return False
+    finally:
+        timer.cancel()
+        process.kill()
+        process.wait()
+
+
+def get_container_stats(server_name: str) -> Optional[Dict[str, float]]:
+    """
+    Read a running container's resource use from 'docker stats'.
+
+    Args:
+        server_name: Container name
+
+    Returns:
+        Dict with 'memory' (bytes), 'cpu_percent' (100 per core) and the
+        container's total 'net_rx'/'net_tx' bytes, or None if it is not running
+    """
+    result = subprocess.run(
+        ["docker", "stats", "--no-stream", "--format", "{{.MemUsage}}\t{{.CPUPerc}}\t{{.NetIO}}", server_name],
+        capture_output=True, text=True
+    )
+    fields = result.stdout.strip().split("\t")
+    if result.returncode != 0 or len(fields) != 3:
+        return None
+    net_rx, _, net_tx = fields[2].partition("/")
+    try:
+        cpu_percent = float(fields[1].rstrip("%"))
+    except ValueError:
+        cpu_percent = 0.0
+    return {
+        # 'docker stats' uses decimal units (kB, MB) for network I/O and binary ones (MiB) for memory
+        "memory": parse_memory_size(fields[0].split("/")[0]) or 0,
+        "cpu_percent": cpu_percent,
+        "net_rx": _parse_decimal_size(net_rx),
+        "net_tx": _parse_decimal_size(net_tx),
+    }
+
+
+def _parse_decimal_size(size: str) -> float:
+    match = re.match(r"\s*([\d.]+)\s*([kMGT]?)B", size, re.IGNORECASE)
+    if not match:
+        return 0.0
+    return float(match.group(1)) * 1000 ** " KMGT".index(match.group(2).upper() or " ")
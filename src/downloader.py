@@ -1,52 +1,205 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import List, Optional
+
 import requests
 from tqdm import tqdm
 
-def download_file(url, file_path):
-    print(f"Downloading {url} to {file_path}...")
+from http_client import get_session
+
+# Number of files fetched in parallel by download_files
+DEFAULT_DOWNLOAD_WORKERS = 8
+
+
+@dataclass
+class DownloadJob:
+    """A single file to fetch with download_files."""
+    url: str
+    path: str
+    expected_hash: Optional[str] = None  # Hex digest to verify, if known
+    hash_algorithm: str = "sha256"
+
+
+def download_file(url, file_path, expected_hash=None, hash_algorithm="sha256", show_progress=True, session=None):
+    if show_progress:
+        print(f"Downloading {url} to {file_path}...")
     try:
-        response = requests.get(url, stream=True)
+        getter = (session or get_session()).get
+        response = getter(url, stream=True)
         response.raise_for_status()
         total_size = int(response.headers.get('content-length', 0))
+        digest = hashlib.new(hash_algorithm) if expected_hash else None
         with open(file_path, "wb") as f, tqdm(
             total=total_size, unit='iB', unit_scale=True, unit_divisor=1024,
+            disable=not show_progress,
         ) as bar:
             for chunk in response.iter_content(chunk_size=8192):
                 size = f.write(chunk)
                 bar.update(size)
-        print("Download complete.")
+                if digest:
+                    digest.update(chunk)
+
+        if digest and digest.hexdigest() != expected_hash.lower():
+            print(f"Hash mismatch for {os.path.basename(file_path)}: expected {expected_hash}, got {digest.hexdigest()}")
+            os.remove(file_path)
+            return False
+
+        if show_progress:
+            print("Download complete.")
         return True
     except requests.exceptions.RequestException as e:
         print(f"Error downloading file: {e}")
         return False
 
+
+def download_files(jobs: List[DownloadJob], max_workers: int = DEFAULT_DOWNLOAD_WORKERS) -> List[str]:
+    """
+    Download several files concurrently, verifying hashes when provided.
+    
+    Args:
+        jobs: List of DownloadJob entries
+        max_workers: Maximum number of parallel downloads
+    
+    Returns:
+        List of successfully downloaded file paths
+    """
+    if not jobs:
+        return []
+
+    session = get_session()
+    downloaded = []
+    failed = []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, tqdm(
+        total=len(jobs), unit='file', desc='Downloading',
+    ) as bar:
+        futures = {
+            executor.submit(
+                download_file, job.url, job.path, job.expected_hash,
+                job.hash_algorithm, False, session
+            ): job
+            for job in jobs
+        }
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                ok = future.result()
+            except Exception as e:
+                print(f"Error downloading {job.url}: {e}")
+                ok = False
+            if ok:
+                downloaded.append(job.path)
+            else:
+                failed.append(os.path.basename(job.path))
+            bar.update(1)
+
+    if failed:
+        print(f"Failed to download {len(failed)} file(s): {', '.join(failed)}")
+
+    return downloaded
+
+
+VERSION_MANIFEST_URL = "https://launchermeta.mojang.com/mc/game/version_manifest.json"
+
+# Java version assumed when Mojang's metadata is unavailable
+DEFAULT_JAVA_VERSION = 17
+
+
+def get_vanilla_version_metadata(version):
+    """
+    Get Mojang's metadata for a Minecraft version (downloads, javaVersion, ...).
+    
+    The version manifest is cached for an hour; per-version metadata never
+    changes once published and is cached indefinitely.
+    
+    Args:
+        version: Minecraft version (e.g., '1.21.1')
+    
+    Returns:
+        Version metadata dict or None if not found
+    """
+    from cache import get_json_cached
+    
+    manifest = get_json_cached(VERSION_MANIFEST_URL, "version-manifest")
+    if not manifest:
+        return None
+    
+    for v in manifest["versions"]:
+        if v["id"] == version:
+            return get_json_cached(v["url"], f"version-{version}", max_age=None)
+    
+    print(f"Minecraft version {version} not found in the version manifest")
+    return None
+
+
 def get_vanilla_download_url(version):
-    try:
-        response = requests.get("https://launchermeta.mojang.com/mc/game/version_manifest.json")
-        response.raise_for_status()
-        manifest = response.json()
-        for v in manifest["versions"]:
-            if v["id"] == version:
-                version_url = v["url"]
-                version_data = requests.get(version_url).json()
-                return version_data["downloads"]["server"]["url"]
+    version_data = get_vanilla_version_metadata(version)
+    if not version_data:
         return None
-    except requests.exceptions.RequestException as e:
-        print(f"Error getting download URL: {e}")
+    return version_data.get("downloads", {}).get("server", {}).get("url")
+
+
+def get_vanilla_server_jar(version):
+    """
+    Get the vanilla server JAR for a version from the artifact cache, downloading it once.
+    
+    Args:
+        version: Minecraft version (e.g., '1.21.1')
+    
+    Returns:
+        Path to the cached, SHA-1 verified server JAR or None if failed
+    """
+    from cache import get_cached_artifact
+    
+    version_data = get_vanilla_version_metadata(version)
+    server_download = (version_data or {}).get("downloads", {}).get("server")
+    if not server_download:
+        print("Failed to get vanilla server download URL.")
         return None
+    
+    return get_cached_artifact(
+        server_download["url"], os.path.join("vanilla", f"server-{version}.jar"),
+        server_download.get("sha1"), "sha1"
+    )
 
 
-def download_mods_from_config(config, output_dir, cf_api_key=None):
+def get_java_version(version):
+    """
+    Get the Java major version a Minecraft version requires.
+    
+    Args:
+        version: Minecraft version (e.g., '1.21.1')
+    
+    Returns:
+        Java major version (e.g., 21)
+    """
+    version_data = get_vanilla_version_metadata(version)
+    if not version_data or "javaVersion" not in version_data:
+        print(f"Could not determine Java version for Minecraft {version}, assuming Java {DEFAULT_JAVA_VERSION}")
+        return DEFAULT_JAVA_VERSION
+    return version_data["javaVersion"]["majorVersion"]
+
+
+def download_mods_from_config(config, output_dir, cf_api_key=None, exclude_client_only=True):
     """
     Download all mods specified in a mod configuration.
     
+    Client-only mods are skipped: Modrinth projects marked as unsupported on
+    servers are not downloaded, and downloaded jars whose loader metadata
+    declares a client environment are removed again.
+    
     Args:
         config: ModConfig object containing mod specifications
         output_dir: Directory to save downloaded mods
         cf_api_key: Optional CurseForge API key for CurseForge downloads
+        exclude_client_only: Skip client-only mods
     
     Returns:
         List of successfully downloaded mod file paths
     """
+    from mod_environment import is_client_only_project, split_client_only_jars
     from mod_platforms import ModrinthClient, CurseForgeClient
     import os
     
@@ -64,6 +217,7 @@ def download_mods_from_config(config, output_dir, cf_api_key=None):
     
     downloaded_mods = []
     failed_mods = []
+    excluded_mods = []
     
     print(f"\nDownloading {len(config.mods)} mod(s)...")
     
@@ -72,12 +226,14 @@ def download_mods_from_config(config, output_dir, cf_api_key=None):
         
         try:
             if mod.platform == "modrinth":
-                mod_path = modrinth_client.download_mod(
-                    mod.slug,
-                    config.minecraft_version,
-                    config.mod_loader,
-                    output_dir
-                )
+                print(f"Searching for '{mod.slug}' on Modrinth...")
+                mod_data = modrinth_client.search_mod(mod.slug, config.minecraft_version, config.mod_loader)
+                if mod_data and exclude_client_only and is_client_only_project(mod_data["project"]):
+                    print(f"Skipping {mod.slug}: client-only mod")
+                    excluded_mods.append(mod.slug)
+                    continue
+                
+                mod_path = modrinth_client.download_version(mod.slug, mod_data, output_dir) if mod_data else None
                 if mod_path:
                     downloaded_mods.append(mod_path)
                 else:
@@ -104,13 +260,155 @@ def download_mods_from_config(config, output_dir, cf_api_key=None):
             print(f"Error downloading {mod.slug}: {e}")
             failed_mods.append(mod.slug)
     
+    if exclude_client_only:
+        # Jars without Modrinth metadata (e.g., from CurseForge) are checked by their loader
+        # metadata; they are reported with the other exclusions in the summary
+        downloaded_mods, client_only_jars = split_client_only_jars(downloaded_mods)
+        for path in client_only_jars:
+            os.remove(path)
+        excluded_mods += [os.path.basename(path) for path in client_only_jars]
+    
     # Summary
     print(f"\n{'='*50}")
     print(f"Download Summary:")
     print(f"  Successfully downloaded: {len(downloaded_mods)} mod(s)")
+    if excluded_mods:
+        print(f"  Excluded (client-only): {', '.join(excluded_mods)}")
     if failed_mods:
         print(f"  Failed: {len(failed_mods)} mod(s)")
         print(f"  Failed mods: {', '.join(failed_mods)}")
     print(f"{'='*50}\n")
     
     return downloaded_mods
+
+
+# Modrinth loaders whose plugins run on each plugin server, in order of preference
+PLUGIN_LOADERS = {
+    "paper": ["paper", "spigot", "bukkit"],
+    "purpur": ["purpur", "paper", "spigot", "bukkit"],
+}
+
+
+def download_plugins_from_config(config, output_dir):
+    """
+    Download all plugins specified in a plugin configuration.
+    
+    Plugins are resolved first and then fetched concurrently through
+    download_files, with Modrinth's published SHA-512 hashes verified.
+    
+    Args:
+        config: PluginConfig object containing plugin specifications
+        output_dir: Directory to save downloaded plugins
+    
+    Returns:
+        List of successfully downloaded plugin file paths
+    """
+    from mod_platforms import ModrinthClient
+    
+    os.makedirs(output_dir, exist_ok=True)
+    
+    modrinth_client = ModrinthClient()
+    loaders = PLUGIN_LOADERS[config.server_software]
+    
+    def resolve(plugin):
+        if plugin.platform == "url":
+            filename = plugin.slug if plugin.slug.endswith(".jar") else f"{plugin.slug}.jar"
+            return DownloadJob(plugin.url, os.path.join(output_dir, filename), plugin.sha256, "sha256")
+        
+        plugin_data = modrinth_client.search_mod(plugin.slug, config.minecraft_version, loaders)
+        if not plugin_data:
+            return None
+        
+        files = plugin_data["version"].get("files", [])
+        if not files:
+            print(f"No download URL found for {plugin.slug}")
+            return None
+        primary_file = next((f for f in files if f.get("primary", False)), files[0])
+        return DownloadJob(
+            primary_file["url"],
+            os.path.join(output_dir, primary_file.get("filename", f"{plugin.slug}.jar")),
+            primary_file.get("hashes", {}).get("sha512"),
+            "sha512"
+        )
+    
+    print(f"\nResolving {len(config.plugins)} plugin(s)...")
+    with ThreadPoolExecutor(max_workers=DEFAULT_DOWNLOAD_WORKERS) as executor:
+        resolved = list(executor.map(resolve, config.plugins))
+    
+    jobs = [job for job in resolved if job]
+    unresolved = [plugin.slug for plugin, job in zip(config.plugins, resolved) if not job]
+    
+    downloaded_plugins = download_files(jobs)
+    
+    # Summary
+    print(f"\n{'='*50}")
+    print(f"Download Summary:")
+    print(f"  Successfully downloaded: {len(downloaded_plugins)} plugin(s)")
+    if unresolved:
+        print(f"  Not found: {', '.join(unresolved)}")
+    print(f"{'='*50}\n")
+    
+    return downloaded_plugins
+
+
+def resolve_mod_files(config, cf_api_key=None, exclude_client_only=True):
+    """
+    Resolve the files of every mod in a configuration without downloading them.
+    
+    Args:
+        config: ModConfig object containing mod specifications
+        cf_api_key: Optional CurseForge API key for CurseForge mods
+        exclude_client_only: Leave out Modrinth projects marked as unsupported on servers
+    
+    Returns:
+        Tuple of (list of PackFile entries with URLs and SHA-1 hashes, list of unresolved slugs)
+    """
+    from mod_environment import is_client_only_project, print_excluded_mods
+    from mod_platforms import ModrinthClient, CurseForgeClient
+    from modpacks import PackFile
+    
+    modrinth_client = ModrinthClient()
+    curseforge_client = CurseForgeClient(cf_api_key) if cf_api_key else None
+    excluded = []
+    
+    def resolve(mod):
+        if mod.platform == "modrinth":
+            mod_data = modrinth_client.search_mod(mod.slug, config.minecraft_version, config.mod_loader)
+            if mod_data and exclude_client_only and is_client_only_project(mod_data["project"]):
+                excluded.append(mod.slug)
+                return None
+            files = mod_data["version"].get("files", []) if mod_data else []
+            if not files:
+                return None
+            primary_file = next((f for f in files if f.get("primary", False)), files[0])
+            return PackFile(
+                path=f"mods/{primary_file['filename']}",
+                url=primary_file["url"],
+                hashes={k: v for k, v in primary_file.get("hashes", {}).items() if k in ("sha1", "sha512")}
+            )
+        
+        if not curseforge_client:
+            print(f"Skipping {mod.slug}: CurseForge API key not provided")
+            return None
+        
+        mod_data = curseforge_client.search_mod(mod.slug, config.minecraft_version, config.mod_loader)
+        if not mod_data:
+            return None
+        url = curseforge_client.get_mod_file_url(mod_data["mod"]["id"], mod_data["file"]["id"])
+        if not url:
+            return None
+        return PackFile(
+            path=f"mods/{mod_data['file']['fileName']}",
+            url=url,
+            hashes={"sha1": h["value"] for h in mod_data["file"].get("hashes", []) if h.get("algo") == 1},
+            curseforge_file_id=mod_data["file"]["id"]
+        )
+    
+    print(f"\nResolving {len(config.mods)} mod(s)...")
+    with ThreadPoolExecutor(max_workers=DEFAULT_DOWNLOAD_WORKERS) as executor:
+        resolved = list(executor.map(resolve, config.mods))
+    
+    print_excluded_mods(excluded, "Modrinth project metadata")
+    files = [f for f in resolved if f]
+    unresolved = [mod.slug for mod, f in zip(config.mods, resolved) if not f and mod.slug not in excluded]
+    return files, unresolved
@@ -0,0 +1,493 @@
+import fcntl
+import json
+import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from cache import get_cache_path, load_cached_json, save_cached_json
+from cli import parse_args
+from docker_manager import HELPER_IMAGE, SERVER_STOP_TIMEOUT
+from resources import DEFAULT_CPUS, HostCapacity, get_host_capacity, get_server_memory
+
+# Cache keys of the host inventory and of the servers placed on the hosts
+HOSTS_KEY = "fleet-hosts"
+PLACEMENTS_KEY = "fleet-placements"
+
+# Host ports handed out to servers when a host is added without --host-ports
+DEFAULT_PORT_RANGE = "25565-25664"
+
+# Options the scheduler sets itself on the 'create' it runs on a host
+SCHEDULER_OPTIONS = ("--host", "--port")
+SCHEDULER_FLAGS = ("--yes",)
+
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+# Serialises placement records written by provisioning threads
+_placements_lock = threading.Lock()
+
+
+def docker_env(endpoint: str) -> Dict[str, str]:
+    """Environment pointing docker commands at a host's endpoint (passed to them, never set on this process)."""
+    return {**os.environ, "DOCKER_HOST": endpoint}
+
+
+def _docker(endpoint: str, *args: str, **kwargs) -> subprocess.CompletedProcess:
+    """Run a docker command against a host's endpoint (thread-safe: the environment is passed, not changed)."""
+    return subprocess.run(["docker", *args], env=docker_env(endpoint), **kwargs)
+
+
+def parse_port_range(ports: str) -> Optional[range]:
+    """Parse a port range such as '25565-25664' (or a single port), or return None if invalid."""
+    first, _, last = ports.partition("-")
+    try:
+        first_port, last_port = int(first), int(last or first)
+    except ValueError:
+        return None
+    if not 0 < first_port <= last_port < 65536:
+        return None
+    return range(first_port, last_port + 1)
+
+
+def get_used_ports(endpoint: str) -> Set[int]:
+    """Host ports published by the containers on a host, running or not."""
+    names = _docker(endpoint, "ps", "-aq", capture_output=True, text=True).stdout.split()
+    if not names:
+        return set()
+    result = _docker(
+        endpoint, "inspect", "-f",
+        "{{range $port, $bindings := .HostConfig.PortBindings}}{{range $bindings}}{{.HostPort}} {{end}}{{end}}",
+        *names, capture_output=True, text=True
+    )
+    return {int(port) for port in result.stdout.split() if port.isdigit()}
+
+
+def load_hosts() -> Dict[str, Dict]:
+    """Load the host inventory: name -> {'endpoint', 'ports', 'drained'}."""
+    return dict(load_cached_json(HOSTS_KEY) or {})
+
+
+def load_placements() -> Dict[str, Dict]:
+    """Load the placed servers: name -> {'host', 'argv', 'port'}."""
+    return dict(load_cached_json(PLACEMENTS_KEY) or {})
+
+
+def _record_placement(server_name: str, placement: Dict) -> None:
+    with _placements_lock:
+        placements = load_placements()
+        placements[server_name] = placement
+        save_cached_json(PLACEMENTS_KEY, placements)
+
+
+@dataclass(slots=True)
+class FleetHost:
+    """A Docker host of the fleet and its free resources."""
+    name: str
+    endpoint: str
+    ports: range
+    drained: bool = False
+    capacity: Optional[HostCapacity] = None
+    used_ports: Set[int] = field(default_factory=set)
+
+    def free_port(self, port: Optional[int] = None, fixed: bool = False) -> Optional[int]:
+        """
+        Pick a free host port.
+
+        Args:
+            port: Port to use if it is free
+            fixed: True if no other port will do
+
+        Returns:
+            Port number, or None if none is free
+        """
+        if port is not None and port not in self.used_ports:
+            return port
+        if fixed:
+            return None
+        return next((p for p in self.ports if p not in self.used_ports), None)
+
+
+def get_fleet(include_drained: bool = False) -> List[FleetHost]:
+    """
+    Read the free resources of every host in the inventory.
+
+    Hosts that cannot be reached are returned without a capacity, and are
+    never placed on.
+
+    Args:
+        include_drained: Also return drained hosts
+
+    Returns:
+        List of FleetHost
+    """
+    fleet = []
+    for name, host in load_hosts().items():
+        if host.get("drained") and not include_drained:
+            continue
+        fleet_host = FleetHost(name, host["endpoint"], parse_port_range(host["ports"]), host.get("drained", False))
+        fleet_host.capacity = get_host_capacity(env=docker_env(fleet_host.endpoint))
+        if fleet_host.capacity is None:
+            print(f"Host '{name}' ({fleet_host.endpoint}) is not reachable")
+        else:
+            fleet_host.used_ports = get_used_ports(fleet_host.endpoint)
+        fleet.append(fleet_host)
+    return fleet
+
+
+@dataclass(slots=True)
+class ServerRequest:
+    """A server to place, from its 'create' arguments."""
+    name: str
+    argv: List[str]
+    profile: str
+    cpus: float
+    memory: int
+    port: Optional[int] = None
+    fixed_port: bool = False
+
+
+def _strip_scheduler_options(argv: List[str]) -> List[str]:
+    stripped = []
+    skip = False
+    for arg in argv:
+        if skip:
+            skip = False
+        elif arg in SCHEDULER_OPTIONS:
+            skip = True
+        elif arg in SCHEDULER_FLAGS or arg.split("=", 1)[0] in SCHEDULER_OPTIONS:
+            continue
+        else:
+            stripped.append(arg)
+    return stripped
+
+
+def parse_request(argv: List[str], port: Optional[int] = None) -> Optional[ServerRequest]:
+    """
+    Turn 'create' arguments into a server to place.
+
+    Args:
+        argv: 'create' arguments (a leading 'create', --host, --port and --yes are dropped)
+        port: Port to prefer when --port is not given
+
+    Returns:
+        ServerRequest, or None if the arguments are invalid (the reason is printed)
+    """
+    if argv and argv[0] == "create":
+        argv = argv[1:]
+    try:
+        args = parse_args(["create", *argv])
+    except SystemExit:
+        print(f"Invalid create arguments: {' '.join(argv)}")
+        return None
+    if not args.server_name:
+        print(f"--server-name is required to place a server: {' '.join(argv)}")
+        return None
+    if args.resource_profile == "none":
+        print(f"'{args.server_name}' needs --resource-profile shared or dedicated to be placed")
+        return None
+    memory = get_server_memory(args.xmx, args.world_tmpfs, args.memory)
+    if memory is None:
+        return None
+
+    fixed = any(arg == "--port" or arg.startswith("--port=") for arg in argv)
+    return ServerRequest(args.server_name, _strip_scheduler_options(argv), args.resource_profile,
+                         args.cpus or DEFAULT_CPUS, memory, args.port if fixed else port, fixed)
+
+
+def place_servers(requests: List[ServerRequest], fleet: List[FleetHost],
+                  host_name: Optional[str] = None) -> Dict[str, Tuple[FleetHost, int]]:
+    """
+    Bin-pack servers onto hosts.
+
+    Servers are placed largest first (by memory, then CPUs), each on the host
+    it fits most tightly, so large servers still find room later. Placed
+    servers are reserved on the hosts' capacities.
+
+    Args:
+        requests: Servers to place
+        fleet: Hosts to place them on
+        host_name: Only place on this host
+
+    Returns:
+        Dict mapping server name to (host, port); servers without room are left out (the reasons are printed)
+    """
+    placed = {}
+    for request in sorted(requests, key=lambda r: (r.memory, r.cpus), reverse=True):
+        candidates = []
+        reasons = []
+        for host in fleet:
+            if host.capacity is None or host.drained or (host_name and host.name != host_name):
+                continue
+            reason = host.capacity.check(request.profile, request.cpus, request.memory)
+            port = host.free_port(request.port, request.fixed_port)
+            if reason is None and port is None:
+                reason = f"port {request.port} is in use" if request.fixed_port else f"no free port in {host.ports.start}-{host.ports.stop - 1}"
+            if reason:
+                reasons.append(f"{host.name}: {reason}")
+            else:
+                candidates.append((host.capacity.free_memory - request.memory, host.name, host, port))
+
+        if not candidates:
+            print(f"No host has room for '{request.name}'" + "".join(f"\n  {reason}" for reason in reasons))
+            continue
+        _, _, host, port = min(candidates, key=lambda candidate: candidate[:2])
+        host.capacity.reserve(request.profile, request.cpus, request.memory)
+        host.used_ports.add(port)
+        placed[request.name] = (host, port)
+    return placed
+
+
+def provision(request: ServerRequest, host: FleetHost, port: int) -> bool:
+    """
+    Create a server on a host by running 'create' against its endpoint.
+
+    Each host gets its own build context folder, so hosts can be provisioned
+    at the same time; the output goes to a log file per server.
+
+    Returns:
+        True if the server container exists on the host afterwards
+    """
+    log_path = get_cache_path("fleet", "logs", f"{request.name}.log")
+    env = {**docker_env(host.endpoint), "MCSM_BUILD_CONTEXT": get_cache_path("fleet", "build", host.name)}
+    print(f"Creating '{request.name}' on '{host.name}' (port {port}, log: {log_path})...")
+    with open(log_path, "w") as log:
+        result = subprocess.run(
+            [sys.executable, MAIN_SCRIPT, "create", *request.argv, "--port", str(port), "--yes"],
+            env=env, stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL
+        )
+
+    # 'create' reports most failures without an exit status; the container tells whether it worked
+    exists = _docker(host.endpoint, "inspect", request.name, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode == 0
+    if result.returncode != 0 or not exists:
+        print(f"Failed to create '{request.name}' on '{host.name}' (log: {log_path})")
+        return False
+
+    _record_placement(request.name, {"host": host.name, "argv": request.argv, "port": port})
+    print(f"Created '{request.name}' on '{host.name}', port {port}")
+    return True
+
+
+def run_on_hosts(tasks: Dict[str, List[Callable[[], bool]]]) -> int:
+    """
+    Run tasks grouped by host: hosts in parallel, each host's tasks one after another.
+
+    Returns:
+        Number of tasks that succeeded
+    """
+    if not tasks:
+        return 0
+    with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+        results = executor.map(lambda host_tasks: sum(task() for task in host_tasks), tasks.values())
+        return sum(results)
+
+
+@contextmanager
+def fleet_lock() -> Iterator[None]:
+    """Hold the fleet lock, so concurrent placements and drains do not pick the same resources."""
+    with open(get_cache_path("locks", "fleet.lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def schedule(argv_list: List[List[str]], host_name: Optional[str] = None) -> int:
+    """
+    Place servers on the fleet and create them, several hosts at a time.
+
+    Args:
+        argv_list: 'create' arguments of each server
+        host_name: Only place on this host
+
+    Returns:
+        Number of servers created
+    """
+    requests = [parse_request(argv) for argv in argv_list]
+    if None in requests:
+        return 0
+    placements = load_placements()
+    for request in requests:
+        if request.name in placements:
+            print(f"'{request.name}' is already placed on '{placements[request.name]['host']}'")
+            return 0
+
+    with fleet_lock():
+        fleet = get_fleet()
+        if not fleet:
+            print("No hosts in the fleet; add one with 'fleet add --host NAME --endpoint URL'")
+            return 0
+        if host_name and host_name not in {host.name for host in fleet}:
+            print(f"Unknown or drained host: {host_name}")
+            return 0
+
+        placed = place_servers(requests, fleet, host_name)
+        tasks: Dict[str, List[Callable[[], bool]]] = {}
+        for request in requests:
+            if request.name in placed:
+                host, port = placed[request.name]
+                tasks.setdefault(host.name, []).append(lambda request=request, host=host, port=port: provision(request, host, port))
+        created = run_on_hosts(tasks)
+
+    print(f"Created {created} of {len(requests)} server(s)")
+    return created
+
+
+def copy_volume(volume: str, source: str, destination: str) -> bool:
+    """Copy a named volume between hosts by piping a tar stream through helper containers."""
+    reader = subprocess.Popen(
+        ["docker", "run", "--rm", "-v", f"{volume}:/data:ro", HELPER_IMAGE, "tar", "-C", "/data", "-cf", "-", "."],
+        env=docker_env(source), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    writer = _docker(destination, "run", "--rm", "-i", "-v", f"{volume}:/data", HELPER_IMAGE, "tar", "-C", "/data", "-xf", "-",
+                     stdin=reader.stdout, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    reader.stdout.close()
+    return reader.wait() == 0 and writer.returncode == 0
+
+
+def get_volumes(endpoint: str, server_name: str) -> Optional[List[str]]:
+    """Named volumes of a container on a host, or None if it does not exist."""
+    result = _docker(endpoint, "inspect", "-f", '{{range .Mounts}}{{if eq .Type "volume"}}{{.Name}} {{end}}{{end}}',
+                     server_name, capture_output=True, text=True)
+    return result.stdout.split() if result.returncode == 0 else None
+
+
+def migrate(request: ServerRequest, source: FleetHost, host: FleetHost, port: int) -> bool:
+    """
+    Move a server between hosts: stop it, copy its volumes, create it on the new host and remove the old container.
+
+    The old container is started again if the move fails. Its volumes are kept
+    on the old host until removed by hand.
+
+    Returns:
+        True if the server was moved
+    """
+    volumes = get_volumes(source.endpoint, request.name)
+    if volumes is None:
+        print(f"'{request.name}' no longer exists on '{source.name}'; creating it afresh on '{host.name}'")
+        return provision(request, host, port)
+
+    _docker(source.endpoint, "stop", "-t", str(SERVER_STOP_TIMEOUT), request.name, stdout=subprocess.DEVNULL)
+    for volume in volumes:
+        if not copy_volume(volume, source.endpoint, host.endpoint):
+            print(f"Failed to copy volume '{volume}' of '{request.name}' to '{host.name}'")
+            _docker(source.endpoint, "start", request.name, stdout=subprocess.DEVNULL)
+            return False
+
+    if not provision(request, host, port):
+        _docker(source.endpoint, "start", request.name, stdout=subprocess.DEVNULL)
+        return False
+    _docker(source.endpoint, "rm", request.name, stdout=subprocess.DEVNULL)
+    print(f"Moved '{request.name}' from '{source.name}' to '{host.name}'; "
+          f"its volumes ({', '.join(volumes)}) are kept on '{source.name}'")
+    return True
+
+
+def drain_host(host_name: str) -> int:
+    """
+    Drain a host: mark it so nothing new is placed on it, and move its placed servers to the rest of the fleet.
+
+    Servers are moved several destination hosts at a time, keeping their port
+    where it is free. Containers the scheduler did not place are listed but
+    left alone.
+
+    Returns:
+        Number of servers moved
+    """
+    hosts = load_hosts()
+    if host_name not in hosts:
+        print(f"Unknown host: {host_name}")
+        return 0
+    hosts[host_name]["drained"] = True
+    save_cached_json(HOSTS_KEY, hosts)
+    source = FleetHost(host_name, hosts[host_name]["endpoint"], parse_port_range(hosts[host_name]["ports"]), True)
+
+    placements = load_placements()
+    servers = sorted(name for name, placement in placements.items() if placement["host"] == host_name)
+    containers = _docker(source.endpoint, "ps", "-a", "--format", "{{.Names}}", capture_output=True, text=True).stdout.split()
+    others = sorted(set(containers) - set(servers))
+    if others:
+        print(f"Not placed by the scheduler, left on '{host_name}': {', '.join(others)}")
+    if not servers:
+        print(f"Host '{host_name}' is drained; no placed servers to move")
+        return 0
+
+    requests = [parse_request(placements[name]["argv"], placements[name]["port"]) for name in servers]
+    with fleet_lock():
+        placed = place_servers([request for request in requests if request], get_fleet())
+        tasks: Dict[str, List[Callable[[], bool]]] = {}
+        for request in requests:
+            if request and request.name in placed:
+                host, port = placed[request.name]
+                tasks.setdefault(host.name, []).append(lambda request=request, host=host, port=port: migrate(request, source, host, port))
+        moved = run_on_hosts(tasks)
+
+    print(f"Moved {moved} of {len(servers)} server(s) off '{host_name}'")
+    return moved
+
+
+def print_fleet_status() -> None:
+    """Print each host's free resources and placed servers."""
+    placements = load_placements()
+    for host in get_fleet(include_drained=True):
+        servers = sorted(name for name, placement in placements.items() if placement["host"] == host.name)
+        state = " [drained]" if host.drained else ""
+        print(f"{host.name}{state} ({host.endpoint})")
+        if host.capacity is None:
+            print("  not reachable")
+        else:
+            capacity = host.capacity
+            print(f"  memory: {max(0, capacity.free_memory) // (1024 * 1024)} MiB free of {capacity.memory // (1024 * 1024)} MiB")
+            print(f"  cpus: {len(capacity.free_cores)} core(s) free to dedicate, "
+                  f"{max(0.0, len(capacity.shared_cores) - capacity.shared_quota):g} of {len(capacity.shared_cores)} shared CPU(s) uncommitted")
+            free_ports = sum(1 for port in host.ports if port not in host.used_ports)
+            print(f"  ports: {free_ports} of {len(host.ports)} free ({host.ports.start}-{host.ports.stop - 1})")
+        servers = [f"{name}:{placements[name]['port']}" for name in servers]
+        print(f"  servers: {', '.join(servers) or 'none'}")
+
+
+def manage_fleet(args) -> None:
+    """Entry point for the 'fleet' command."""
+    hosts = load_hosts()
+
+    if args.subcommand == "add":
+        if parse_port_range(args.host_ports) is None:
+            print(f"Invalid --host-ports: {args.host_ports}")
+            return
+        capacity = get_host_capacity(env=docker_env(args.endpoint))
+        if capacity is None:
+            print(f"Docker is not reachable at {args.endpoint}")
+            return
+        hosts[args.host] = {"endpoint": args.endpoint, "ports": args.host_ports, "drained": False}
+        save_cached_json(HOSTS_KEY, hosts)
+        print(f"Added host '{args.host}' ({args.endpoint}): {capacity.cpus} CPU(s), {capacity.memory // (1024 * 1024)} MiB")
+
+    elif args.subcommand == "remove":
+        servers = [name for name, placement in load_placements().items() if placement["host"] == args.host]
+        if args.host not in hosts:
+            print(f"Unknown host: {args.host}")
+        elif servers:
+            print(f"Host '{args.host}' still has placed servers ({', '.join(sorted(servers))}); drain it first")
+        else:
+            del hosts[args.host]
+            save_cached_json(HOSTS_KEY, hosts)
+            print(f"Removed host '{args.host}'")
+
+    elif args.subcommand == "status":
+        print_fleet_status()
+
+    elif args.subcommand == "drain":
+        drain_host(args.host)
+
+    elif args.subcommand == "place":
+        try:
+            with open(args.plan) as f:
+                plan = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Failed to read plan {args.plan}: {e}")
+            return
+        if not isinstance(plan, list) or not all(isinstance(argv, list) for argv in plan):
+            print("The plan must be a JSON list of 'create' argument lists")
+            return
+        schedule([[str(arg) for arg in argv] for argv in plan], args.host)
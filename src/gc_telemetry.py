@@ -0,0 +1,373 @@
+import asyncio
+import math
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from backup import send_console_command
+from cache import load_cached_json, save_cached_json
+from docker_manager import container_action, inspect_container
+from hibernation import query_status
+from log_index import LogSource, list_servers
+from utils import parse_memory_size
+
+# Cache key of the per-server read offsets and collected samples
+TELEMETRY_KEY = "gc-telemetry"
+
+# Lists the GC log written by the entrypoints ('<inode> <size> <path>'): gc.log, or gc.log.<n>.current on Java 8
+LIST_GC_LOG_SCRIPT = ('for f in /app/logs/gc.log /app/logs/gc.log.*.current; do '
+                      '[ -f "$f" ] && stat -c "%i %s %n" "$f"; done; true')
+
+# Most bytes of GC log read per docker call
+READ_CHUNK = 8 * 1024 * 1024
+
+# Post-GC heap is tracked as its lowest value per bin; a week of bins is kept
+FLOOR_BIN_SECONDS = 600
+MAX_FLOOR_BINS = 7 * 24 * 6
+
+# Pauses kept for the percentiles
+MAX_PAUSES = 5000
+
+# Uptime before the heap has settled; its bins are left out of the trend
+WARMUP_SECONDS = 1800
+
+# A likely leak: at least this much uptime in bins, a post-GC floor growing by more than
+# LEAK_MIN_GROWTH of the heap over it, steadily enough (R² of the linear fit)
+LEAK_MIN_SECONDS = 2 * 3600
+LEAK_MIN_GROWTH = 0.10
+LEAK_MIN_R2 = 0.6
+
+# Share of the heap at which the post-GC floor is expected to make the server lag
+HEAP_LIMIT = 0.9
+
+# Warning given to online players before a restart
+RESTART_WARNING = 60
+
+# Unified logging (Java 9+), with the entrypoints' 'time,uptime' or the default 'uptime' decorations:
+# '[2026-10-19T12:00:00.123+0000][12.345s] GC(12) Pause Young (Normal) (G1 Evacuation Pause) 1024M->256M(4096M) 12.345ms'
+UPTIME = re.compile(r"\[([\d.]+)s\]")
+PAUSE = re.compile(r"GC\(\d+\) Pause .*?([\d.]+[KMG])->([\d.]+[KMG])\(([\d.]+[KMG])\) ([\d.]+)ms")
+# ZGC cycles (concurrent; their sub-millisecond pauses are only logged with gc+phases):
+# 'GC(3) Garbage Collection (Allocation Rate) 1234M(15%)->456M(5%)', 'GC(3) Major Collection (Proactive) 20M(0%)->12M(0%) 0.045s'
+ZGC_CYCLE = re.compile(r"GC\(\d+\) (?:Garbage|Major|Minor|Young) Collection .*?([\d.]+[KMG])\(\d+%\)->([\d.]+[KMG])\(\d+%\)")
+# Java 8 '-Xloggc' without details: '2026-10-19T12:00:00.123+0000: 12.345: [GC (Allocation Failure)  1024K->256K(4096K), 0.0123 secs]'
+JAVA8_GC = re.compile(r"([\d.]+): \[(?:Full GC|GC)[^\]]*? (\d+[KMG])->(\d+[KMG])\((\d+[KMG])\), ([\d.]+) secs\]")
+
+
+@dataclass(slots=True)
+class GcEvent:
+    """A collection read from a GC log."""
+    uptime: float
+    before: int
+    after: int
+    pause_ms: Optional[float]
+
+
+def parse_gc_log(text: str) -> List[GcEvent]:
+    """Find the collections in GC log lines (unified logging, ZGC or Java 8)."""
+    events = []
+    for line in text.splitlines():
+        java8 = JAVA8_GC.search(line)
+        if java8:
+            events.append(GcEvent(float(java8.group(1)), parse_memory_size(java8.group(2)) or 0,
+                                  parse_memory_size(java8.group(3)) or 0, float(java8.group(5)) * 1000))
+            continue
+        uptime = UPTIME.search(line)
+        if not uptime:
+            continue
+        pause = PAUSE.search(line)
+        if pause:
+            events.append(GcEvent(float(uptime.group(1)), parse_memory_size(pause.group(1)) or 0,
+                                  parse_memory_size(pause.group(2)) or 0, float(pause.group(4))))
+            continue
+        cycle = ZGC_CYCLE.search(line)
+        if cycle:
+            events.append(GcEvent(float(uptime.group(1)), parse_memory_size(cycle.group(1)) or 0,
+                                  parse_memory_size(cycle.group(2)) or 0, None))
+    return events
+
+
+def new_run() -> Dict:
+    """Telemetry of a JVM run, before any collection was read."""
+    return {"uptime": 0.0, "first_uptime": None, "last_after": None, "allocated": 0, "floors": {}, "pauses": []}
+
+
+def add_events(run: Dict, events: List[GcEvent]) -> Dict:
+    """
+    Add collections to a run's telemetry.
+
+    A collection with a lower uptime than the last one belongs to a new JVM
+    (the server restarted), which starts a new run.
+
+    Returns:
+        The run the last collection belongs to
+    """
+    for event in events:
+        if event.uptime < run["uptime"]:
+            run = new_run()
+        if run["last_after"] is not None:
+            # What the application allocated since the last collection ended
+            run["allocated"] += max(0, event.before - run["last_after"])
+        else:
+            run["first_uptime"] = event.uptime
+        run["uptime"] = event.uptime
+        run["last_after"] = event.after
+
+        # JSON object keys are strings
+        floor_bin = str(int(event.uptime // FLOOR_BIN_SECONDS))
+        run["floors"][floor_bin] = min(run["floors"].get(floor_bin, event.after), event.after)
+        if event.pause_ms is not None:
+            run["pauses"].append(round(event.pause_ms, 2))
+
+    if len(run["floors"]) > MAX_FLOOR_BINS:
+        run["floors"] = dict(sorted(run["floors"].items(), key=lambda item: int(item[0]))[-MAX_FLOOR_BINS:])
+    del run["pauses"][:-MAX_PAUSES]
+    return run
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of some values."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def _linear_fit(points: List[Tuple[float, float]]) -> Tuple[float, float, float]:
+    """Least-squares line through points. Returns (slope, intercept, R²)."""
+    count = len(points)
+    mean_x = sum(x for x, _ in points) / count
+    mean_y = sum(y for _, y in points) / count
+    sxx = sum((x - mean_x) ** 2 for x, _ in points)
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    syy = sum((y - mean_y) ** 2 for _, y in points)
+    slope = sxy / sxx if sxx else 0.0
+    r2 = (sxy * sxy) / (sxx * syy) if sxx and syy else 0.0
+    return slope, mean_y - slope * mean_x, r2
+
+
+@dataclass(slots=True)
+class GcReport:
+    """Heap and GC figures of a server's current JVM run."""
+    uptime: float
+    heap_floor: Optional[int]
+    floor_trend: Optional[float]     # Bytes per hour
+    trend_r2: Optional[float]
+    allocation_rate: Optional[float]  # Bytes per second
+    pauses: int
+    pause_p50: Optional[float]
+    pause_p95: Optional[float]
+    pause_p99: Optional[float]
+    pause_max: Optional[float]
+    leak: bool
+    hours_to_limit: Optional[float]
+
+
+def analyze_run(run: Dict, max_heap: Optional[int]) -> GcReport:
+    """
+    Analyze a run's telemetry.
+
+    The post-GC heap of young collections still holds old garbage, so the
+    trend is fitted to the lowest post-GC heap of each bin after warm-up: a
+    floor that keeps rising while the server runs is memory that is never
+    freed. It is flagged as a likely leak when it grew steadily by a
+    noticeable share of the heap over enough time.
+
+    Args:
+        run: Telemetry of the run (see add_events)
+        max_heap: Maximum heap (-Xmx), if known
+
+    Returns:
+        GcReport
+    """
+    floors = sorted((int(floor_bin) * FLOOR_BIN_SECONDS, after) for floor_bin, after in run["floors"].items())
+    settled = [(seconds / 3600, after) for seconds, after in floors if seconds >= WARMUP_SECONDS]
+    heap_floor = settled[-1][1] if settled else (floors[-1][1] if floors else None)
+
+    slope = r2 = hours_to_limit = None
+    leak = False
+    if len(settled) >= 3:
+        slope, intercept, r2 = _linear_fit(settled)
+        span = (settled[-1][0] - settled[0][0]) * 3600
+        if max_heap and slope > 0:
+            projected_floor = slope * settled[-1][0] + intercept
+            hours_to_limit = max(0.0, (HEAP_LIMIT * max_heap - projected_floor) / slope)
+            leak = (span >= LEAK_MIN_SECONDS and r2 >= LEAK_MIN_R2
+                    and slope * span / 3600 >= LEAK_MIN_GROWTH * max_heap)
+
+    elapsed = run["uptime"] - run["first_uptime"] if run["first_uptime"] is not None else 0
+    pauses = run["pauses"]
+    return GcReport(
+        uptime=run["uptime"],
+        heap_floor=heap_floor,
+        floor_trend=slope,
+        trend_r2=r2,
+        allocation_rate=run["allocated"] / elapsed if elapsed > 0 else None,
+        pauses=len(pauses),
+        pause_p50=percentile(pauses, 0.50) if pauses else None,
+        pause_p95=percentile(pauses, 0.95) if pauses else None,
+        pause_p99=percentile(pauses, 0.99) if pauses else None,
+        pause_max=max(pauses) if pauses else None,
+        leak=leak,
+        hours_to_limit=hours_to_limit,
+    )
+
+
+def read_gc_log(source: LogSource, state: Dict) -> List[GcEvent]:
+    """
+    Read the collections added to a server's GC log since the last read.
+
+    Args:
+        source: Running server
+        state: The server's saved 'inode' and 'offset' (updated)
+
+    Returns:
+        New collections, oldest first
+    """
+    listing = source.run(LIST_GC_LOG_SCRIPT)
+    if not listing:
+        return []
+    inode, size, path = listing.decode().splitlines()[-1].split(" ", 2)
+    inode, size = int(inode), int(size)
+    # A new file (rotated, or a restarted JVM) is read from its start
+    if state.get("inode") != inode or state.get("offset", 0) > size:
+        state.update(inode=inode, offset=0)
+
+    events = []
+    while state["offset"] < size:
+        data = source.read(path, state["offset"], min(READ_CHUNK, size - state["offset"]))
+        if not data:
+            break
+        # Only complete lines; a line being written is read next time
+        complete = data[:data.rfind(b"\n") + 1]
+        if not complete:
+            break
+        events += parse_gc_log(complete.decode("utf-8", "replace"))
+        state["offset"] += len(complete)
+    return events
+
+
+def get_max_heap(server_name: str) -> Optional[int]:
+    """The -Xmx of a server, from its XMX environment variable."""
+    env = inspect_container(server_name, "{{range .Config.Env}}{{println .}}{{end}}") or ""
+    xmx = next((line.split("=", 1)[1] for line in env.splitlines() if line.startswith("XMX=")), None)
+    return parse_memory_size(xmx) if xmx else None
+
+
+def get_online_players(server_name: str) -> Optional[int]:
+    """Players online on a running server, from a Server List Ping, or None if it does not answer."""
+    hosts = inspect_container(server_name, "{{range .NetworkSettings.Networks}}{{.IPAddress}} {{end}}") or ""
+    host = hosts.split(" ")[0]
+    if not host:
+        return None
+    status = asyncio.run(query_status(host, timeout=2))
+    return status.get("players", {}).get("online", 0) if status else None
+
+
+def parse_window(window: str) -> Optional[Tuple[int, int]]:
+    """Parse a daily window such as '03:00-06:00' into minutes after midnight, or return None if invalid."""
+    match = re.fullmatch(r"(\d{1,2}):(\d{2})-(\d{1,2}):(\d{2})", window.strip())
+    if not match:
+        return None
+    start_hour, start_minute, end_hour, end_minute = map(int, match.groups())
+    if max(start_hour, end_hour) > 23 or max(start_minute, end_minute) > 59:
+        return None
+    return start_hour * 60 + start_minute, end_hour * 60 + end_minute
+
+
+def in_window(window: Tuple[int, int], now: Optional[datetime] = None) -> bool:
+    """Whether the local time is inside a daily window (which may span midnight)."""
+    now = now or datetime.now()
+    minute = now.hour * 60 + now.minute
+    start, end = window
+    return start <= minute < end if start <= end else minute >= start or minute < end
+
+
+def hours_until(window: Tuple[int, int], now: Optional[datetime] = None) -> float:
+    """Hours from the local time to the next start of a daily window."""
+    now = now or datetime.now()
+    minutes = (window[0] - (now.hour * 60 + now.minute)) % (24 * 60)
+    return minutes / 60
+
+
+def restart_server(server_name: str, players: int) -> bool:
+    """Restart a server cleanly, warning online players first."""
+    if players:
+        send_console_command(server_name, f"say The server restarts in {RESTART_WARNING} seconds for maintenance")
+        time.sleep(RESTART_WARNING - 10)
+        send_console_command(server_name, "say The server restarts in 10 seconds")
+        time.sleep(10)
+    # The entrypoint saves and stops the server on the stop signal, within the container's stop timeout
+    return container_action("restart", server_name)
+
+
+def _mib(size: Optional[float]) -> str:
+    return f"{size / (1024 * 1024):.0f}" if size is not None else "-"
+
+
+def _ms(pause: Optional[float]) -> str:
+    return f"{pause:.0f}" if pause is not None else "-"
+
+
+def print_reports(reports: Dict[str, GcReport]) -> None:
+    print(f"{'Server':<24} {'Uptime h':>8} {'Floor MiB':>9} {'Trend MiB/h':>11} {'Alloc MiB/s':>11} "
+          f"{'Pauses':>6} {'p50':>5} {'p95':>5} {'p99':>5} {'max ms':>6}  Status")
+    for server_name, report in reports.items():
+        status = "ok"
+        if report.leak:
+            status = f"leak likely, {HEAP_LIMIT:.0%} of heap in ~{report.hours_to_limit:.0f}h"
+        trend = f"{report.floor_trend / (1024 * 1024):+.1f}" if report.floor_trend is not None else "-"
+        print(f"{server_name:<24} {report.uptime / 3600:>8.1f} {_mib(report.heap_floor):>9} {trend:>11} "
+              f"{_mib(report.allocation_rate):>11} {report.pauses:>6} {_ms(report.pause_p50):>5} {_ms(report.pause_p95):>5} "
+              f"{_ms(report.pause_p99):>5} {_ms(report.pause_max):>6}  {status}")
+
+
+def check_servers(args, telemetry: Dict[str, Dict]) -> None:
+    """Read the new GC log lines of the servers, report, and restart leaking servers inside the restart window."""
+    sources = [source for source in list_servers()
+               if source.running and (not args.server_name or source.server == args.server_name)]
+    if not sources:
+        print("No running Java servers")
+        return
+
+    reports = {}
+    for source in sources:
+        state = telemetry.setdefault(source.server, {"run": new_run()})
+        state["run"] = add_events(state["run"], read_gc_log(source, state))
+        reports[source.server] = analyze_run(state["run"], get_max_heap(source.server))
+    save_cached_json(TELEMETRY_KEY, telemetry)
+    print_reports(reports)
+
+    window = parse_window(args.restart_window) if args.restart_window else None
+    for server_name, report in reports.items():
+        if not report.leak or not window:
+            continue
+        if not in_window(window):
+            wait = hours_until(window)
+            print(f"[{server_name}] Restart scheduled for the next window ({args.restart_window}, in {wait:.1f}h)")
+            if report.hours_to_limit < wait:
+                print(f"[{server_name}] Warning: the heap is expected to reach {HEAP_LIMIT:.0%} in ~{report.hours_to_limit:.1f}h, "
+                      f"before the window; consider restarting it now")
+            continue
+        players = get_online_players(server_name)
+        if players is None or players > args.restart_max_players:
+            print(f"[{server_name}] Restart postponed: {players if players is not None else 'unknown'} player(s) online")
+            continue
+        print(f"[{server_name}] Restarting to free leaked memory ({players} player(s) online)")
+        if restart_server(server_name, players):
+            telemetry[server_name]["run"] = new_run()
+            save_cached_json(TELEMETRY_KEY, telemetry)
+
+
+def gc_report(args) -> None:
+    """Entry point for the 'gc-report' command."""
+    if args.restart_window and parse_window(args.restart_window) is None:
+        print(f"Invalid --restart-window: {args.restart_window} (expected HH:MM-HH:MM)")
+        return
+
+    telemetry = dict(load_cached_json(TELEMETRY_KEY) or {})
+    check_servers(args, telemetry)
+    while args.watch:
+        time.sleep(args.watch)
+        print(f"\n{datetime.now():%Y-%m-%d %H:%M:%S}")
+        check_servers(args, telemetry)
@@ -0,0 +1,312 @@
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from docker_manager import container_action, inspect_container
+
+# Port the Java server listens on inside its container
+SERVER_PORT = 25565
+
+# How long a login is held while a stopped server starts before the player is asked to reconnect
+WAKE_HOLD = 25
+
+# Seconds between idle checks
+IDLE_CHECK_INTERVAL = 15
+
+# Largest packet accepted from clients before the backend takes over
+MAX_PACKET_SIZE = 32 * 1024
+
+# Status shown for a hibernated server that was never seen awake
+DEFAULT_STATUS = {
+    "version": {"name": "Hibernating", "protocol": -1},
+    "players": {"max": 20, "online": 0},
+    "description": {"text": "A Minecraft Server"},
+}
+
+# Handshake 'next state' values
+STATE_STATUS = 1
+STATE_LOGIN = 2
+
+
+def encode_varint(value: int) -> bytes:
+    """Encode an int as a protocol VarInt."""
+    value &= 0xFFFFFFFF
+    data = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            data.append(byte | 0x80)
+        else:
+            data.append(byte)
+            return bytes(data)
+
+
+def decode_varint(data: bytes, offset: int = 0) -> Tuple[int, int]:
+    """Decode a VarInt from a buffer. Returns (value, next offset)."""
+    value = 0
+    for i in range(5):
+        byte = data[offset + i]
+        value |= (byte & 0x7F) << (7 * i)
+        if not byte & 0x80:
+            if value & 0x80000000:
+                value -= 1 << 32
+            return value, offset + i + 1
+    raise ValueError("VarInt is too long")
+
+
+def encode_string(text: str) -> bytes:
+    data = text.encode("utf-8")
+    return encode_varint(len(data)) + data
+
+
+def make_packet(packet_id: int, payload: bytes = b"") -> bytes:
+    """Frame a packet (uncompressed, as used before login completes)."""
+    body = encode_varint(packet_id) + payload
+    return encode_varint(len(body)) + body
+
+
+async def read_varint(reader: asyncio.StreamReader) -> int:
+    value = 0
+    for i in range(5):
+        byte = (await reader.readexactly(1))[0]
+        value |= (byte & 0x7F) << (7 * i)
+        if not byte & 0x80:
+            return value
+    raise ValueError("VarInt is too long")
+
+
+async def read_packet(reader: asyncio.StreamReader) -> Tuple[int, bytes, bytes]:
+    """
+    Read one uncompressed packet.
+
+    Returns:
+        Tuple of (packet ID, payload, raw packet bytes including the length prefix)
+    """
+    length = await read_varint(reader)
+    if not 0 < length <= MAX_PACKET_SIZE:
+        raise ValueError(f"Invalid packet length {length}")
+    body = await reader.readexactly(length)
+    packet_id, offset = decode_varint(body)
+    return packet_id, body[offset:], encode_varint(length) + body
+
+
+def parse_handshake(payload: bytes) -> Tuple[int, str, int, int]:
+    """Parse a handshake payload into (protocol version, server address, port, next state)."""
+    protocol, offset = decode_varint(payload)
+    length, offset = decode_varint(payload, offset)
+    address = payload[offset:offset + length].decode("utf-8", errors="replace")
+    offset += length
+    port = int.from_bytes(payload[offset:offset + 2], "big")
+    next_state, _ = decode_varint(payload, offset + 2)
+    return protocol, address, port, next_state
+
+
+async def query_status(host: str, port: int = SERVER_PORT, timeout: float = 5) -> Optional[Dict[str, Any]]:
+    """
+    Run a Server List Ping against a server.
+
+    Args:
+        host: Server address
+        port: Server port
+        timeout: Connection and read timeout in seconds
+
+    Returns:
+        Parsed status JSON, or None if the server did not answer
+    """
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return None
+
+    try:
+        handshake = encode_varint(-1) + encode_string(host) + port.to_bytes(2, "big") + encode_varint(STATE_STATUS)
+        writer.write(make_packet(0x00, handshake) + make_packet(0x00))
+        await writer.drain()
+
+        length = await asyncio.wait_for(read_varint(reader), timeout)
+        body = await asyncio.wait_for(reader.readexactly(length), timeout)
+        _, offset = decode_varint(body)
+        json_length, offset = decode_varint(body, offset)
+        return json.loads(body[offset:offset + json_length])
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+        return None
+    finally:
+        writer.close()
+
+
+async def pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Copy bytes from a reader to a writer until either side closes."""
+    try:
+        while True:
+            data = await reader.read(64 * 1024)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+    except (OSError, asyncio.CancelledError):
+        pass
+    finally:
+        writer.close()
+
+
+class HibernatingServer:
+    """
+    Listens on a server's public port and wakes or hibernates its container.
+
+    While the server runs, connections are proxied unchanged. While it is
+    hibernated (paused or stopped), Server List Pings are answered from the
+    last status the real server reported, and a login wakes the container.
+    """
+
+    def __init__(self, server_name: str, listen_port: int, idle_timeout: int, mode: str = "stop"):
+        self.server_name = server_name
+        self.listen_port = listen_port
+        self.idle_timeout = idle_timeout
+        self.mode = mode                        # 'pause' (instant wake) or 'stop' (frees memory)
+        self.players = 0                        # Proxied connections in the login/play state
+        self.last_activity = time.monotonic()
+        self.status: Dict[str, Any] = DEFAULT_STATUS
+        self.wake_lock = asyncio.Lock()
+
+    async def container_state(self) -> Optional[str]:
+        return await asyncio.to_thread(inspect_container, self.server_name, "{{.State.Status}}")
+
+    async def backend_host(self) -> Optional[str]:
+        # The address may change every time a stopped container starts
+        return await asyncio.to_thread(
+            inspect_container, self.server_name, "{{range .NetworkSettings.Networks}}{{.IPAddress}} {{end}}"
+        )
+
+    async def wake(self) -> Optional[str]:
+        """
+        Bring the container back and wait until it accepts players.
+
+        Returns:
+            Backend address, or None if the server is not ready within WAKE_HOLD
+        """
+        async with self.wake_lock:
+            state = await self.container_state()
+            if state == "paused":
+                print(f"[{self.server_name}] Login received, resuming")
+                await asyncio.to_thread(container_action, "unpause", self.server_name)
+            elif state in ("exited", "created"):
+                print(f"[{self.server_name}] Login received, starting")
+                await asyncio.to_thread(container_action, "start", self.server_name)
+
+            self.last_activity = time.monotonic()
+            deadline = time.monotonic() + WAKE_HOLD
+            while time.monotonic() < deadline:
+                host = ((await self.backend_host()) or "").split(" ")[0]
+                if host and await query_status(host, timeout=2):
+                    return host
+                await asyncio.sleep(0.5)
+            return None
+
+    async def hibernate(self) -> None:
+        """Pause or stop the container if nobody is playing."""
+        async with self.wake_lock:
+            if self.players or await self.container_state() != "running":
+                return
+
+            host = ((await self.backend_host()) or "").split(" ")[0]
+            status = await query_status(host) if host else None
+            if status is None or status.get("players", {}).get("online", 0) > 0:
+                return
+
+            self.status = status
+            print(f"[{self.server_name}] Idle for {self.idle_timeout}s, hibernating ({self.mode})")
+            await asyncio.to_thread(container_action, self.mode, self.server_name)
+
+    async def watch_idle(self) -> None:
+        while True:
+            await asyncio.sleep(IDLE_CHECK_INTERVAL)
+            if not self.players and time.monotonic() - self.last_activity >= self.idle_timeout:
+                await self.hibernate()
+
+    def sleeping_status(self, protocol: int) -> Dict[str, Any]:
+        """Status shown while hibernated: the last real status with zero players and a hint."""
+        status = json.loads(json.dumps(self.status))
+        status.setdefault("players", {})["online"] = 0
+        status["players"].pop("sample", None)
+        description = status.get("description", "")
+        text = description.get("text", "") if isinstance(description, dict) else str(description)
+        status["description"] = {"text": f"{text}\n§7Sleeping - join to wake it up" if text else "§7Sleeping - join to wake it up"}
+        if status.get("version", {}).get("protocol", -1) == -1:
+            status["version"] = {"name": status.get("version", {}).get("name", ""), "protocol": protocol}
+        return status
+
+    async def answer_status(self, reader, writer, protocol: int) -> None:
+        """Answer a Server List Ping without waking the server."""
+        packet_id, _, _ = await read_packet(reader)
+        if packet_id != 0x00:
+            return
+        writer.write(make_packet(0x00, encode_string(json.dumps(self.sleeping_status(protocol)))))
+        await writer.drain()
+
+        packet_id, payload, _ = await read_packet(reader)
+        if packet_id == 0x01:  # Ping; echo the payload back
+            writer.write(make_packet(0x01, payload))
+            await writer.drain()
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            packet_id, payload, handshake = await asyncio.wait_for(read_packet(reader), 10)
+            if packet_id != 0x00:
+                return
+            protocol, _, _, next_state = parse_handshake(payload)
+
+            if next_state == STATE_STATUS:
+                if await self.container_state() != "running":
+                    await self.answer_status(reader, writer, protocol)
+                    return
+                host = ((await self.backend_host()) or "").split(" ")[0]
+            else:
+                host = await self.wake()
+                if not host:
+                    message = json.dumps({"text": "The server is starting, please reconnect in a few seconds."})
+                    writer.write(make_packet(0x00, encode_string(message)))
+                    await writer.drain()
+                    return
+
+            backend_reader, backend_writer = await asyncio.open_connection(host, SERVER_PORT)
+            backend_writer.write(handshake)
+
+            is_player = next_state == STATE_LOGIN
+            if is_player:
+                self.players += 1
+            try:
+                await asyncio.gather(pipe(reader, backend_writer), pipe(backend_reader, writer))
+            finally:
+                if is_player:
+                    self.players -= 1
+                    self.last_activity = time.monotonic()
+        except (OSError, ValueError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self) -> None:
+        server = await asyncio.start_server(self.handle_client, "0.0.0.0", self.listen_port)
+        print(f"[{self.server_name}] Listening on port {self.listen_port} "
+              f"(hibernates after {self.idle_timeout}s idle, mode: {self.mode})")
+        async with server:
+            await asyncio.gather(server.serve_forever(), self.watch_idle())
+
+
+async def run_proxies(servers: List[HibernatingServer]) -> None:
+    await asyncio.gather(*(server.serve() for server in servers))
+
+
+def hibernate(args) -> None:
+    """Entry point for the 'hibernate' command."""
+    targets = [p.rsplit(":", 1) for p in args.proxy or []]
+    if args.server_name:
+        targets.append((args.server_name, str(args.port)))
+
+    servers = [HibernatingServer(name, int(port), args.idle_timeout, args.hibernate_mode) for name, port in targets]
+    try:
+        asyncio.run(run_proxies(servers))
+    except KeyboardInterrupt:
+        print("Stopped")
@@ -0,0 +1,77 @@
+import os
+from typing import Dict, Optional, Tuple
+
+import requests
+
+# Local mirror directory or URL every request is resolved against (see mirror.py).
+# Can be set with the MCSM_MIRROR environment variable or the --mirror argument.
+_mirror_location: Optional[str] = os.environ.get("MCSM_MIRROR") or None
+_mirror_record = False
+# Sessions shared by all callers, keyed by their default headers, so connection
+# pools stay warm across calls (and across jobs in the daemon)
+_shared_sessions: Dict[Tuple[Tuple[str, str], ...], requests.Session] = {}
+
+
+def configure_mirror(location: Optional[str], record: bool = False) -> None:
+    """
+    Route all HTTP requests made through this module's sessions via a mirror.
+
+    Args:
+        location: Mirror directory or base URL, or None to use the internet directly
+        record: Fetch from the internet and store responses in the mirror directory
+    """
+    global _mirror_location, _mirror_record
+    _mirror_location = location
+    _mirror_record = record
+    _shared_sessions.clear()
+
+
+def get_mirror_location() -> Optional[str]:
+    """Get the configured mirror directory or URL, if any."""
+    return _mirror_location
+
+
+def is_recording_mirror() -> bool:
+    """Whether requests are fetched from the internet and stored in the mirror directory."""
+    return _mirror_record
+
+
+def create_session(headers: Optional[Dict[str, str]] = None) -> requests.Session:
+    """
+    Create a requests session honoring the mirror configuration.
+
+    Args:
+        headers: Optional default headers (e.g., User-Agent, API keys)
+
+    Returns:
+        Configured requests session
+    """
+    session = requests.Session()
+    if headers:
+        session.headers.update(headers)
+
+    if _mirror_location:
+        from mirror import MirrorAdapter
+
+        adapter = MirrorAdapter(_mirror_location, record=_mirror_record)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+    return session
+
+
+def get_session(headers: Optional[Dict[str, str]] = None) -> requests.Session:
+    """
+    Get a shared session, created on first use for each set of default headers.
+
+    Args:
+        headers: Optional default headers (e.g., User-Agent, API keys)
+
+    Returns:
+        Shared requests session
+    """
+    key = tuple(sorted((headers or {}).items()))
+    session = _shared_sessions.get(key)
+    if session is None:
+        session = _shared_sessions.setdefault(key, create_session(headers))
+    return session
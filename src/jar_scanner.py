@@ -0,0 +1,334 @@
+import mmap
+import multiprocessing
+import os
+import re
+import shutil
+import struct
+import subprocess
+import tempfile
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+# Zip record signatures and layouts (see the PKWARE APPNOTE)
+_EOCD_SIGNATURE = b"PK\x05\x06"
+_EOCD = struct.Struct("<IHHHHIIH")
+_ZIP64_LOCATOR = struct.Struct("<IIQI")
+_ZIP64_EOCD = struct.Struct("<IQHHIIQQQQ")
+_CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+_CENTRAL_HEADER_SIGNATURE = 0x02014B50
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_MAX_EOCD_SEARCH = _EOCD.size + 0xFFFF
+
+# Folders loaders extract nested library jars from (Fabric jar-in-jar, Forge/NeoForge JarJar)
+NESTED_JAR_PREFIXES = ("META-INF/jars/", "META-INF/jarjar/")
+
+# Entries every jar has; duplicates of these are expected
+IGNORED_RESOURCES = re.compile(
+    r"^(META-INF/|module-info\.class$|pack\.(mcmeta|png)$|fabric\.mod\.json$|quilt\.mod\.json$|LICENSE|NOTICE|README)",
+    re.IGNORECASE
+)
+
+# 'name-1.2.3.jar' file names of nested library jars and of jars dropped into mods/
+VERSIONED_JAR_NAME = re.compile(r"^(?P<artifact>.+?)-(?P<version>\d[\w.+-]*)\.jar$")
+
+# Below this many jars, scanning in worker processes costs more than it saves
+MIN_PARALLEL_JARS = 16
+
+# Entries of a zip as (name, CRC-32, uncompressed size)
+ZipEntries = List[Tuple[str, int, int]]
+
+
+def _find_central_directory(buf, length: int) -> Optional[Tuple[int, int, int]]:
+    """Locate the central directory of a zip in a buffer. Returns (offset, size, entry count)."""
+    search_start = max(0, length - _MAX_EOCD_SEARCH)
+    eocd = bytes(buf[search_start:length]).rfind(_EOCD_SIGNATURE)
+    if eocd < 0:
+        return None
+    eocd += search_start
+
+    _, _, _, _, count, size, offset, _ = _EOCD.unpack_from(buf, eocd)
+    if count == 0xFFFF or 0xFFFFFFFF in (size, offset):
+        locator = eocd - _ZIP64_LOCATOR.size
+        if locator < 0:
+            return None
+        _, _, zip64_offset, _ = _ZIP64_LOCATOR.unpack_from(buf, locator)
+        _, _, _, _, _, _, _, count, size, offset = _ZIP64_EOCD.unpack_from(buf, zip64_offset)
+        return offset, size, count
+
+    # Data prepended to the archive shifts every offset; measure it from the end record
+    prefix = eocd - size - offset
+    return offset + prefix, size, count
+
+
+def read_central_directory(buf, length: int) -> Tuple[ZipEntries, List[Tuple[str, int, int, int]]]:
+    """
+    Read the entries of a zip from its central directory, without touching file data.
+
+    Args:
+        buf: Buffer holding the whole zip (an mmap or memoryview)
+        length: Length of the zip in the buffer
+
+    Returns:
+        Tuple of (entries, stored nested jars as (name, local header offset, size, method))
+    """
+    location = _find_central_directory(buf, length)
+    if not location:
+        return [], []
+    offset, _, count = location
+
+    entries = []
+    nested = []
+    position = offset
+    for _ in range(count):
+        (signature, _, _, _, method, _, _, crc, compressed_size, size,
+         name_length, extra_length, comment_length, _, _, _, local_offset) = _CENTRAL_HEADER.unpack_from(buf, position)
+        if signature != _CENTRAL_HEADER_SIGNATURE:
+            break
+        start = position + _CENTRAL_HEADER.size
+        name = bytes(buf[start:start + name_length]).decode("utf-8", errors="replace")
+        position = start + name_length + extra_length + comment_length
+
+        if name.endswith("/"):
+            continue
+        entries.append((name, crc, size))
+        if name.startswith(NESTED_JAR_PREFIXES) and name.endswith(".jar"):
+            nested.append((name, local_offset, compressed_size, method))
+    return entries, nested
+
+
+def scan_jar(path: str) -> Tuple[str, ZipEntries, Dict[str, Optional[ZipEntries]]]:
+    """
+    Index one jar through an mmap of its central directory.
+
+    Nested library jars stored without compression are indexed in place;
+    compressed ones are only listed.
+
+    Args:
+        path: Jar path
+
+    Returns:
+        Tuple of (path, entries, nested jar name -> entries or None)
+    """
+    try:
+        with open(path, "rb") as f:
+            length = os.fstat(f.fileno()).st_size
+            if not length:
+                return path, [], {}
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                entries, nested_jars = read_central_directory(mm, length)
+                nested = {}
+                with memoryview(mm) as view:
+                    for name, local_offset, size, method in nested_jars:
+                        nested[name] = None
+                        if method != 0 or size == 0xFFFFFFFF:
+                            continue
+                        _, _, _, _, _, _, _, _, _, name_length, extra_length = _LOCAL_HEADER.unpack_from(mm, local_offset)
+                        start = local_offset + _LOCAL_HEADER.size + name_length + extra_length
+                        with view[start:start + size] as nested_view:
+                            nested[name] = read_central_directory(nested_view, size)[0]
+                return path, entries, nested
+    except (OSError, ValueError, struct.error):
+        return path, [], {}
+
+
+def scan_jars(paths: List[str], max_workers: Optional[int] = None):
+    """
+    Index many jars, in parallel worker processes for large sets.
+
+    Args:
+        paths: Jar paths
+        max_workers: Number of worker processes (default: CPU count)
+
+    Returns:
+        Iterator of scan_jar results
+    """
+    if len(paths) < MIN_PARALLEL_JARS:
+        return map(scan_jar, paths)
+
+    # 'spawn' is safe in multi-threaded processes (like the daemon), where fork is not
+    executor = ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(),
+                                   mp_context=multiprocessing.get_context("spawn"))
+    with executor:
+        return list(executor.map(scan_jar, paths, chunksize=8))
+
+
+def library_from_path(path: str, libraries_dir: str) -> Optional[Tuple[str, str]]:
+    """Get (artifact, version) of a jar in a Maven-layout libraries/ folder."""
+    parts = os.path.relpath(path, libraries_dir).split(os.sep)
+    if len(parts) < 4:
+        return None
+    return parts[-3], parts[-2]
+
+
+@dataclass(slots=True)
+class ScanReport:
+    """Class index summary of a server's mods and libraries."""
+    jar_count: int = 0
+    nested_jar_count: int = 0
+    class_count: int = 0
+    class_bytes: int = 0
+    duplicate_class_bytes: int = 0
+    # Class name -> jars containing it
+    duplicate_classes: Dict[str, List[str]] = field(default_factory=dict)
+    # Duplicated classes whose content differs between jars
+    conflicting_classes: Set[str] = field(default_factory=set)
+    # Resource path -> jars containing it
+    duplicate_resources: Dict[str, List[str]] = field(default_factory=dict)
+    # Library artifact -> version -> jars providing it
+    libraries: Dict[str, Dict[str, List[str]]] = field(default_factory=dict)
+
+    @property
+    def version_conflicts(self) -> Dict[str, Dict[str, List[str]]]:
+        return {artifact: versions for artifact, versions in self.libraries.items() if len(versions) > 1}
+
+
+def scan_server_files(mods_dir: Optional[str], libraries_dir: Optional[str] = None) -> ScanReport:
+    """
+    Build a class and resource index of a server's mods and loader libraries.
+
+    Args:
+        mods_dir: The server's mods/ folder
+        libraries_dir: The loader's libraries/ folder, if available
+
+    Returns:
+        ScanReport
+    """
+    # Jars are reported by their path inside the server folder (e.g. 'mods/x.jar')
+    labels = {}
+    for folder, prefix in ((mods_dir, "mods"), (libraries_dir, "libraries")):
+        if folder and os.path.isdir(folder):
+            for root, _, files in os.walk(folder):
+                for filename in files:
+                    if filename.endswith(".jar"):
+                        path = os.path.join(root, filename)
+                        labels[path] = f"{prefix}/{os.path.relpath(path, folder).replace(os.sep, '/')}"
+    paths = list(labels)
+
+    report = ScanReport(jar_count=len(paths))
+    classes: Dict[str, List[Tuple[str, int, int]]] = defaultdict(list)
+    resources: Dict[str, List[str]] = defaultdict(list)
+    libraries: Dict[str, Dict[str, List[str]]] = defaultdict(lambda: defaultdict(list))
+
+    def add_entries(source: str, entries: ZipEntries) -> None:
+        for name, crc, size in entries:
+            if IGNORED_RESOURCES.match(name):
+                continue
+            if name.endswith(".class"):
+                classes[name].append((source, crc, size))
+            else:
+                resources[name].append(source)
+
+    for path, entries, nested in scan_jars(paths):
+        label = labels[path]
+        add_entries(label, entries)
+        if label.startswith("libraries/"):
+            library = library_from_path(path, libraries_dir)
+        else:
+            match = VERSIONED_JAR_NAME.match(os.path.basename(path))
+            library = match.group("artifact", "version") if match else None
+        if library:
+            libraries[library[0]][library[1]].append(label)
+
+        for nested_name, nested_entries in nested.items():
+            report.nested_jar_count += 1
+            nested_label = f"{label}!/{nested_name}"
+            match = VERSIONED_JAR_NAME.match(os.path.basename(nested_name))
+            if match:
+                libraries[match.group("artifact")][match.group("version")].append(label)
+            if nested_entries:
+                add_entries(nested_label, nested_entries)
+
+    for name, copies in classes.items():
+        report.class_count += 1
+        report.class_bytes += copies[0][2]
+        if len(copies) > 1:
+            report.duplicate_classes[name] = [source for source, _, _ in copies]
+            report.duplicate_class_bytes += sum(size for _, _, size in copies[1:])
+            if len({crc for _, crc, _ in copies}) > 1:
+                report.conflicting_classes.add(name)
+
+    report.duplicate_resources = {name: sources for name, sources in resources.items() if len(sources) > 1}
+    report.libraries = {artifact: dict(versions) for artifact, versions in libraries.items()}
+    return report
+
+
+def _package(class_name: str) -> str:
+    return class_name.rsplit("/", 1)[0].replace("/", ".") if "/" in class_name else "(default package)"
+
+
+def print_scan_report(report: ScanReport, limit: int = 10) -> None:
+    """Print a summary of a ScanReport, listing at most `limit` items per section."""
+    total_bytes = report.class_bytes + report.duplicate_class_bytes
+    print(f"\n{'='*60}")
+    print(f"Scanned {report.jar_count} jar(s) and {report.nested_jar_count} nested jar(s): "
+          f"{report.class_count} classes ({report.class_bytes / (1024 * 1024):.1f} MB)")
+
+    if report.duplicate_classes:
+        share = 100 * report.duplicate_class_bytes / total_bytes if total_bytes else 0
+        print(f"\nDuplicate classes: {len(report.duplicate_classes)} "
+              f"({len(report.conflicting_classes)} with different content)")
+        print(f"  Class-loading overhead: {report.duplicate_class_bytes / (1024 * 1024):.1f} MB of duplicate "
+              f"class data, {share:.1f}% of all class bytes on the class path")
+
+        # Group by the set of jars sharing classes, largest overlaps first
+        overlaps: Dict[Tuple[str, ...], List[str]] = defaultdict(list)
+        for name, sources in report.duplicate_classes.items():
+            overlaps[tuple(sorted(set(sources)))].append(name)
+        for sources, names in sorted(overlaps.items(), key=lambda item: -len(item[1]))[:limit]:
+            conflicting = sum(1 for name in names if name in report.conflicting_classes)
+            packages = sorted({_package(name) for name in names})
+            jars = " + ".join(sources[:4]) + (f" + {len(sources) - 4} more" if len(sources) > 4 else "")
+            print(f"  {len(names)} class(es), {conflicting} differing, in {jars}")
+            print(f"    packages: {', '.join(packages[:3])}{' ...' if len(packages) > 3 else ''}")
+
+    conflicts = report.version_conflicts
+    if conflicts:
+        print(f"\nLibrary version conflicts: {len(conflicts)}")
+        for artifact, versions in sorted(conflicts.items())[:limit]:
+            listed = "; ".join(f"{version} ({', '.join(sorted(set(sources))[:3])})" for version, sources in sorted(versions.items()))
+            print(f"  {artifact}: {listed}")
+
+    if report.duplicate_resources:
+        print(f"\nDuplicate resources: {len(report.duplicate_resources)}")
+        for name, sources in sorted(report.duplicate_resources.items())[:limit]:
+            print(f"  {name}: {', '.join(sources[:4])}{f' + {len(sources) - 4} more' if len(sources) > 4 else ''}")
+
+    if not report.duplicate_classes and not conflicts:
+        print("No duplicate classes or library version conflicts found.")
+    print(f"{'='*60}\n")
+
+
+def copy_from_image(image: str, target_dir: str) -> bool:
+    """Copy /app/mods and /app/libraries out of a server image."""
+    result = subprocess.run(["docker", "create", image], capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"Failed to read image '{image}': {result.stderr.strip()}")
+        return False
+
+    container = result.stdout.strip()
+    try:
+        for folder in ("mods", "libraries"):
+            subprocess.run(["docker", "cp", f"{container}:/app/{folder}", os.path.join(target_dir, folder)],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    finally:
+        subprocess.run(["docker", "rm", container], stdout=subprocess.DEVNULL)
+    return True
+
+
+def scan_jars_command(args) -> None:
+    """Entry point for the 'scan-jars' command."""
+    if args.image:
+        work_dir = tempfile.mkdtemp(prefix="mcsm-scan-")
+        try:
+            if copy_from_image(args.image, work_dir):
+                print_scan_report(scan_server_files(os.path.join(work_dir, "mods"), os.path.join(work_dir, "libraries")))
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        return
+
+    server_dir = args.server_dir
+    mods_dir = args.mods_dir or (os.path.join(server_dir, "mods") if server_dir else None)
+    libraries_dir = os.path.join(server_dir, "libraries") if server_dir else None
+    print_scan_report(scan_server_files(mods_dir, libraries_dir))
@@ -0,0 +1,157 @@
+import codecs
+import json
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+_WHITESPACE = " \t\r\n"
+_NUMBER_CHARS = "0123456789.eE+-"
+_decoder = json.JSONDecoder()
+
+
+class JsonArrayParser:
+    """
+    Push parser decoding the elements of a JSON array from byte chunks as they are fed in.
+
+    iter_json_array drives it from a blocking iterable; asynchronous readers
+    (e.g. aiohttp's response.content) feed it directly. Only the element being
+    decoded is buffered.
+    """
+
+    def __init__(self, key: Optional[str] = None):
+        """
+        Args:
+            key: Top-level object key holding the array, or None if the document is the array
+        """
+        self.key = key
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+        self.state = "object-start" if key is not None else "array-start"
+        self.name = None  # Object key whose value is next
+        self.final = False
+
+    @property
+    def done(self) -> bool:
+        """True once the array has ended (the rest of the document is ignored)."""
+        return self.state == "done"
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """Add a chunk and return the array elements it completed."""
+        self.buffer = self.buffer[self.pos:] + self.text_decoder.decode(chunk)
+        self.pos = 0
+        return self._parse()
+
+    def close(self) -> List[Any]:
+        """
+        Mark the end of the document and return the last elements.
+
+        Raises:
+            ValueError: If the document is malformed or ends before the array does
+        """
+        self.buffer = self.buffer[self.pos:] + self.text_decoder.decode(b"", final=True)
+        self.pos = 0
+        self.final = True
+        values = self._parse()
+        if not self.done:
+            raise ValueError("Unexpected end of JSON stream")
+        return values
+
+    def _peek(self) -> str:
+        """Skip whitespace and return the next character ('' if more input is needed)."""
+        while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+            self.pos += 1
+        return self.buffer[self.pos] if self.pos < len(self.buffer) else ""
+
+    def _expect(self, char: str) -> bool:
+        """Consume `char`; returns False if more input is needed."""
+        next_char = self._peek()
+        if not next_char:
+            return False
+        if next_char != char:
+            raise ValueError(f"Expected '{char}' in JSON stream, found '{next_char}'")
+        self.pos += 1
+        return True
+
+    def _value(self) -> Tuple[bool, Any]:
+        """Decode the next complete JSON value; returns (False, None) if more input is needed."""
+        if not self._peek():
+            return False, None
+        try:
+            value, end = _decoder.raw_decode(self.buffer, self.pos)
+        except json.JSONDecodeError:
+            if self.final:
+                raise
+            return False, None
+        # A number ending at the buffer end, or cut short at its '.' or exponent, may continue in the next chunk
+        if not self.final and (end == len(self.buffer) or self.buffer[end] in _NUMBER_CHARS):
+            return False, None
+        self.pos = end
+        return True, value
+
+    def _parse(self) -> List[Any]:
+        values = []
+        while True:
+            if self.state == "object-start":
+                if not self._expect("{"):
+                    break
+                self.state = "object"
+            elif self.state == "object":
+                if self._peek() == ",":
+                    self.pos += 1
+                if self._peek() == "}":
+                    self.state = "done"
+                    continue
+                complete, self.name = self._value()
+                if not complete:
+                    break
+                self.state = "colon"
+            elif self.state == "colon":
+                if not self._expect(":"):
+                    break
+                self.state = "array-start" if self.name == self.key else "skip"
+            elif self.state == "skip":
+                complete, _ = self._value()  # Skip values of other keys
+                if not complete:
+                    break
+                self.state = "object"
+            elif self.state == "array-start":
+                if not self._expect("["):
+                    break
+                self.state = "array"
+            elif self.state == "array":
+                char = self._peek()
+                if char == "]":
+                    self.pos += 1
+                    self.state = "done"
+                elif char == ",":
+                    self.pos += 1
+                else:
+                    complete, value = self._value()
+                    if not complete:
+                        break
+                    values.append(value)
+            else:
+                break
+        return values
+
+
+def iter_json_array(chunks: Iterable[bytes], key: Optional[str] = None) -> Iterator[Any]:
+    """
+    Yield the elements of a JSON array one at a time while the document is still downloading.
+
+    Only the element being decoded is held in memory, so very long listings
+    (e.g. every file of a CurseForge project) can be filtered without parsing
+    the whole response into a list first.
+
+    Args:
+        chunks: Iterable of byte chunks (e.g. response.iter_content())
+        key: Top-level object key holding the array, or None if the document is the array
+
+    Yields:
+        Decoded array elements
+    """
+    parser = JsonArrayParser(key)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+        if parser.done:
+            return
+    yield from parser.close()
@@ -0,0 +1,518 @@
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import struct
+import subprocess
+import threading
+import time
+import uuid
+import zlib
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+from autotune import TrialServer
+from cache import get_cache_path
+from docker_manager import get_container_stats, inspect_container
+from hibernation import SERVER_PORT, decode_varint, encode_string, encode_varint, query_status, read_varint
+from rcon import RconError
+from utils import parse_memory_size
+
+# Protocol spoken by the bots: Minecraft 1.21 and 1.21.1
+PROTOCOL_VERSION = 767
+
+# Packet IDs of protocol 767, by connection state (C = clientbound, S = serverbound)
+C_LOGIN_DISCONNECT, C_ENCRYPTION_REQUEST, C_LOGIN_SUCCESS, C_SET_COMPRESSION, C_LOGIN_PLUGIN_REQUEST, C_LOGIN_COOKIE_REQUEST = range(6)
+S_LOGIN_START, S_LOGIN_PLUGIN_RESPONSE, S_LOGIN_ACKNOWLEDGED, S_LOGIN_COOKIE_RESPONSE = 0x00, 0x02, 0x03, 0x04
+
+C_CONFIG_COOKIE_REQUEST, C_CONFIG_DISCONNECT, C_FINISH_CONFIGURATION = 0x00, 0x02, 0x03
+C_CONFIG_KEEP_ALIVE, C_CONFIG_PING, C_ADD_RESOURCE_PACK, C_KNOWN_PACKS = 0x04, 0x05, 0x09, 0x0E
+S_CLIENT_INFORMATION, S_CONFIG_COOKIE_RESPONSE, S_ACKNOWLEDGE_FINISH_CONFIGURATION = 0x00, 0x01, 0x03
+S_CONFIG_KEEP_ALIVE, S_CONFIG_PONG, S_RESOURCE_PACK_RESPONSE, S_KNOWN_PACKS = 0x04, 0x05, 0x06, 0x07
+
+C_CHUNK_BATCH_FINISHED, C_PLAY_DISCONNECT, C_PLAY_KEEP_ALIVE, C_CHUNK_DATA = 0x0C, 0x1D, 0x26, 0x27
+C_PLAY_PING, C_COMBAT_DEATH, C_SYNCHRONIZE_POSITION, C_START_CONFIGURATION = 0x35, 0x3C, 0x40, 0x69
+S_CONFIRM_TELEPORT, S_CHUNK_BATCH_RECEIVED, S_CLIENT_STATUS, S_ACKNOWLEDGE_CONFIGURATION = 0x00, 0x08, 0x09, 0x0C
+S_PLAY_KEEP_ALIVE, S_SET_PLAYER_POSITION, S_PLAY_PONG = 0x18, 0x1A, 0x27
+
+# Play packets whose payload the bots read; everything else is only counted
+PLAY_HANDLED = {C_CHUNK_BATCH_FINISHED, C_PLAY_DISCONNECT, C_PLAY_KEEP_ALIVE, C_PLAY_PING,
+                C_COMBAT_DEATH, C_SYNCHRONIZE_POSITION, C_START_CONFIGURATION}
+
+_POSITION = struct.Struct(">dddffb")
+_MOVE = struct.Struct(">dddB")
+
+# Bots are named '<prefix><n>' (player names are at most 16 characters)
+BOT_PREFIX = "mcsm_bot"
+
+# View distance the bots ask for (the server's own view-distance still applies)
+BOT_VIEW_DISTANCE = 10
+
+# Chunks per tick the bots accept; the server's maximum, so chunk sending is never throttled by the bots
+BOT_CHUNKS_PER_TICK = 64.0
+
+# Bots fly this many blocks above their spawn point and climb when the server blocks their path
+CRUISE_HEIGHT = 8
+CLIMB_HEIGHT = 8
+
+# Bots wander within this many blocks of their spawn point, turning every few seconds
+ROAM_RADIUS = 2000
+TURN_INTERVAL = (5, 20)
+
+# Seconds between bot logins, and the time a step waits for its bots to spawn
+LOGIN_INTERVAL = 0.1
+LOGIN_TIMEOUT = 60
+
+# Seconds between MSPT and CPU samples during a step
+SAMPLE_INTERVAL = 5
+
+# GC log written by the trial server's JVM
+GC_LOG = "/tmp/loadtest-gc.log"
+
+# Stop-the-world pauses in a unified JVM GC log, e.g.
+# '[12.3s][info][gc] GC(7) Pause Young (Normal) (G1 Evacuation Pause) 120M->31M(1024M) 4.215ms'
+_GC_PAUSE = re.compile(r"Pause .*?([\d.]+[KMG])->([\d.]+[KMG])\(([\d.]+[KMG])\) ([\d.]+)ms")
+
+# Suggested heap sizes are rounded up to this
+HEAP_ROUNDING = 512 * 1024 * 1024
+
+
+class BotError(Exception):
+    """Raised when a bot is refused or kicked by the server."""
+
+
+def offline_uuid(name: str) -> uuid.UUID:
+    """The UUID an offline-mode server assigns to a player name."""
+    return uuid.UUID(bytes=hashlib.md5(f"OfflinePlayer:{name}".encode()).digest(), version=3)
+
+
+def _nbt_text(payload: bytes) -> str:
+    """Best-effort text of an NBT chat component (used for disconnect reasons)."""
+    return b" ".join(re.findall(rb"[\x20-\x7e]{3,}", payload)[-3:]).decode() or "no reason given"
+
+
+class Bot:
+    """Headless protocol-level client that logs in, flies around and loads chunks."""
+
+    def __init__(self, name: str, host: str, port: int, speed: float):
+        self.name = name
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self.threshold = -1
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.position: Optional[List[float]] = None
+        self.origin: Optional[Tuple[float, float]] = None
+        self.spawned = False
+        self.closed = False
+        self.stopping = False
+        self.error: Optional[str] = None
+        self.chunks = 0
+
+    def send(self, packet_id: int, payload: bytes = b"") -> None:
+        body = encode_varint(packet_id) + payload
+        if self.threshold >= 0:
+            if len(body) >= self.threshold:
+                body = encode_varint(len(body)) + zlib.compress(body)
+            else:
+                body = b"\x00" + body
+        self.writer.write(encode_varint(len(body)) + body)
+
+    async def read(self, handled=None) -> Tuple[int, bytes]:
+        """
+        Read one packet.
+
+        Args:
+            handled: Packet IDs whose payload is needed; others are returned
+                with an empty payload, without decompressing them in full
+
+        Returns:
+            Tuple of (packet ID, payload)
+        """
+        data = await self.reader.readexactly(await read_varint(self.reader))
+        if self.threshold >= 0:
+            data_length, offset = decode_varint(data)
+            data = data[offset:]
+            if data_length:
+                packet_id, _ = decode_varint(zlib.decompressobj().decompress(data, 5))
+                if handled is not None and packet_id not in handled:
+                    return packet_id, b""
+                data = zlib.decompress(data)
+        packet_id, offset = decode_varint(data)
+        return packet_id, data[offset:]
+
+    async def run(self) -> None:
+        try:
+            self.reader, self.writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), LOGIN_TIMEOUT
+            )
+            await self.login()
+            await self.configure()
+            await self.play()
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError, struct.error, zlib.error, BotError) as e:
+            if not self.stopping:
+                self.error = str(e) or type(e).__name__
+        finally:
+            self.closed = True
+            if self.writer:
+                self.writer.close()
+
+    def close(self) -> None:
+        self.stopping = True
+        if self.writer:
+            self.writer.close()
+
+    async def login(self) -> None:
+        self.send(0x00, encode_varint(PROTOCOL_VERSION) + encode_string(self.host)
+                  + self.port.to_bytes(2, "big") + encode_varint(2))
+        self.send(S_LOGIN_START, encode_string(self.name) + offline_uuid(self.name).bytes)
+        while True:
+            packet_id, payload = await self.read()
+            if packet_id == C_LOGIN_DISCONNECT:
+                length, offset = decode_varint(payload)
+                raise BotError(f"Refused: {payload[offset:offset + length].decode('utf-8', errors='replace')}")
+            if packet_id == C_ENCRYPTION_REQUEST:
+                raise BotError("The server is in online mode")
+            if packet_id == C_SET_COMPRESSION:
+                self.threshold, _ = decode_varint(payload)
+            elif packet_id == C_LOGIN_PLUGIN_REQUEST:
+                message_id, _ = decode_varint(payload)
+                self.send(S_LOGIN_PLUGIN_RESPONSE, encode_varint(message_id) + b"\x00")
+            elif packet_id == C_LOGIN_COOKIE_REQUEST:
+                self.send(S_LOGIN_COOKIE_RESPONSE, payload + b"\x00")
+            elif packet_id == C_LOGIN_SUCCESS:
+                self.send(S_LOGIN_ACKNOWLEDGED)
+                return
+
+    async def configure(self) -> None:
+        self.send(S_CLIENT_INFORMATION, encode_string("en_us") + bytes([BOT_VIEW_DISTANCE]) + encode_varint(0)
+                  + b"\x01\x7f" + encode_varint(1) + b"\x00\x01")
+        while True:
+            packet_id, payload = await self.read()
+            if packet_id == C_CONFIG_DISCONNECT:
+                raise BotError(f"Kicked: {_nbt_text(payload)}")
+            if packet_id == C_FINISH_CONFIGURATION:
+                self.send(S_ACKNOWLEDGE_FINISH_CONFIGURATION)
+                return
+            if packet_id == C_CONFIG_KEEP_ALIVE:
+                self.send(S_CONFIG_KEEP_ALIVE, payload)
+            elif packet_id == C_CONFIG_PING:
+                self.send(S_CONFIG_PONG, payload)
+            elif packet_id == C_KNOWN_PACKS:
+                # Claim the server's data packs so registries are not sent in full
+                self.send(S_KNOWN_PACKS, payload)
+            elif packet_id == C_ADD_RESOURCE_PACK:
+                pack_id = payload[:16]
+                self.send(S_RESOURCE_PACK_RESPONSE, pack_id + encode_varint(3))  # Accepted
+                self.send(S_RESOURCE_PACK_RESPONSE, pack_id + encode_varint(0))  # Loaded
+            elif packet_id == C_CONFIG_COOKIE_REQUEST:
+                self.send(S_CONFIG_COOKIE_RESPONSE, payload + b"\x00")
+
+    async def play(self) -> None:
+        movement = asyncio.create_task(self.move())
+        try:
+            while True:
+                packet_id, payload = await self.read(PLAY_HANDLED)
+                if packet_id == C_CHUNK_DATA:
+                    self.chunks += 1
+                elif packet_id == C_PLAY_KEEP_ALIVE:
+                    self.send(S_PLAY_KEEP_ALIVE, payload)
+                elif packet_id == C_PLAY_PING:
+                    self.send(S_PLAY_PONG, payload)
+                elif packet_id == C_CHUNK_BATCH_FINISHED:
+                    self.send(S_CHUNK_BATCH_RECEIVED, struct.pack(">f", BOT_CHUNKS_PER_TICK))
+                elif packet_id == C_SYNCHRONIZE_POSITION:
+                    self.teleport(payload)
+                elif packet_id == C_COMBAT_DEATH:
+                    self.send(S_CLIENT_STATUS, encode_varint(0))  # Respawn
+                elif packet_id == C_PLAY_DISCONNECT:
+                    raise BotError(f"Kicked: {_nbt_text(payload)}")
+                elif packet_id == C_START_CONFIGURATION:
+                    self.send(S_ACKNOWLEDGE_CONFIGURATION)
+                    await self.configure()
+        finally:
+            movement.cancel()
+
+    def teleport(self, payload: bytes) -> None:
+        """Apply a position set by the server (spawn, or a correction of a blocked move) and confirm it."""
+        x, y, z, _, _, flags = _POSITION.unpack_from(payload)
+        teleport_id, _ = decode_varint(payload, _POSITION.size)
+        if self.position is None:
+            self.origin = (x, z)
+            self.position = [x, y + CRUISE_HEIGHT, z]
+        else:
+            previous = self.position
+            self.position = [x + previous[0] * (flags & 0x01), y + previous[1] * (flags >> 1 & 0x01),
+                             z + previous[2] * (flags >> 2 & 0x01)]
+            self.position[1] += CLIMB_HEIGHT
+        self.send(S_CONFIRM_TELEPORT, encode_varint(teleport_id))
+        self.spawned = True
+
+    async def move(self) -> None:
+        """Fly in a random direction, turning every few seconds, sending a position every tick like a client."""
+        heading = random.uniform(0, 2 * math.pi)
+        turn_at = 0.0
+        while True:
+            await asyncio.sleep(0.05)
+            if not self.spawned:
+                continue
+            now = time.monotonic()
+            x, y, z = self.position
+            if math.hypot(x - self.origin[0], z - self.origin[1]) > ROAM_RADIUS:
+                heading = math.atan2(self.origin[1] - z, self.origin[0] - x)
+                turn_at = now + TURN_INTERVAL[0]
+            elif now >= turn_at:
+                heading = random.uniform(0, 2 * math.pi)
+                turn_at = now + random.uniform(*TURN_INTERVAL)
+            self.position = [x + math.cos(heading) * self.speed * 0.05, y, z + math.sin(heading) * self.speed * 0.05]
+            self.send(S_SET_PLAYER_POSITION, _MOVE.pack(*self.position, 0))
+            await self.writer.drain()
+
+
+class Swarm:
+    """Bots running on an event loop in a background thread, so the harness can measure in between."""
+
+    def __init__(self, host: str, port: int, speed: float):
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self.bots: List[Bot] = []
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    def add(self, count: int) -> None:
+        """Start `count` more bots and wait until they have spawned or failed."""
+        new_bots = []
+        for _ in range(count):
+            bot = Bot(f"{BOT_PREFIX}{len(self.bots)}", self.host, self.port, self.speed)
+            self.bots.append(bot)
+            new_bots.append(bot)
+            asyncio.run_coroutine_threadsafe(bot.run(), self.loop)
+            time.sleep(LOGIN_INTERVAL)
+
+        deadline = time.monotonic() + LOGIN_TIMEOUT
+        while time.monotonic() < deadline and not all(bot.spawned or bot.closed for bot in new_bots):
+            time.sleep(0.5)
+
+    @property
+    def connected(self) -> int:
+        return sum(1 for bot in self.bots if bot.spawned and not bot.closed)
+
+    @property
+    def chunks(self) -> int:
+        return sum(bot.chunks for bot in self.bots)
+
+    def errors(self) -> Dict[str, int]:
+        """Count the reasons bots were refused or kicked."""
+        errors: Dict[str, int] = {}
+        for bot in self.bots:
+            if bot.error:
+                errors[bot.error] = errors.get(bot.error, 0) + 1
+        return errors
+
+    def stop(self) -> None:
+        for bot in self.bots:
+            self.loop.call_soon_threadsafe(bot.close)
+        time.sleep(1)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+
+
+@dataclass(slots=True)
+class LoadStep:
+    """Measurements of one load-test step."""
+    bots: int
+    mspt: float
+    mspt_p95: Optional[float]
+    tps: float
+    cpu_percent: float
+    memory: int
+    heap_after_gc: Optional[int]
+    gc_pauses: int
+    gc_pause_total_ms: float
+    gc_pause_max_ms: float
+    net_tx_per_second: float
+    net_rx_per_second: float
+    chunks_per_second: float
+
+
+class GcLog:
+    """Reads the pauses added to the trial server's GC log since the last read."""
+
+    def __init__(self, server_name: str):
+        self.server_name = server_name
+        self.offset = 0
+
+    def read_pauses(self) -> List[Tuple[int, float]]:
+        """
+        Returns:
+            List of (heap after GC in bytes, pause in milliseconds)
+        """
+        result = subprocess.run(
+            ["docker", "exec", self.server_name, "tail", "-c", f"+{self.offset + 1}", GC_LOG],
+            capture_output=True
+        )
+        if result.returncode != 0:
+            return []
+        # Only complete lines; a line being written is read next time
+        text = result.stdout[:result.stdout.rfind(b"\n") + 1]
+        self.offset += len(text)
+        return [(parse_memory_size(match.group(2)) or 0, float(match.group(4)))
+                for match in _GC_PAUSE.finditer(text.decode("utf-8", errors="replace"))]
+
+
+def measure_step(server: TrialServer, swarm: Swarm, gc_log: GcLog, duration: int) -> Optional[LoadStep]:
+    """Measure the server for `duration` seconds at the current bot count."""
+    gc_log.read_pauses()
+    before = get_container_stats(server.name)
+    chunks_before = swarm.chunks
+    started = time.monotonic()
+
+    samples = []
+    cpu = []
+    for _ in range(max(1, duration // SAMPLE_INTERVAL)):
+        time.sleep(SAMPLE_INTERVAL)
+        sample = server.measure_mspt()
+        if sample is None:
+            print("The server does not report its tick time ('tick query' needs Minecraft 1.20.3+)")
+            return None
+        samples.append(sample)
+        stats = get_container_stats(server.name)
+        if stats:
+            cpu.append(stats["cpu_percent"])
+
+    after = get_container_stats(server.name)
+    if not before or not after:
+        print("The trial server stopped")
+        return None
+    elapsed = time.monotonic() - started
+    pauses = gc_log.read_pauses()
+    p95s = [p95 for _, p95 in samples if p95 is not None]
+    mspt = sum(mean for mean, _ in samples) / len(samples)
+    return LoadStep(
+        bots=swarm.connected,
+        mspt=mspt,
+        mspt_p95=max(p95s) if p95s else None,
+        tps=min(20.0, 1000 / mspt) if mspt else 20.0,
+        cpu_percent=sum(cpu) / len(cpu) if cpu else 0.0,
+        memory=int(after["memory"]),
+        heap_after_gc=max(heap for heap, _ in pauses) if pauses else None,
+        gc_pauses=len(pauses),
+        gc_pause_total_ms=sum(pause for _, pause in pauses),
+        gc_pause_max_ms=max((pause for _, pause in pauses), default=0.0),
+        net_tx_per_second=(after["net_tx"] - before["net_tx"]) / elapsed,
+        net_rx_per_second=(after["net_rx"] - before["net_rx"]) / elapsed,
+        chunks_per_second=(swarm.chunks - chunks_before) / elapsed,
+    )
+
+
+def suggest_heap(steps: List[LoadStep]) -> Optional[str]:
+    """Suggest --xmx/--xms as twice the largest heap left after GC, rounded up."""
+    live = [step.heap_after_gc for step in steps if step.heap_after_gc]
+    if not live:
+        return None
+    size = max(2 * HEAP_ROUNDING, math.ceil(2 * max(live) / HEAP_ROUNDING) * HEAP_ROUNDING)
+    return f"{size // (1024 * 1024)}M"
+
+
+def print_report(label: str, steps: List[LoadStep], capacity: int, heap: Optional[str], min_tps: float) -> None:
+    print(f"\n{'='*60}")
+    print(f"Capacity report: {label}")
+    print(f"{'Bots':>5} {'MSPT':>6} {'p95':>6} {'TPS':>5} {'CPU%':>6} {'Mem MiB':>8} {'Heap MiB':>9} "
+          f"{'GC n':>5} {'GC max':>7} {'TX KB/s':>8} {'Chunks/s':>9}")
+    for step in steps:
+        p95 = f"{step.mspt_p95:.1f}" if step.mspt_p95 is not None else "-"
+        heap_after = f"{step.heap_after_gc / (1024 * 1024):.0f}" if step.heap_after_gc else "-"
+        print(f"{step.bots:>5} {step.mspt:>6.1f} {p95:>6} {step.tps:>5.1f} {step.cpu_percent:>6.0f} "
+              f"{step.memory / (1024 * 1024):>8.0f} {heap_after:>9} {step.gc_pauses:>5} {step.gc_pause_max_ms:>7.1f} "
+              f"{step.net_tx_per_second / 1000:>8.0f} {step.chunks_per_second:>9.0f}")
+    print(f"\nPlayers held at {min_tps} TPS or more: {capacity}")
+    if heap:
+        print(f"Suggested --xmx/--xms: {heap}")
+    print(f"{'='*60}\n")
+
+
+def load_test(args) -> None:
+    """Entry point for the 'loadtest' command."""
+    image, xmx, xms, properties, label = args.image, args.xmx, args.xms, {}, args.image
+    if args.template:
+        from pool import load_templates
+
+        template = load_templates().get(args.template)
+        if not template:
+            print(f"Pool template '{args.template}' does not exist")
+            return
+        image, xmx, xms, properties, label = template["image"], template["xmx"], template["xms"], template["properties"], args.template
+    elif args.server_name:
+        image = image or inspect_container(args.server_name, "{{.Config.Image}}")
+        label = args.server_name
+        if not image:
+            print(f"Server '{args.server_name}' does not exist")
+            return
+
+    server = TrialServer(
+        image, xmx, xms, args.cpus, args.memory,
+        properties={**properties, "online-mode": "false", "allow-flight": "true", "enforce-secure-profile": "false",
+                    "max-players": args.max_bots + 10},
+        env={"JVM_OPTS": f"-Xlog:gc:file={GC_LOG}"},
+        # Bukkit-based servers throttle repeated logins from one address
+        files={"bukkit.yml": "settings:\n  connection-throttle: -1\n"},
+        prefix="mcsm-loadtest-",
+    )
+    steps: List[LoadStep] = []
+    swarm = None
+    try:
+        if not server.start(args.max_bots + 10):
+            return
+        status = asyncio.run(query_status(server.host, SERVER_PORT))
+        protocol = (status or {}).get("version", {}).get("protocol")
+        if protocol != PROTOCOL_VERSION:
+            print(f"The bots speak protocol {PROTOCOL_VERSION} (Minecraft 1.21/1.21.1); the server uses {protocol}")
+            return
+
+        swarm = Swarm(server.host, SERVER_PORT, args.bot_speed)
+        gc_log = GcLog(server.name)
+        while len(swarm.bots) < args.max_bots:
+            count = min(args.bots_per_step, args.max_bots - len(swarm.bots))
+            print(f"\nStep: {len(swarm.bots) + count} bot(s)...")
+            swarm.add(count)
+            step = measure_step(server, swarm, gc_log, args.step_duration)
+            if step is None:
+                break
+            steps.append(step)
+            print(f"  {step.bots} connected: {step.mspt:.1f} ms/tick ({step.tps:.1f} TPS), CPU {step.cpu_percent:.0f}%, "
+                  f"{step.gc_pauses} GC pause(s), {step.chunks_per_second:.0f} chunks/s")
+            if step.tps < args.min_tps:
+                print(f"  TPS fell below {args.min_tps}")
+                break
+            if step.bots < len(swarm.bots) // 2:
+                print("  Most bots were disconnected")
+                break
+    except RconError as e:
+        print(f"Lost the trial server: {e}")
+    finally:
+        if swarm:
+            for error, count in swarm.errors().items():
+                print(f"{count} bot(s): {error}")
+            swarm.stop()
+        server.remove()
+
+    if not steps:
+        return
+    passing = [step for step in steps if step.tps >= args.min_tps]
+    capacity = max((step.bots for step in passing), default=0)
+    heap = suggest_heap(passing or steps)
+    print_report(label, steps, capacity, heap, args.min_tps)
+
+    report_path = get_cache_path("loadtest", f"{re.sub(r'[^A-Za-z0-9_.-]', '_', label)}.json")
+    with open(report_path, "w") as f:
+        json.dump({
+            "label": label, "image": image, "xmx": xmx, "xms": xms, "cpus": args.cpus, "memory": args.memory,
+            "min_tps": args.min_tps, "capacity": capacity, "suggested_heap": heap,
+            "tested": time.strftime("%Y-%m-%dT%H:%M:%S"), "steps": [asdict(step) for step in steps],
+        }, f, indent=2)
+    print(f"Report saved to {report_path}")
@@ -0,0 +1,528 @@
+import gzip
+import os
+import re
+import shlex
+import sqlite3
+import subprocess
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from cache import get_cache_path
+from docker_manager import HELPER_IMAGE
+from jar_scanner import VERSIONED_JAR_NAME
+
+# Java server images built by 'create' (Bedrock servers have no Java logs or crash reports)
+SERVER_IMAGE = re.compile(r"^minecraft-(vanilla|plugins|mods)-server:")
+
+# Lists the log files and crash reports of a server as '<inode> <size> <mtime> <path>' lines
+LIST_FILES_SCRIPT = ('for f in /app/logs/latest.log /app/logs/*.log.gz /app/crash-reports/*.txt; do '
+                     '[ -f "$f" ] && stat -c "%i %s %Y %n" "$f"; done; true')
+
+# Most bytes read from a file per docker call
+READ_CHUNK = 8 * 1024 * 1024
+
+# Servers read at the same time
+INDEX_WORKERS = 8
+
+# Characters of a log line or crash description stored with an event
+MAX_MESSAGE = 300
+
+# Seconds a time of day may go backwards before a log is taken to have passed midnight
+CLOCK_SLACK = 300
+
+# '[12:34:56] [Server thread/ERROR]: ...' (vanilla, Paper, Fabric) or
+# '[19Oct2026 12:34:56.789] [Server thread/ERROR] [logger/]: ...' (Forge, NeoForge)
+LOG_RECORD = re.compile(
+    r"^\[(?:(?P<date>\d{1,2}[A-Za-z]{3}\d{4}) )?(?P<time>\d{2}):(?P<minute>\d{2}):(?P<second>\d{2})(?:\.\d+)?(?: (?P<level>[A-Z]+))?\]"
+    r"(?: \[[^\]]*/(?P<thread_level>[A-Z]+)\])?"
+)
+# Logger name and separator between a record's level and its message
+MESSAGE_PREFIX = re.compile(r"^(?: \[[^\]]*\])*:?\s*")
+STACK_FRAME = re.compile(r"^\s+at ")
+
+# Fully qualified exception class names, e.g. 'java.lang.NullPointerException'
+EXCEPTION = re.compile(r"(?<![\w.$])((?:[a-z_$][\w$]*\.)+[A-Z][\w$]*(?:Exception|Error|Throwable))(?=[:\s]|$)")
+
+# Mods (or plugins) named by stack frames: the jar in '~[sodium-0.5.8.jar%23123!/:?]', or the module in 'at TRANSFORMER/sodium@0.5.8/...'
+FRAME_JAR = re.compile(r"^\s+at .*?~?\[([^\[\]\s%!:/]+)\.jar")
+FRAME_MODULE = re.compile(r"^\s+at (?:[A-Z-]+/)?([a-z][a-z0-9_]*)@[\w.+-]+/")
+# Loader suffix of jar names such as 'sodium-fabric'
+JAR_LOADER_SUFFIX = re.compile(r"[-_](fabric|forge|neoforge|quilt|bukkit|spigot|paper)$")
+
+# Crash report lines naming mods: Forge/NeoForge loading issues and Fabric/NeoForge suspects
+MOD_LOADING_ISSUE = re.compile(r"^-- Mod loading issue for: (\S+) --")
+SUSPECTED_MODS = re.compile(r"^Suspected Mods?:", re.IGNORECASE)
+MOD_ID_IN_PARENS = re.compile(r"\(([a-z][a-z0-9_-]*)\)")
+
+# Jars of the game, loaders and their libraries; frames in them do not point at a mod
+NOT_A_MOD = re.compile(
+    r"^(server|minecraft|client|forge|neoforge|fml\w*|javafmllanguage|lowcodelanguage|mclanguage|fabric-loader|"
+    r"securejarhandler|bootstraplauncher|modlauncher|eventbus|(sponge-)?mixin\w*|paper\w*|purpur\w*|spigot\w*|bukkit\w*|"
+    r"netty[\w-]*|datafixerupper|brigadier|authlib|guava|gson|log4j[\w-]*|slf4j[\w-]*|fastutil|jopt-simple|commons-[\w-]*|java)$"
+)
+
+# 'crash-2026-10-19_12.34.56-server.txt'
+CRASH_REPORT_NAME = re.compile(r"crash-(\d{4}-\d{2}-\d{2}_\d{2}\.\d{2}\.\d{2})")
+ROTATED_LOG_NAME = re.compile(r"(\d{4}-\d{2}-\d{2})-(\d+)\.log\.gz$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    server TEXT NOT NULL, path TEXT NOT NULL, inode INTEGER NOT NULL, offset INTEGER NOT NULL,
+    PRIMARY KEY (server, path)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY, server TEXT NOT NULL, time INTEGER NOT NULL, kind TEXT NOT NULL,
+    path TEXT NOT NULL, offset INTEGER NOT NULL, exception TEXT, mods TEXT NOT NULL, message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_time ON events (time);
+CREATE INDEX IF NOT EXISTS events_server_time ON events (server, time);
+-- Inverted index: 'exception:<name>' and 'mod:<id>' terms -> events
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT NOT NULL, event INTEGER NOT NULL,
+    PRIMARY KEY (term, event)
+) WITHOUT ROWID;
+"""
+
+
+@dataclass(slots=True)
+class LogEvent:
+    """An error, a logged stack trace, or a crash report."""
+    time: int
+    kind: str
+    path: str
+    offset: int
+    message: str
+    exceptions: List[str] = field(default_factory=list)
+    mods: List[str] = field(default_factory=list)
+
+    @property
+    def exception(self) -> Optional[str]:
+        """The root cause: the last exception of the chain."""
+        return self.exceptions[-1] if self.exceptions else None
+
+
+def open_index(path: Optional[str] = None) -> sqlite3.Connection:
+    """Open (and create) the log index database."""
+    db = sqlite3.connect(path or get_cache_path("log-index.sqlite3"))
+    db.executescript(SCHEMA)
+    return db
+
+
+def _unique(items: List[str]) -> List[str]:
+    return list(dict.fromkeys(items))
+
+
+def find_exceptions(lines: List[str]) -> List[str]:
+    """Exception class names in lines of a log record or crash report, in order of appearance."""
+    return _unique([name for line in lines if not STACK_FRAME.match(line) for name in EXCEPTION.findall(line)])
+
+
+def find_mods(lines: List[str]) -> List[str]:
+    """Ids of the mods (or plugins) whose code appears in the stack frames or mod hints of some lines."""
+    mods = []
+    suspects = False
+    for line in lines:
+        frame_jar = FRAME_JAR.match(line)
+        if frame_jar:
+            versioned = VERSIONED_JAR_NAME.match(frame_jar.group(1) + ".jar")
+            artifact = (versioned.group("artifact") if versioned else frame_jar.group(1)).lower()
+            mods.append(JAR_LOADER_SUFFIX.sub("", artifact))
+            continue
+        frame_module = FRAME_MODULE.match(line)
+        if frame_module:
+            mods.append(frame_module.group(1))
+            continue
+        issue = MOD_LOADING_ISSUE.match(line)
+        if issue:
+            mods.append(issue.group(1).lower())
+        if SUSPECTED_MODS.match(line):
+            suspects = True
+        elif suspects and not line.strip():
+            suspects = False
+        if suspects:
+            mods += MOD_ID_IN_PARENS.findall(line)
+    return [mod for mod in _unique(mods) if not NOT_A_MOD.match(mod)]
+
+
+def _to_epoch(day: date, seconds: int) -> int:
+    return int(datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp()) + seconds
+
+
+def _assign_times(stamps: List[Tuple[Optional[date], int]], anchor: datetime, forward: bool) -> List[int]:
+    """
+    Turn record times into timestamps.
+
+    Vanilla-style logs only have the time of day. Walking from a known point
+    (the start date of a rotated log, or the last write of latest.log), a time
+    going the wrong way means midnight passed.
+
+    Args:
+        stamps: (date if the record has one, seconds into the day) of each record
+        anchor: Time of the first record (forward) or after the last one (backward), in UTC
+        forward: Direction to walk in
+
+    Returns:
+        Unix timestamp of each record
+    """
+    times = [0] * len(stamps)
+    day = anchor.date()
+    previous = 0 if forward else anchor.hour * 3600 + anchor.minute * 60 + anchor.second
+    for i in (range(len(stamps)) if forward else reversed(range(len(stamps)))):
+        record_day, seconds = stamps[i]
+        if record_day:
+            day = record_day
+        elif forward and seconds < previous - CLOCK_SLACK:
+            day += timedelta(days=1)
+        elif not forward and seconds > previous + CLOCK_SLACK:
+            day -= timedelta(days=1)
+        previous = seconds
+        times[i] = _to_epoch(day, seconds)
+    return times
+
+
+def parse_log(data: bytes, path: str, base_offset: int, anchor: datetime,
+              forward: bool, complete: bool) -> Tuple[List[LogEvent], int]:
+    """
+    Find the events in a piece of a server log.
+
+    Errors and records with a stack trace become events; other records are
+    skipped. Unless the piece is complete, the last record is left for the
+    next read, since more lines of its stack trace may follow.
+
+    Args:
+        data: Bytes of the log
+        path: Path of the log in the container
+        base_offset: Offset of the bytes in the file
+        anchor: See _assign_times
+        forward: See _assign_times
+        complete: The piece ends the file for good (a rotated log)
+
+    Returns:
+        Tuple of (events, bytes consumed)
+    """
+    records = []  # (offset, level, stamp, lines)
+    position = 0
+    end = len(data) if complete else data.rfind(b"\n") + 1
+    for raw_line in data[:end].splitlines(keepends=True):
+        line = raw_line.decode("utf-8", "replace").rstrip("\r\n")
+        record = LOG_RECORD.match(line)
+        if record:
+            record_day = datetime.strptime(record.group("date"), "%d%b%Y").date() if record.group("date") else None
+            seconds = int(record.group("time")) * 3600 + int(record.group("minute")) * 60 + int(record.group("second"))
+            level = record.group("thread_level") or record.group("level") or "INFO"
+            message = MESSAGE_PREFIX.sub("", line[record.end():], count=1)
+            records.append((position, level, (record_day, seconds), [message]))
+        elif records:
+            records[-1][3].append(line)
+        position += len(raw_line)
+
+    consumed = end
+    if not complete and records:
+        if records[-1][0] > 0:
+            consumed = records[-1][0]
+            records.pop()
+        elif len(data) < READ_CHUNK:
+            # A lone record whose stack trace may continue: wait for more lines
+            return [], 0
+
+    times = _assign_times([record[2] for record in records], anchor, forward)
+    events = []
+    for (offset, level, _, lines), record_time in zip(records, times):
+        has_trace = any(STACK_FRAME.match(line) for line in lines[1:])
+        if level not in ("ERROR", "FATAL") and not has_trace:
+            continue
+        events.append(LogEvent(
+            record_time, "error" if level in ("ERROR", "FATAL") else "warn", path, base_offset + offset,
+            lines[0][:MAX_MESSAGE], find_exceptions(lines), find_mods(lines)
+        ))
+    return events, consumed
+
+
+def parse_crash_report(text: str, path: str, mtime: int) -> LogEvent:
+    """Turn a crash report into an event, timed by its file name (or its modification time)."""
+    name = CRASH_REPORT_NAME.search(os.path.basename(path))
+    if name:
+        crash_time = int(datetime.strptime(name.group(1), "%Y-%m-%d_%H.%M.%S").replace(tzinfo=timezone.utc).timestamp())
+    else:
+        crash_time = mtime
+    # The system details that follow list every installed mod; only the crash itself points at one
+    lines = text.split("-- System Details --", 1)[0].splitlines()
+    description = next((line.split(":", 1)[1].strip() for line in lines if line.startswith("Description:")), "")
+    return LogEvent(crash_time, "crash", path, 0, description[:MAX_MESSAGE], find_exceptions(lines), find_mods(lines))
+
+
+@dataclass(slots=True)
+class LogSource:
+    """A server container whose logs are read, with 'docker exec' while it runs or a helper container otherwise."""
+    server: str
+    running: bool
+    endpoint: Optional[str] = None
+
+    def run(self, script: str) -> Optional[bytes]:
+        if self.running:
+            command = ["docker", "exec", self.server, "sh", "-c", script]
+        else:
+            # The helper sees the server's volumes at their usual mount points
+            command = ["docker", "run", "--rm", "--volumes-from", f"{self.server}:ro", HELPER_IMAGE, "sh", "-c", script]
+        env = {**os.environ, "DOCKER_HOST": self.endpoint} if self.endpoint else None
+        result = subprocess.run(command, capture_output=True, env=env)
+        return result.stdout if result.returncode == 0 else None
+
+    def read(self, path: str, offset: int, length: int) -> Optional[bytes]:
+        return self.run(f"tail -c +{offset + 1} {shlex.quote(path)} | head -c {length}")
+
+
+def list_servers(endpoint: Optional[str] = None) -> List[LogSource]:
+    """List the Java server containers of a Docker host."""
+    env = {**os.environ, "DOCKER_HOST": endpoint} if endpoint else None
+    result = subprocess.run(["docker", "ps", "-a", "--format", "{{.Names}}\t{{.Image}}\t{{.State}}"],
+                            capture_output=True, text=True, env=env)
+    sources = []
+    for line in result.stdout.splitlines():
+        name, image, state = (line.split("\t") + ["", ""])[:3]
+        if SERVER_IMAGE.match(image):
+            sources.append(LogSource(name, state == "running", endpoint))
+    return sources
+
+
+def _rotated_order(path: str) -> Tuple[str, int]:
+    rotated = ROTATED_LOG_NAME.search(path)
+    return (rotated.group(1), int(rotated.group(2))) if rotated else ("", 0)
+
+
+def collect_events(source: LogSource, known: Dict[str, Tuple[int, int]]) -> Tuple[List[LogEvent], Dict[str, Tuple[int, int]], int]:
+    """
+    Read what is new in a server's logs and crash reports.
+
+    latest.log is read from where the last run stopped. When the server has
+    rotated it since, the rotated copy (the oldest new .log.gz) is read from
+    the same offset, so nothing is indexed twice. Other rotated logs and crash
+    reports are read once, whole.
+
+    Args:
+        source: Server to read
+        known: Path -> (inode, offset) of the files read before
+
+    Returns:
+        Tuple of (events, path -> (inode, offset) of the files read, bytes read)
+    """
+    listing = source.run(LIST_FILES_SCRIPT)
+    if listing is None:
+        print(f"Could not list the logs of '{source.server}'")
+        return [], {}, 0
+
+    files = []
+    for line in listing.decode("utf-8", "replace").splitlines():
+        inode, size, mtime, path = line.split(" ", 3)
+        files.append((path, int(inode), int(size), int(mtime)))
+
+    events: List[LogEvent] = []
+    progress: Dict[str, Tuple[int, int]] = {}
+    read_bytes = 0
+    carried_offset = 0
+    for path, inode, size, mtime in files:
+        if path.endswith("/latest.log"):
+            inode_offset = known.get(path)
+            offset = inode_offset[1] if inode_offset else 0
+            if inode_offset and (inode_offset[0] != inode or size < offset):
+                carried_offset, offset = offset, 0
+            anchor = datetime.fromtimestamp(mtime, timezone.utc)
+            while offset < size:
+                data = source.read(path, offset, min(READ_CHUNK, size - offset))
+                if not data:
+                    break
+                read_bytes += len(data)
+                new_events, consumed = parse_log(data, path, offset, anchor, forward=False, complete=False)
+                events += new_events
+                if consumed == 0:
+                    break
+                offset += consumed
+            progress[path] = (inode, offset)
+
+    new_rotated = sorted((f for f in files if f[0].endswith(".log.gz") and f[0] not in known), key=lambda f: _rotated_order(f[0]))
+    for i, (path, inode, size, mtime) in enumerate(new_rotated):
+        data = source.read(path, 0, size)
+        if data is None:
+            continue
+        read_bytes += len(data)
+        try:
+            text = gzip.decompress(data)
+        except (OSError, EOFError, zlib.error):
+            print(f"Could not decompress {path} of '{source.server}'")
+            continue
+        # Only the oldest new rotated log can be the latest.log read before
+        skip = carried_offset if i == 0 else 0
+        rotated = ROTATED_LOG_NAME.search(path)
+        anchor = datetime.strptime(rotated.group(1), "%Y-%m-%d").replace(tzinfo=timezone.utc) if rotated else datetime.fromtimestamp(mtime, timezone.utc)
+        events += parse_log(text[skip:], path, skip, anchor, forward=True, complete=True)[0]
+        progress[path] = (inode, len(text))
+
+    for path, inode, size, mtime in files:
+        if path.endswith(".txt") and path not in known:
+            data = source.read(path, 0, size)
+            if data is None:
+                continue
+            read_bytes += len(data)
+            events.append(parse_crash_report(data.decode("utf-8", "replace"), path, mtime))
+            progress[path] = (inode, size)
+
+    return events, progress, read_bytes
+
+
+def store_events(db: sqlite3.Connection, server: str, events: List[LogEvent]) -> None:
+    """Add events to the index, with their exception and mod terms."""
+    for event in events:
+        cursor = db.execute(
+            "INSERT INTO events (server, time, kind, path, offset, exception, mods, message) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (server, event.time, event.kind, event.path, event.offset, event.exception, " ".join(event.mods), event.message)
+        )
+        terms = {f"mod:{mod}" for mod in event.mods}
+        for exception in event.exceptions:
+            terms.update((f"exception:{exception}", f"exception:{exception.rsplit('.', 1)[-1]}"))
+        db.executemany("INSERT INTO terms (term, event) VALUES (?, ?)", [(term, cursor.lastrowid) for term in terms])
+
+
+def index_logs(sources: List[LogSource], db: Optional[sqlite3.Connection] = None) -> int:
+    """
+    Bring the index up to date with the logs of some servers, reading several servers at a time.
+
+    Returns:
+        Number of events added
+    """
+    db = db or open_index()
+    known: Dict[str, Dict[str, Tuple[int, int]]] = {}
+    for server, path, inode, offset in db.execute("SELECT server, path, inode, offset FROM files"):
+        known.setdefault(server, {})[path] = (inode, offset)
+
+    added = 0
+    read_bytes = 0
+    with ThreadPoolExecutor(max_workers=INDEX_WORKERS) as executor:
+        results = executor.map(lambda source: collect_events(source, known.get(source.server, {})), sources)
+        for source, (events, progress, source_bytes) in zip(sources, results):
+            # The events and the offsets they were read up to are committed together, so nothing is indexed twice
+            with db:
+                store_events(db, source.server, events)
+                db.executemany("INSERT OR REPLACE INTO files (server, path, inode, offset) VALUES (?, ?, ?, ?)",
+                               [(source.server, path, inode, offset) for path, (inode, offset) in progress.items()])
+            added += len(events)
+            read_bytes += source_bytes
+
+    print(f"Indexed {added} new event(s) from {len(sources)} server(s), {read_bytes / (1024 * 1024):.1f} MiB read")
+    return added
+
+
+def parse_time(value: str) -> Optional[int]:
+    """
+    Parse a time filter: an age such as '30m', '6h' or '7d', or a date and time such as '2026-10-19 14:00' (UTC).
+
+    Returns:
+        Unix timestamp, or None if invalid
+    """
+    age = re.fullmatch(r"(\d+)([smhd])", value.strip())
+    if age:
+        return int(time.time()) - int(age.group(1)) * {"s": 1, "m": 60, "h": 3600, "d": 86400}[age.group(2)]
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    return int((parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)).timestamp())
+
+
+def search_events(db: sqlite3.Connection, server: Optional[str] = None, since: Optional[int] = None,
+                  until: Optional[int] = None, exception: Optional[str] = None, mod: Optional[str] = None,
+                  kind: Optional[str] = None, text: Optional[str] = None,
+                  limit: int = 20) -> Tuple[int, List[tuple], Dict[str, List[tuple]]]:
+    """
+    Query the index.
+
+    Args:
+        server: Only this server
+        since, until: Only events in this time range (Unix timestamps)
+        exception: Only events with this exception anywhere in the chain (full or simple class name)
+        mod: Only events pointing at this mod or plugin id
+        kind: Only 'crash', 'error' or 'warn' events
+        text: Only events whose message contains this text
+        limit: Most recent events returned
+
+    Returns:
+        Tuple of (match count, most recent events as (time, server, kind, exception, mods, message, path) rows,
+        counts by 'server', 'exception' and 'mod and server')
+    """
+    conditions, params = [], []
+    for column, operator, value in (("server", "=", server), ("time", ">=", since), ("time", "<", until), ("kind", "=", kind)):
+        if value is not None:
+            conditions.append(f"{column} {operator} ?")
+            params.append(value)
+    if text:
+        conditions.append("message LIKE ?")
+        params.append(f"%{text}%")
+    for term in ([f"exception:{exception}"] if exception else []) + ([f"mod:{mod.lower()}"] if mod else []):
+        conditions.append("id IN (SELECT event FROM terms WHERE term = ?)")
+        params.append(term)
+    matches = "WITH matches AS (SELECT * FROM events" + (" WHERE " + " AND ".join(conditions) if conditions else "") + ") "
+
+    count = db.execute(matches + "SELECT COUNT(*) FROM matches", params).fetchone()[0]
+    latest = db.execute(matches + "SELECT time, server, kind, exception, mods, message, path FROM matches "
+                        "ORDER BY time DESC LIMIT ?", params + [limit]).fetchall()
+    counts = {
+        "server": db.execute(matches + "SELECT server, COUNT(*) FROM matches GROUP BY server ORDER BY 2 DESC LIMIT 10", params).fetchall(),
+        "exception": db.execute(matches + "SELECT exception, COUNT(*) FROM matches WHERE exception IS NOT NULL "
+                                "GROUP BY exception ORDER BY 2 DESC LIMIT 10", params).fetchall(),
+        "mod and server": db.execute(
+            matches + "SELECT substr(terms.term, 5), matches.server, COUNT(*) FROM terms JOIN matches ON matches.id = terms.event "
+            "WHERE terms.term >= 'mod:' AND terms.term < 'mod;' GROUP BY 1, 2 ORDER BY 3 DESC LIMIT 10", params
+        ).fetchall(),
+    }
+    return count, latest, counts
+
+
+def print_search(count: int, latest: List[tuple], counts: Dict[str, List[tuple]], elapsed: float) -> None:
+    print(f"{count} matching event(s) ({elapsed * 1000:.0f} ms)")
+    if not count:
+        return
+    for title, rows in counts.items():
+        if rows:
+            print(f"\nBy {title}:")
+            for row in rows:
+                print(f"  {row[-1]:>6}  {'  '.join(str(value) for value in row[:-1])}")
+    print(f"\nMost recent {len(latest)}:")
+    for event_time, server, kind, exception, mods, message, path in latest:
+        stamp = datetime.fromtimestamp(event_time, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        print(f"{stamp}  {server}  {kind}  {exception or '-'}" + (f"  [{mods}]" if mods else ""))
+        print(f"    {message}" if kind != "crash" else f"    {message} ({path})")
+
+
+def manage_logs(args) -> None:
+    """Entry point for the 'logs' command."""
+    db = open_index()
+
+    if args.subcommand == "index":
+        endpoints = [None]
+        if args.host:
+            from fleet import load_hosts
+            hosts = load_hosts()
+            if args.host != "all" and args.host not in hosts:
+                print(f"Unknown host: {args.host}")
+                return
+            endpoints = [host["endpoint"] for name, host in hosts.items() if args.host in ("all", name)]
+        sources = [source for endpoint in endpoints for source in list_servers(endpoint)
+                   if not args.server_name or source.server == args.server_name]
+        if not sources:
+            print("No Java server containers to index")
+            return
+        index_logs(sources, db)
+
+    elif args.subcommand == "search":
+        since = parse_time(args.since) if args.since else None
+        until = parse_time(args.until) if args.until else None
+        if (args.since and since is None) or (args.until and until is None):
+            print("--since and --until take an age (e.g., 6h, 7d) or a date and time (e.g., 2026-10-19 14:00)")
+            return
+        started = time.perf_counter()
+        count, latest, counts = search_events(db, args.server_name, since, until, args.exception, args.mod_id,
+                                              args.kind, args.grep, args.limit)
+        print_search(count, latest, counts, time.perf_counter() - started)
@@ -1,12 +1,133 @@
 import os
 import shutil
-import subprocess
+import sys
+from build_context import BuildContext
 from cli import parse_args
-from downloader import download_file, get_vanilla_download_url
+from docker_manager import SERVER_STOP_TIMEOUT, build_image, get_java_build_args, run_container
+from downloader import get_java_version, get_vanilla_server_jar
+import utils
 from utils import confirm_action, get_operating_system
 
-def main():
-    args = parse_args()
+def get_java_image_args(args):
+    """Select the image's Java runtime from the version's javaVersion (or --java-version)."""
+    java_version = args.java_version or get_java_version(args.server_version)
+    return get_java_build_args(java_version, args.java_runtime)
+
+def get_data_layout(args, server_name):
+    """
+    Volumes, environment and extra 'docker run' arguments for the --data-layout of a Java server.
+
+    The 'split' layout leaves the server files in the image layer (read from
+    the image on start instead of a volume) and mounts only the world and
+    logs, so region file writes do not compete with anything else.
+
+    Returns:
+        Tuple of (volumes, env, extra_args)
+    """
+    if args.data_layout == "volume":
+        return {f"{server_name}-data": "/app"}, {}, []
+
+    volumes = {f"{server_name}-logs": "/app/logs"}
+    env = {"WORLD_DIR": "/worlds"}
+    extra_args = []
+    if args.world_tmpfs:
+        # The entrypoint copies the world into RAM and syncs it back
+        volumes[f"{server_name}-world"] = "/worlds-disk"
+        env["WORLD_SYNC_INTERVAL"] = str(args.world_sync_interval)
+        extra_args += ["--tmpfs", f"/worlds:size={args.world_tmpfs}"]
+    else:
+        volumes[f"{server_name}-world"] = "/worlds"
+    return volumes, env, extra_args
+
+def get_build_context_dir():
+    """Folder the build context is assembled in (MCSM_BUILD_CONTEXT gives parallel creates their own)."""
+    return os.environ.get("MCSM_BUILD_CONTEXT") or os.path.join(os.getcwd(), "docker_build_context")
+
+def run_java_container(args, server_name, image_name, env, volumes, run_args):
+    """Run a Java server container, limited by its --resource-profile."""
+    if args.resource_profile == "none":
+        return run_container(server_name, image_name, ports=[f"{args.port}:25565"], env=env, volumes=volumes, extra_args=run_args)
+
+    from resources import allocate_resources, rebalance_shared_servers
+    # The allocation lock is held until the container exists, so concurrent creates see each other's resources
+    with allocate_resources(server_name, args.resource_profile, args.cpus, args.memory, args.xmx, args.world_tmpfs) as allocation:
+        if allocation is None:
+            return False
+        print(f"Resources: {allocation.memory // (1024 * 1024)} MiB memory, "
+              + (f"cores {','.join(map(str, allocation.cores))}" if args.resource_profile == "dedicated" else f"{allocation.cpus:g} shared CPU(s)"))
+        if not run_container(server_name, image_name, ports=[f"{args.port}:25565"], env=env, volumes=volumes,
+                             extra_args=run_args + allocation.docker_args()):
+            return False
+    if args.resource_profile == "dedicated":
+        rebalance_shared_servers()
+    return True
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.yes:
+        utils.ASSUME_YES = True
+    
+    if args.command == "hibernate":
+        from hibernation import hibernate
+        hibernate(args)
+        return
+    if args.command == "pool":
+        from pool import manage_pool
+        manage_pool(args)
+        return
+    if args.command == "mirror":
+        from mirror import sync_mirror
+        sync_mirror(args)
+        return
+    if args.mirror:
+        from http_client import configure_mirror
+        configure_mirror(args.mirror)
+    if args.command == "daemon":
+        from daemon import run_daemon
+        run_daemon(args)
+        return
+    
+    if args.command == "update-mods":
+        from mod_updates import update_mods
+        update_mods(args)
+        return
+    if args.command == "check-updates":
+        from update_check import check_updates
+        check_updates(args)
+        return
+    if args.command == "scan-jars":
+        from jar_scanner import scan_jars_command
+        scan_jars_command(args)
+        return
+    if args.command == "autotune":
+        from autotune import autotune
+        autotune(args)
+        return
+    if args.command == "loadtest":
+        from loadtest import load_test
+        load_test(args)
+        return
+    if args.command == "fleet":
+        from fleet import manage_fleet
+        manage_fleet(args)
+        return
+    if args.command == "logs":
+        from log_index import manage_logs
+        manage_logs(args)
+        return
+    if args.command == "gc-report":
+        from gc_telemetry import gc_report
+        gc_report(args)
+        return
+    if args.command == "create" and args.host:
+        # Placed by the scheduler, which runs this create against the chosen host
+        from fleet import schedule
+        schedule([sys.argv[1:] if argv is None else argv], None if args.host == "auto" else args.host)
+        return
+    if args.command == "backup":
+        from backup import backup
+        backup(args)
+        return
     
     operating_system = get_operating_system()
     
@@ -16,70 +137,144 @@ def main():
     print(f"Server Version: {args.server_version}")
     
     server_name = args.server_name if args.server_name else f"mc-server-{args.server_version}"
-    server_data_volume = f"{server_name}-data"
+    volumes, layout_env, layout_args = get_data_layout(args, server_name)
+    server_data_volume = ", ".join(volumes)
+    java_env = {"EULA": "TRUE", "XMX": args.xmx, "XMS": args.xms, **layout_env}  # Accept EULA inside the container
+    if args.jvm_opts:
+        java_env["JVM_OPTS"] = args.jvm_opts
+    # Leave the entrypoint time for a clean 'stop' (and world sync) before Docker kills the server
+    java_run_args = ["--stop-timeout", str(SERVER_STOP_TIMEOUT)] + layout_args
     image_name = f"minecraft-{args.server_type}-server:{args.server_version}"
+    
+    if args.resource_profile != "none":
+        # Check the host has room before spending time on the build; the resources are allocated when the container is created
+        from resources import allocate_resources
+        with allocate_resources(server_name, args.resource_profile, args.cpus, args.memory, args.xmx, args.world_tmpfs) as allocation:
+            if allocation is None:
+                return
 
     if args.server_type == "vanilla":
         if not confirm_action(f"Do you want to download the vanilla Minecraft server version {args.server_version} and set it up with Docker?"):
             return
 
+        # 1. Get server JAR (downloaded once into the artifact cache)
+        server_jar_path = get_vanilla_server_jar(args.server_version)
+        if not server_jar_path:
+            print("Failed to download server JAR.")
+            return
+
+        # 2. Assemble build context from references to the JAR, Dockerfile and entrypoint.sh
+        build_context = BuildContext()
+        build_context.add_file(server_jar_path, "server.jar")
+        build_context.add_file(os.path.join(os.getcwd(), "Dockerfile"), "Dockerfile")
+        build_context.add_file(os.path.join(os.getcwd(), "entrypoint.sh"), "entrypoint.sh")
+        build_context.add_file(os.path.join(os.getcwd(), "entrypoint-common.sh"), "entrypoint-common.sh")
+
+        # 3. Build Docker Image
+        if not build_image(image_name, build_context, get_java_image_args(args)):
+            return
+
+        # 4. Run Docker Container
+        if run_java_container(args, server_name, image_name, java_env, volumes, java_run_args):
+            print(f"Minecraft server container '{server_name}' started successfully!")
+            print(f"Server data is persisted in Docker volume(s): '{server_data_volume}'")
+    elif args.server_type == "plugins":
+        server_software = args.server_software
+        image_name = f"minecraft-{server_software}-server:{args.server_version}"
+        
+        if not confirm_action(f"Do you want to set up a {server_software.capitalize()} Minecraft server version {args.server_version} with Docker?"):
+            return
+        
         # 1. Prepare build context
-        build_context_dir = os.path.join(os.getcwd(), "docker_build_context")
+        build_context_dir = get_build_context_dir()
         os.makedirs(build_context_dir, exist_ok=True)
-
+        
         try:
-            # 2. Download server JAR
-            download_url = get_vanilla_download_url(args.server_version)
-            if not download_url:
-                print("Failed to get vanilla server download URL.")
-                return
-
-            server_jar_path_in_context = os.path.join(build_context_dir, "server.jar")
-            if not download_file(download_url, server_jar_path_in_context):
-                print("Failed to download server JAR.")
+            # 2. Get server JAR (cached per build number)
+            from plugin_servers import get_plugin_server_jar
+            
+            server_jar_path = get_plugin_server_jar(server_software, args.server_version)
+            if not server_jar_path:
+                print(f"Failed to install {server_software.capitalize()} server")
                 return
-
-            # 3. Copy Dockerfile and entrypoint.sh to build context
-            shutil.copy(os.path.join(os.getcwd(), "Dockerfile"), build_context_dir)
-            shutil.copy(os.path.join(os.getcwd(), "entrypoint.sh"), build_context_dir)
-
-            # 4. Build Docker Image
-            print(f"Building Docker image '{image_name}'...")
-            build_command = ["docker", "build", "-t", image_name, build_context_dir]
-            try:
-                subprocess.run(build_command, check=True)
-                print(f"Docker image '{image_name}' built successfully.")
-            except subprocess.CalledProcessError as e:
-                print(f"Failed to build Docker image: {e}")
+            
+            # 3. Download plugins if config provided
+            if args.plugin_config:
+                from plugin_config import load_plugin_config
+                from downloader import download_plugins_from_config
+                
+                print(f"\nLoading plugin configuration from {args.plugin_config}...")
+                plugin_config = load_plugin_config(args.plugin_config)
+                
+                if not plugin_config:
+                    print("Failed to load plugin configuration")
+                    return
+                
+                if plugin_config.minecraft_version != args.server_version:
+                    print(f"Warning: Plugin config specifies MC version '{plugin_config.minecraft_version}' but --server-version is '{args.server_version}'")
+                    if not confirm_action("Continue anyway?"):
+                        return
+                
+                plugins_dir = os.path.join(build_context_dir, "plugins")
+                downloaded_plugins = download_plugins_from_config(plugin_config, plugins_dir)
+                
+                if not downloaded_plugins and plugin_config.plugins:
+                    print("Warning: No plugins were downloaded successfully")
+                    if not confirm_action("Continue with server setup anyway?"):
+                        return
+            else:
+                print("\nNo plugin configuration provided. Server will start with no plugins.")
+            
+            # 4. Assemble build context: server JAR, plugins, optimized Paper configs, Dockerfile and entrypoint
+            build_context = BuildContext()
+            build_context.add_file(server_jar_path, "server.jar")
+            build_context.add_tree(build_context_dir)
+            build_context.add_tree(os.path.join(os.getcwd(), "paper-config"))
+            build_context.add_file(os.path.join(os.getcwd(), "Dockerfile.plugins"), "Dockerfile")
+            build_context.add_file(os.path.join(os.getcwd(), "entrypoint.sh"), "entrypoint.sh")
+            build_context.add_file(os.path.join(os.getcwd(), "entrypoint-common.sh"), "entrypoint-common.sh")
+            
+            # 5. Build Docker Image
+            if not build_image(image_name, build_context, get_java_image_args(args)):
                 return
-
-            # 5. Run Docker Container
-            print(f"Running Docker container '{server_name}' from image '{image_name}'...")
-            run_command = [
-                "docker", "run", "-d",
-                "--name", server_name,
-                "-p", "25565:25565", # Default Minecraft port
-                "-e", "EULA=TRUE", # Accept EULA inside the container
-                "-e", f"XMX={args.xmx}",
-                "-e", f"XMS={args.xms}",
-                "-v", f"{server_data_volume}:/app", # Mount volume for persistent data
-                image_name
-            ]
-            try:
-                subprocess.run(run_command, check=True)
-                print(f"Minecraft server container '{server_name}' started successfully!")
-                print(f"Server data is persisted in Docker volume: '{server_data_volume}'")
-            except subprocess.CalledProcessError as e:
-                print(f"Failed to run Docker container: {e}")
-
+            
+            # 6. Run Docker Container
+            if run_java_container(args, server_name, image_name, java_env, volumes, java_run_args):
+                print(f"\n{'='*60}")
+                print(f"Minecraft {server_software.capitalize()} server container '{server_name}' started successfully!")
+                print(f"Server data is persisted in Docker volume(s): '{server_data_volume}'")
+                print(f"Server is running on port {args.port}")
+                print(f"{'='*60}")
+        
         finally:
-            # 6. Clean up build context
+            # 7. Clean up build context
             if os.path.exists(build_context_dir):
                 shutil.rmtree(build_context_dir)
-                print(f"Cleaned up temporary build context: {build_context_dir}")
-    elif args.server_type == "plugins":
-        print("Plugin server setup with Docker not implemented yet.")
+                print(f"\nCleaned up temporary build context: {build_context_dir}")
     elif args.server_type == "mods":
+        # Load modpack; it pins the mod loader, loader version and Minecraft version
+        modpack = None
+        if args.modpack:
+            from modpacks import load_modpack
+            
+            print(f"\nLoading modpack from {args.modpack}...")
+            modpack = load_modpack(args.modpack)
+            if not modpack:
+                print("Failed to load modpack")
+                return
+            
+            print(f"Modpack: {modpack.name} ({modpack.mod_loader} {modpack.loader_version}, MC {modpack.minecraft_version}, {len(modpack.files)} files)")
+            if not args.mod_loader:
+                args.mod_loader = modpack.mod_loader
+            elif args.mod_loader != modpack.mod_loader:
+                print(f"Error: Modpack uses '{modpack.mod_loader}' but --mod-loader is '{args.mod_loader}'")
+                return
+            
+            if modpack.minecraft_version != args.server_version:
+                print(f"Warning: Modpack specifies MC version '{modpack.minecraft_version}' but --server-version is '{args.server_version}'")
+                if not confirm_action("Continue anyway?"):
+                    return
+        
         # Validate mod loader is specified
         if not args.mod_loader:
             print("Error: --mod-loader is required when --server-type is 'mods'")
@@ -90,27 +285,86 @@ def main():
             return
         
         # 1. Prepare build context
-        build_context_dir = os.path.join(os.getcwd(), "docker_build_context")
+        build_context_dir = get_build_context_dir()
         os.makedirs(build_context_dir, exist_ok=True)
         
         try:
             # 2. Install mod loader
-            from mod_loaders import install_forge_server, install_fabric_server, install_neoforge_server, get_mod_loader_type
-            
-            print(f"\nInstalling {args.mod_loader.capitalize()} server...")
-            if args.mod_loader == "forge":
-                server_jar = install_forge_server(args.server_version, build_context_dir)
-            elif args.mod_loader == "neoforge":
-                server_jar = install_neoforge_server(args.server_version, build_context_dir)
-            else:  # fabric
-                server_jar = install_fabric_server(args.server_version, build_context_dir)
-            
-            if not server_jar:
-                print(f"Failed to install {args.mod_loader.capitalize()} server")
-                return
+            from mod_loaders import download_fabric_api
+            
+            build_args = get_java_image_args(args)
+            build_context = BuildContext()
+            libraries_dir = None
+            
+            if args.install_in_docker:
+                # Resolve the loader build now; the installer runs as a cached Docker build stage
+                from mod_loaders import get_loader_install_spec
+                
+                install_spec = get_loader_install_spec(args.mod_loader, args.server_version, modpack.loader_version if modpack else None)
+                if not install_spec:
+                    print(f"Failed to resolve {args.mod_loader.capitalize()} installer")
+                    return
+                
+                print(f"\n{args.mod_loader.capitalize()} build {install_spec['build']} will be installed inside Docker")
+                from mirror import get_build_source
+                
+                build_args.update({
+                    "LOADER": install_spec["loader"],
+                    "LOADER_BUILD": install_spec["build"],
+                    "INSTALLER_URL": get_build_source(install_spec["installer_url"], build_context, "loader-installer.jar"),
+                    "INSTALLER_ARGS": install_spec["installer_args"],
+                })
+            else:
+                # Installs are cached per loader build; large libraries go into the reusable base context
+                from mod_loaders import get_cached_loader_install
+                
+                print(f"\nInstalling {args.mod_loader.capitalize()} server...")
+                loader_dir = get_cached_loader_install(args.mod_loader, args.server_version, modpack.loader_version if modpack else None)
+                if not loader_dir:
+                    print(f"Failed to install {args.mod_loader.capitalize()} server")
+                    return
+                
+                libraries_dir = os.path.join(loader_dir, "libraries")
+                build_context.add_tree(loader_dir)
+                build_context.remove(".installed")
+                build_context.split_base(["libraries"])
             
-            # 3. Download mods if config provided
-            if args.mod_config:
+            # Modpacks pin their own Fabric API version
+            if args.mod_loader == "fabric" and not modpack:
+                download_fabric_api(args.server_version, os.path.join(build_context_dir, "mods"))
+            
+            # 3. Download modpack files or mods from config if provided
+            if modpack:
+                from modpacks import resolve_curseforge_files, get_modpack_download_jobs, extract_overrides
+                from downloader import download_files
+                
+                if any(f.curseforge_file_id for f in modpack.files):
+                    from mod_platforms import CurseForgeClient
+                    
+                    cf_api_key = args.curseforge_api_key or os.environ.get("CF_API_KEY")
+                    if not cf_api_key:
+                        print("Error: CurseForge modpacks require --curseforge-api-key or CF_API_KEY")
+                        return
+                    resolve_curseforge_files(modpack, CurseForgeClient(cf_api_key))
+                
+                jobs = get_modpack_download_jobs(modpack, build_context_dir)
+                print(f"\nDownloading {len(jobs)} modpack file(s)...")
+                downloaded_files = download_files(jobs)
+                
+                if len(downloaded_files) < len(modpack.files):
+                    print(f"Warning: {len(modpack.files) - len(downloaded_files)} modpack file(s) could not be downloaded")
+                    if not confirm_action("Continue with server setup anyway?"):
+                        return
+                
+                if not args.keep_client_mods:
+                    # CurseForge manifests do not mark client-only mods; check the jars themselves
+                    from mod_environment import remove_client_only_jars
+                    mods_dir = os.path.join(build_context_dir, "mods")
+                    remove_client_only_jars([p for p in downloaded_files if os.path.dirname(p) == mods_dir])
+                
+                extracted = extract_overrides(modpack, build_context_dir)
+                print(f"Extracted {extracted} override file(s)")
+            elif args.mod_config:
                 from mod_config import load_mod_config
                 from downloader import download_mods_from_config
                 
@@ -137,7 +391,7 @@ def main():
                 
                 # Download mods
                 mods_dir = os.path.join(build_context_dir, "mods")
-                downloaded_mods = download_mods_from_config(mod_config, mods_dir, cf_api_key)
+                downloaded_mods = download_mods_from_config(mod_config, mods_dir, cf_api_key, not args.keep_client_mods)
                 
                 if not downloaded_mods and mod_config.mods:
                     print("Warning: No mods were downloaded successfully")
@@ -147,62 +401,75 @@ def main():
                 print("\nNo mod configuration provided. Server will start with no additional mods.")
                 print("(Fabric API is already included for Fabric servers)")
             
-            # 4. Copy Dockerfile and entrypoint for modded servers
-            dockerfile_src = os.path.join(os.getcwd(), "Dockerfile.modded")
-            entrypoint_src = os.path.join(os.getcwd(), "entrypoint-modded.sh")
+            # Report duplicate classes and library conflicts before they surface as boot failures
+            from jar_scanner import print_scan_report, scan_server_files
+            print_scan_report(scan_server_files(os.path.join(build_context_dir, "mods"), libraries_dir))
             
-            # Check if modded versions exist, otherwise use vanilla versions
-            if os.path.exists(dockerfile_src):
-                shutil.copy(dockerfile_src, os.path.join(build_context_dir, "Dockerfile"))
+            # 4. Reference mods, Dockerfile and entrypoint for modded servers
+            if args.install_in_docker:
+                dockerfile_src = os.path.join(os.getcwd(), "Dockerfile.modded-installer")
             else:
-                shutil.copy(os.path.join(os.getcwd(), "Dockerfile"), build_context_dir)
+                dockerfile_src = os.path.join(os.getcwd(), "Dockerfile.modded")
             
-            if os.path.exists(entrypoint_src):
-                shutil.copy(entrypoint_src, os.path.join(build_context_dir, "entrypoint.sh"))
-            else:
-                shutil.copy(os.path.join(os.getcwd(), "entrypoint.sh"), build_context_dir)
+            build_context.add_tree(build_context_dir)
+            build_context.add_file(dockerfile_src, "Dockerfile")
+            build_context.add_file(os.path.join(os.getcwd(), "entrypoint-modded.sh"), "entrypoint.sh")
+            build_context.add_file(os.path.join(os.getcwd(), "entrypoint-common.sh"), "entrypoint-common.sh")
             
             # 5. Build Docker Image
-            print(f"\nBuilding Docker image '{image_name}'...")
-            build_command = ["docker", "build", "-t", image_name, build_context_dir]
-            try:
-                subprocess.run(build_command, check=True)
-                print(f"Docker image '{image_name}' built successfully.")
-            except subprocess.CalledProcessError as e:
-                print(f"Failed to build Docker image: {e}")
+            if not build_image(image_name, build_context, build_args, args.build_cache):
                 return
             
             # 6. Run Docker Container
-            print(f"\nRunning Docker container '{server_name}' from image '{image_name}'...")
-            run_command = [
-                "docker", "run", "-d",
-                "--name", server_name,
-                "-p", "25565:25565",  # Default Minecraft port
-                "-e", "EULA=TRUE",  # Accept EULA inside the container
-                "-e", f"XMX={args.xmx}",
-                "-e", f"XMS={args.xms}",
-                "-v", f"{server_data_volume}:/app",  # Mount volume for persistent data
-                image_name
-            ]
-            try:
-                subprocess.run(run_command, check=True)
+            if run_java_container(args, server_name, image_name, java_env, volumes, java_run_args):
                 print(f"\n{'='*60}")
                 print(f"Minecraft {args.mod_loader.capitalize()} server container '{server_name}' started successfully!")
-                print(f"Server data is persisted in Docker volume: '{server_data_volume}'")
-                print(f"Server is running on port 25565")
+                print(f"Server data is persisted in Docker volume(s): '{server_data_volume}'")
+                print(f"Server is running on port {args.port}")
                 print(f"\nUseful commands:")
                 print(f"  View logs: docker logs {server_name}")
                 print(f"  Stop server: docker stop {server_name}")
                 print(f"  Start server: docker start {server_name}")
                 print(f"{'='*60}")
-            except subprocess.CalledProcessError as e:
-                print(f"Failed to run Docker container: {e}")
         
         finally:
             # 7. Clean up build context
             if os.path.exists(build_context_dir):
                 shutil.rmtree(build_context_dir)
                 print(f"\nCleaned up temporary build context: {build_context_dir}")
+    elif args.server_type == "bedrock":
+        image_name = f"minecraft-bedrock-server:{args.server_version}"
+        
+        if not confirm_action(f"Do you want to download Bedrock Dedicated Server version {args.server_version} and set it up with Docker?"):
+            return
+        
+        # 1. Reference cached, extracted server files, tuned server.properties, Dockerfile and entrypoint
+        from bedrock import add_bedrock_server
+        
+        build_context = BuildContext()
+        if not add_bedrock_server(args.server_version, build_context):
+            print("Failed to prepare Bedrock server files.")
+            return
+        
+        build_context.add_file(os.path.join(os.getcwd(), "Dockerfile.bedrock"), "Dockerfile")
+        build_context.add_file(os.path.join(os.getcwd(), "entrypoint-bedrock.sh"), "entrypoint-bedrock.sh")
+        
+        # 2. Build Docker Image
+        if not build_image(image_name, build_context):
+            return
+        
+        # 3. Run Docker Container
+        if run_container(
+            server_name, image_name,
+            ports=["19132:19132/udp", "19133:19133/udp"],  # Bedrock IPv4 and IPv6 ports
+            env={},
+            volumes=volumes  # Mount volume for persistent data
+        ):
+            print(f"\n{'='*60}")
+            print(f"Bedrock server container '{server_name}' started successfully!")
+            print(f"Server data is persisted in Docker volume(s): '{server_data_volume}'")
+            print(f"Server is running on UDP port 19132")
+            print(f"{'='*60}")
 
 if __name__ == "__main__":
     main()
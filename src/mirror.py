@@ -0,0 +1,302 @@
+import hashlib
+import os
+import posixpath
+import tempfile
+import threading
+from typing import Optional, Union
+from urllib.parse import quote, unquote, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+# Size of the chunks responses are copied into the mirror in
+MIRROR_CHUNK_SIZE = 1024 * 1024
+
+
+def mirror_key(method: str, url: str, body: Optional[Union[str, bytes]] = None) -> str:
+    """
+    Map a request to its path inside the mirror.
+
+    Responses are stored as '<host>/<path>/@<method>', with a digest of the
+    query string and request body appended when present, so a URL and the
+    URLs below it (e.g. '/project/x' and '/project/x/version') never collide.
+
+    Args:
+        method: HTTP method
+        url: Request URL
+        body: Request body, if any
+
+    Returns:
+        Relative POSIX path of the stored response
+    """
+    parts = urlsplit(url)
+    path = posixpath.normpath(unquote(parts.path) or "/").lstrip("/")
+    name = f"@{method.lower()}"
+
+    if parts.query or body:
+        digest = hashlib.sha256(parts.query.encode())
+        if body:
+            digest.update(body.encode() if isinstance(body, str) else body)
+        name += f"-{digest.hexdigest()[:16]}"
+
+    return posixpath.join(parts.netloc.replace(":", "_"), path, name)
+
+
+class MirrorAdapter(BaseAdapter):
+    """
+    requests transport adapter that serves every request from a mirror.
+
+    The mirror is either a local directory or the base URL of a web server
+    serving such a directory (e.g. a LAN host). In record mode (local
+    directories only) requests are fetched from the internet and stored in
+    the mirror before being served from it.
+    """
+
+    def __init__(self, location: str, record: bool = False):
+        super().__init__()
+        self.location = location
+        self.remote = location.startswith(("http://", "https://"))
+        self.record = record
+        if self.remote and record:
+            raise ValueError("Mirrors can only be recorded into a local directory")
+        self.upstream = requests.Session()
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        key = mirror_key(request.method, request.url, request.body)
+
+        if self.remote:
+            response = self.upstream.get(f"{self.location.rstrip('/')}/{quote(key)}", stream=stream, timeout=timeout)
+            if response.status_code == 404:
+                response.close()
+                raise requests.exceptions.ConnectionError(
+                    f"{request.method} {request.url} is not in the mirror at {self.location}", request=request
+                )
+            response.url = request.url
+            response.request = request
+            return response
+
+        path = os.path.join(self.location, *key.split("/"))
+        if self.record:
+            response = self._record(request, path, timeout)
+            if response is not None:
+                return response
+
+        if not os.path.exists(path):
+            raise requests.exceptions.ConnectionError(
+                f"{request.method} {request.url} is not in the mirror at {self.location}", request=request
+            )
+
+        return self._file_response(request, path)
+
+    def _record(self, request, path: str, timeout) -> Optional[requests.Response]:
+        """Fetch a request from the internet into the mirror. Returns the response if it was not stored."""
+        headers = {k: v for k, v in request.headers.items() if k.lower() != "content-length"}
+        response = self.upstream.request(request.method, request.url, headers=headers, data=request.body,
+                                         stream=True, timeout=timeout)
+        if response.status_code != 200:
+            return response
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+        with response, open(tmp_path, "wb") as f:
+            for chunk in response.iter_content(MIRROR_CHUNK_SIZE):
+                f.write(chunk)
+        os.replace(tmp_path, path)
+        return None
+
+    def _file_response(self, request, path: str) -> requests.Response:
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.url = request.url
+        response.request = request
+        response.headers = CaseInsensitiveDict({"Content-Length": str(os.path.getsize(path))})
+        response.raw = open(path, "rb")
+        return response
+
+    def close(self):
+        self.upstream.close()
+
+
+def get_build_source(url: str, build_context, arcname: str) -> str:
+    """
+    Get the source a Dockerfile ADD instruction should fetch a URL from.
+
+    Without a mirror this is the URL itself. With a mirror URL it is the
+    mirrored copy; with a mirror directory the mirrored file is added to the
+    build context and its context path is returned.
+
+    Args:
+        url: Original download URL
+        build_context: BuildContext of the image being built
+        arcname: Path to use inside the build context
+
+    Returns:
+        URL or build context path for ADD
+    """
+    from http_client import get_mirror_location
+
+    location = get_mirror_location()
+    if not location:
+        return url
+
+    key = mirror_key("GET", url)
+    if location.startswith(("http://", "https://")):
+        return f"{location.rstrip('/')}/{quote(key)}"
+
+    build_context.add_file(os.path.join(location, *key.split("/")), arcname)
+    return arcname
+
+
+def detect_config_type(path: str) -> Optional[str]:
+    """Tell whether a file is a 'modpack', 'mods' config or 'plugins' config."""
+    import json
+    import zipfile
+
+    if path.endswith(".mrpack") or zipfile.is_zipfile(path):
+        return "modpack"
+
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Could not read {path}: {e}")
+        return None
+
+    if "minecraft" in data and "files" in data:
+        return "modpack"  # Bare CurseForge manifest.json
+    if "server_software" in data:
+        return "plugins"
+    if "mod_loader" in data:
+        return "mods"
+    return None
+
+
+def sync_loader(mod_loader: str, minecraft_version: str, loader_version: Optional[str], work_dir: str) -> bool:
+    """Record the loader metadata and installer used by both host and in-Docker installs."""
+    from downloader import download_file
+    from mod_loaders import download_fabric_api, get_loader_install_spec
+
+    install_spec = get_loader_install_spec(mod_loader, minecraft_version, loader_version)
+    if not install_spec:
+        return False
+
+    installer_path = os.path.join(work_dir, f"{install_spec['build']}-installer.jar")
+    if not download_file(install_spec["installer_url"], installer_path):
+        return False
+
+    if mod_loader == "fabric":
+        download_fabric_api(minecraft_version, os.path.join(work_dir, "mods"))
+    return True
+
+
+def sync_config(path: str, work_dir: str, cf_api_key: Optional[str]) -> bool:
+    """
+    Record everything a server created from one config or modpack downloads.
+
+    Args:
+        path: Mod config, plugin config or modpack
+        work_dir: Scratch directory the files are downloaded to
+        cf_api_key: Optional CurseForge API key
+
+    Returns:
+        True if everything was recorded
+    """
+    from downloader import get_java_version, get_vanilla_server_jar
+
+    os.makedirs(work_dir, exist_ok=True)
+    config_type = detect_config_type(path)
+    print(f"\nSyncing {path} ({config_type or 'unknown type'})...")
+
+    if config_type == "mods":
+        from downloader import download_mods_from_config
+        from mod_config import load_mod_config
+
+        config = load_mod_config(path)
+        if not config:
+            return False
+        ok = bool(get_vanilla_server_jar(config.minecraft_version)) and bool(get_java_version(config.minecraft_version))
+        ok = sync_loader(config.mod_loader, config.minecraft_version, None, work_dir) and ok
+        # Client-only mods are recorded too, for servers created with --keep-client-mods
+        downloaded = download_mods_from_config(config, os.path.join(work_dir, "mods"), cf_api_key,
+                                               exclude_client_only=False)
+        ok = len(downloaded) == len(config.mods) and ok
+
+        # The async clients fetch some files by other URLs (e.g. CurseForge's downloadUrl
+        # instead of its download-url endpoint); record what they request as well
+        import asyncio
+        from async_platforms import download_mods_from_config_async
+
+        _, failed = asyncio.run(download_mods_from_config_async(config, os.path.join(work_dir, "mods-async"), cf_api_key))
+        return not failed and ok
+
+    if config_type == "plugins":
+        from downloader import download_plugins_from_config
+        from plugin_config import load_plugin_config
+        from plugin_servers import get_plugin_server_jar
+
+        config = load_plugin_config(path)
+        if not config:
+            return False
+        ok = bool(get_plugin_server_jar(config.server_software, config.minecraft_version))
+        ok = bool(get_java_version(config.minecraft_version)) and ok
+        downloaded = download_plugins_from_config(config, os.path.join(work_dir, "plugins"))
+        return ok and len(downloaded) == len(config.plugins)
+
+    if config_type == "modpack":
+        from downloader import download_files
+        from modpacks import get_modpack_download_jobs, load_modpack, resolve_curseforge_files
+
+        pack = load_modpack(path)
+        if not pack:
+            return False
+        if any(f.curseforge_file_id for f in pack.files):
+            if not cf_api_key:
+                print("Error: CurseForge modpacks require --curseforge-api-key or CF_API_KEY")
+                return False
+            from mod_platforms import CurseForgeClient
+            resolve_curseforge_files(pack, CurseForgeClient(cf_api_key))
+
+        ok = bool(get_vanilla_server_jar(pack.minecraft_version)) and bool(get_java_version(pack.minecraft_version))
+        ok = sync_loader(pack.mod_loader, pack.minecraft_version, pack.loader_version, work_dir) and ok
+        jobs = get_modpack_download_jobs(pack, work_dir)
+        return ok and len(download_files(jobs)) == len(pack.files)
+
+    print(f"Unrecognized config: {path}")
+    return False
+
+
+def sync_mirror(args) -> None:
+    """Entry point for the 'mirror sync' command."""
+    import cache
+    from http_client import configure_mirror
+
+    os.makedirs(args.mirror, exist_ok=True)
+    configure_mirror(args.mirror, record=True)
+    cf_api_key = args.curseforge_api_key or os.environ.get("CF_API_KEY")
+
+    failed = []
+    with tempfile.TemporaryDirectory(prefix="mcsm-mirror-") as work_dir:
+        # Use an empty cache so every lookup goes over the network and is recorded
+        cache.CACHE_DIR = os.path.join(work_dir, "cache")
+
+        if args.server_version:
+            from downloader import get_java_version, get_vanilla_server_jar
+
+            print(f"\nSyncing vanilla server {args.server_version}...")
+            if not get_vanilla_server_jar(args.server_version) or not get_java_version(args.server_version):
+                failed.append(f"vanilla {args.server_version}")
+
+        for index, path in enumerate(args.config or []):
+            if not sync_config(path, os.path.join(work_dir, str(index)), cf_api_key):
+                failed.append(path)
+
+    print(f"\n{'='*50}")
+    print(f"Mirror: {os.path.abspath(args.mirror)}")
+    if failed:
+        print(f"Incomplete: {', '.join(failed)}")
+    else:
+        print("Everything was synced.")
+    print(f"Use it with --mirror {args.mirror} or MCSM_MIRROR={args.mirror}")
+    print(f"{'='*50}\n")
@@ -4,7 +4,7 @@ from dataclasses import dataclass
 from typing import List, Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class ModEntry:
     """Represents a single mod to be downloaded."""
     platform: str  # 'modrinth' or 'curseforge'
@@ -0,0 +1,128 @@
+import json
+import os
+import re
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Metadata files declaring where a mod runs
+FABRIC_METADATA = "fabric.mod.json"
+QUILT_METADATA = "quilt.mod.json"
+FORGE_METADATA = ("META-INF/neoforge.mods.toml", "META-INF/mods.toml")
+
+# Jars scanned at the same time; reads are small and mostly I/O bound
+SCAN_WORKERS = 8
+
+# [[dependencies.<mod>]] blocks of a mods.toml, and the keys read from them
+_TOML_DEPENDENCY_BLOCK = re.compile(r"^\s*\[\[\s*dependencies\.[^\]]+\]\]\s*$", re.MULTILINE)
+_TOML_KEY = r'^\s*{}\s*=\s*["\']?([^"\'\s#]+)'
+
+
+def is_client_only_project(project: Dict) -> bool:
+    """Check whether a Modrinth project is marked as unsupported on servers."""
+    return project.get("server_side") == "unsupported"
+
+
+def _toml_value(text: str, key: str) -> Optional[str]:
+    match = re.search(_TOML_KEY.format(re.escape(key)), text, re.MULTILINE)
+    return match.group(1) if match else None
+
+
+def _forge_environment(text: str) -> Optional[str]:
+    """
+    Read the environment of a Forge/NeoForge mod from its mods.toml.
+
+    mods.toml has no environment field; a mod is client-only if it says so
+    with 'clientSideOnly', or if it only depends on Minecraft on the client.
+    """
+    if (_toml_value(text, "clientSideOnly") or "").lower() == "true":
+        return "client"
+
+    for block in _TOML_DEPENDENCY_BLOCK.split(text)[1:]:
+        if _toml_value(block, "modId") == "minecraft":
+            side = (_toml_value(block, "side") or "BOTH").upper()
+            return {"CLIENT": "client", "SERVER": "server"}.get(side, "both")
+    return None
+
+
+def read_jar_environment(path: str) -> Optional[str]:
+    """
+    Read where a mod jar runs from its loader metadata.
+
+    Only the central directory and the metadata entry are read, not the
+    whole jar.
+
+    Args:
+        path: Path to the mod jar
+
+    Returns:
+        'client', 'server' or 'both', or None if the jar does not say
+    """
+    try:
+        with zipfile.ZipFile(path) as jar:
+            names = set(jar.namelist())
+            if FABRIC_METADATA in names:
+                environment = json.loads(jar.read(FABRIC_METADATA)).get("environment", "*")
+                return {"client": "client", "server": "server"}.get(environment, "both")
+            if QUILT_METADATA in names:
+                minecraft = json.loads(jar.read(QUILT_METADATA)).get("minecraft", {})
+                environment = minecraft.get("environment", "*") if isinstance(minecraft, dict) else "*"
+                return {"client": "client", "dedicated_server": "server"}.get(environment, "both")
+            for metadata in FORGE_METADATA:
+                if metadata in names:
+                    return _forge_environment(jar.read(metadata).decode("utf-8", errors="replace"))
+    except (OSError, zipfile.BadZipFile, json.JSONDecodeError, AttributeError, UnicodeDecodeError):
+        return None
+    return None
+
+
+def scan_jar_environments(paths: Iterable[str], max_workers: int = SCAN_WORKERS) -> Dict[str, Optional[str]]:
+    """
+    Read the environment of many mod jars in parallel.
+
+    Args:
+        paths: Jar paths
+        max_workers: Number of jars read concurrently
+
+    Returns:
+        Dict mapping each path to its environment (see read_jar_environment)
+    """
+    paths = list(paths)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(paths, executor.map(read_jar_environment, paths)))
+
+
+def split_client_only_jars(paths: Iterable[str]) -> Tuple[List[str], List[str]]:
+    """
+    Split mod jars into server jars and client-only jars.
+
+    Returns:
+        Tuple of (jars to keep, client-only jars)
+    """
+    environments = scan_jar_environments(paths)
+    keep = [path for path, environment in environments.items() if environment != "client"]
+    client_only = [path for path, environment in environments.items() if environment == "client"]
+    return keep, client_only
+
+
+def remove_client_only_jars(paths: Iterable[str]) -> List[str]:
+    """
+    Delete client-only mod jars that were downloaded for a server.
+
+    Args:
+        paths: Downloaded jar paths
+
+    Returns:
+        The remaining (server) jar paths
+    """
+    keep, client_only = split_client_only_jars(paths)
+    for path in client_only:
+        os.remove(path)
+    print_excluded_mods([os.path.basename(path) for path in client_only], "jar metadata")
+    return keep
+
+
+def print_excluded_mods(names: List[str], source: str) -> None:
+    """Report mods that were left out of a server because they are client-only."""
+    if names:
+        print(f"Excluded {len(names)} client-only mod(s) ({source}): {', '.join(sorted(names))}")
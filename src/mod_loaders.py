@@ -1,25 +1,32 @@
 import os
 import re
+import shutil
 import subprocess
-import requests
-from typing import Optional
+from typing import Dict, Optional
 from downloader import download_file
+from http_client import get_session
 
 
-def get_forge_installer_url(minecraft_version: str) -> Optional[str]:
+def get_forge_installer_url(minecraft_version: str, forge_version: Optional[str] = None) -> Optional[str]:
     """
     Get the Forge installer download URL for a specific Minecraft version.
     
     Args:
         minecraft_version: Minecraft version (e.g., '1.20.1')
+        forge_version: Exact Forge version (e.g., '47.2.0'); the recommended
+            or latest promotion is used if not given
     
     Returns:
         Forge installer URL or None if not found
     """
+    if forge_version:
+        full_version = f"{minecraft_version}-{forge_version}"
+        return f"https://maven.minecraftforge.net/net/minecraftforge/forge/{full_version}/forge-{full_version}-installer.jar"
+    
     try:
         # Forge promotions API to get recommended version
         promotions_url = "https://files.minecraftforge.net/net/minecraftforge/forge/promotions_slim.json"
-        response = requests.get(promotions_url)
+        response = get_session().get(promotions_url)
         response.raise_for_status()
         promotions = response.json()
         
@@ -47,7 +54,7 @@ def get_forge_installer_url(minecraft_version: str) -> Optional[str]:
         return None
 
 
-def get_neoforge_installer_url(minecraft_version: str) -> Optional[str]:
+def get_neoforge_installer_url(minecraft_version: str, neoforge_version: Optional[str] = None) -> Optional[str]:
     """
     Get the NeoForge installer download URL for a specific Minecraft version.
     
@@ -57,10 +64,18 @@ def get_neoforge_installer_url(minecraft_version: str) -> Optional[str]:
     
     Args:
         minecraft_version: Minecraft version (e.g., '1.21.1')
+        neoforge_version: Exact NeoForge version (e.g., '21.1.77'); the latest
+            matching version is used if not given
     
     Returns:
         NeoForge installer URL or None if not found
     """
+    if neoforge_version:
+        return (
+            f"https://maven.neoforged.net/releases/net/neoforged/neoforge/"
+            f"{neoforge_version}/neoforge-{neoforge_version}-installer.jar"
+        )
+    
     try:
         # Parse Minecraft version to determine NeoForge version prefix
         # MC 1.X.Y -> NeoForge prefix X.Y.
@@ -77,7 +92,7 @@ def get_neoforge_installer_url(minecraft_version: str) -> Optional[str]:
         
         # Fetch Maven metadata to get all available versions
         metadata_url = "https://maven.neoforged.net/releases/net/neoforged/neoforge/maven-metadata.xml"
-        response = requests.get(metadata_url)
+        response = get_session().get(metadata_url)
         response.raise_for_status()
         
         # Parse versions from XML (simple regex approach, no XML dependency needed)
@@ -129,13 +144,146 @@ def get_fabric_installer_url() -> str:
     return "https://maven.fabricmc.net/net/fabricmc/fabric-installer/1.0.1/fabric-installer-1.0.1.jar"
 
 
-def install_forge_server(minecraft_version: str, build_context_dir: str) -> Optional[str]:
+def get_fabric_loader_version(minecraft_version: str) -> Optional[str]:
+    """
+    Get the latest stable Fabric loader version for a Minecraft version.
+    
+    Args:
+        minecraft_version: Minecraft version (e.g., '1.21.1')
+    
+    Returns:
+        Fabric loader version (e.g., '0.16.5') or None if not found
+    """
+    try:
+        response = get_session().get(f"https://meta.fabricmc.net/v2/versions/loader/{minecraft_version}")
+        response.raise_for_status()
+        loaders = response.json()
+        
+        if not loaders:
+            print(f"No Fabric loader found for Minecraft {minecraft_version}")
+            return None
+        
+        stable_loaders = [entry for entry in loaders if entry["loader"].get("stable")]
+        return (stable_loaders or loaders)[0]["loader"]["version"]
+    
+    except Exception as e:
+        print(f"Error getting Fabric loader version: {e}")
+        return None
+
+
+def get_loader_install_spec(mod_loader: str, minecraft_version: str, loader_version: Optional[str] = None) -> Optional[Dict[str, str]]:
+    """
+    Resolve everything needed to run a mod loader installer, without running it.
+    
+    Used to run the installer as a stage of a multi-stage Docker build. The
+    returned 'build' identifies the exact loader build, so the Docker layer
+    cache reuses an install whenever the same build is requested again.
+    
+    Args:
+        mod_loader: 'forge', 'fabric' or 'neoforge'
+        minecraft_version: Minecraft version
+        loader_version: Exact loader version to install (e.g., pinned by a modpack);
+            resolved automatically if not given
+    
+    Returns:
+        Dict with 'loader', 'installer_url', 'installer_args', 'build' and 'loader_version', or None if failed
+    """
+    if mod_loader == "forge":
+        installer_url = get_forge_installer_url(minecraft_version, loader_version)
+        installer_args = "--installServer"
+    elif mod_loader == "neoforge":
+        installer_url = get_neoforge_installer_url(minecraft_version, loader_version)
+        installer_args = "--installServer"
+    elif mod_loader == "fabric":
+        loader_version = loader_version or get_fabric_loader_version(minecraft_version)
+        if not loader_version:
+            return None
+        installer_url = get_fabric_installer_url()
+        installer_args = f"server -mcversion {minecraft_version} -loader {loader_version} -downloadMinecraft"
+    else:
+        print(f"Unsupported mod loader: {mod_loader}")
+        return None
+    
+    if not installer_url:
+        return None
+    
+    if mod_loader == "fabric":
+        build = f"fabric-{minecraft_version}-{loader_version}"
+    else:
+        # Installer file name is '<loader>-<version>-installer.jar'
+        build = os.path.basename(installer_url).replace("-installer.jar", "")
+    
+    return {
+        "loader": mod_loader,
+        "installer_url": installer_url,
+        "installer_args": installer_args,
+        "build": build,
+        "loader_version": loader_version
+    }
+
+
+def get_cached_loader_install(mod_loader: str, minecraft_version: str, loader_version: Optional[str] = None) -> Optional[str]:
+    """
+    Get an installed mod loader server from the cache, running the installer once per loader build.
+    
+    The installed files (loader JARs, libraries, run scripts) are kept under
+    the cache directory and referenced from the build context, so they keep
+    stable hashes and the installer is skipped on later builds of the same loader.
+    Fabric API is not part of the cached install.
+    
+    Args:
+        mod_loader: 'forge', 'fabric' or 'neoforge'
+        minecraft_version: Minecraft version
+        loader_version: Exact loader version to install; resolved automatically if not given
+    
+    Returns:
+        Path to the installed server directory or None if failed
+    """
+    from cache import get_cache_path
+    
+    install_spec = get_loader_install_spec(mod_loader, minecraft_version, loader_version)
+    if not install_spec:
+        return None
+    
+    loader_dir = get_cache_path("loaders", install_spec["build"])
+    marker_path = os.path.join(loader_dir, ".installed")
+    if os.path.exists(marker_path):
+        print(f"Using cached {install_spec['build']} install")
+        return loader_dir
+    
+    # Install into a temporary directory so an interrupted install is never reused
+    tmp_dir = f"{loader_dir}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    
+    if mod_loader == "forge":
+        server_jar = install_forge_server(minecraft_version, tmp_dir, install_spec["loader_version"])
+    elif mod_loader == "neoforge":
+        server_jar = install_neoforge_server(minecraft_version, tmp_dir, install_spec["loader_version"])
+    else:  # fabric
+        server_jar = install_fabric_server(minecraft_version, tmp_dir, install_spec["loader_version"])
+        shutil.rmtree(os.path.join(tmp_dir, "mods"), ignore_errors=True)
+    
+    if not server_jar:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return None
+    
+    shutil.rmtree(loader_dir, ignore_errors=True)
+    os.rename(tmp_dir, loader_dir)
+    with open(marker_path, "w") as f:
+        f.write(install_spec["installer_url"])
+    
+    return loader_dir
+
+
+def install_forge_server(minecraft_version: str, build_context_dir: str, forge_version: Optional[str] = None) -> Optional[str]:
     """
     Download and install Forge server.
     
     Args:
         minecraft_version: Minecraft version
         build_context_dir: Directory to install server files
+        forge_version: Exact Forge version to install (recommended/latest if not given)
     
     Returns:
         Path to server JAR or None if failed
@@ -143,7 +291,7 @@ def install_forge_server(minecraft_version: str, build_context_dir: str) -> Opti
     print(f"Installing Forge server for Minecraft {minecraft_version}...")
     
     # Get installer URL
-    installer_url = get_forge_installer_url(minecraft_version)
+    installer_url = get_forge_installer_url(minecraft_version, forge_version)
     if not installer_url:
         return None
     
@@ -212,13 +360,14 @@ def install_forge_server(minecraft_version: str, build_context_dir: str) -> Opti
         return None
 
 
-def install_fabric_server(minecraft_version: str, build_context_dir: str) -> Optional[str]:
+def install_fabric_server(minecraft_version: str, build_context_dir: str, loader_version: Optional[str] = None) -> Optional[str]:
     """
     Download and install Fabric server.
     
     Args:
         minecraft_version: Minecraft version
         build_context_dir: Directory to install server files
+        loader_version: Fabric loader version to install (latest if not given)
     
     Returns:
         Path to server launcher JAR or None if failed
@@ -245,6 +394,8 @@ def install_fabric_server(minecraft_version: str, build_context_dir: str) -> Opt
             "-mcversion", minecraft_version,
             "-downloadMinecraft"
         ]
+        if loader_version:
+            install_command += ["-loader", loader_version]
         
         result = subprocess.run(
             install_command,
@@ -266,20 +417,7 @@ def install_fabric_server(minecraft_version: str, build_context_dir: str) -> Opt
                 os.remove(installer_path)
             
             # Download Fabric API (required for most Fabric mods)
-            print("Downloading Fabric API...")
-            mods_dir = os.path.join(build_context_dir, "mods")
-            os.makedirs(mods_dir, exist_ok=True)
-            
-            try:
-                from mod_platforms import ModrinthClient
-                modrinth = ModrinthClient()
-                fabric_api_path = modrinth.download_mod("fabric-api", minecraft_version, "fabric", mods_dir)
-                if fabric_api_path:
-                    print("Fabric API downloaded successfully")
-                else:
-                    print("Warning: Could not download Fabric API. Some mods may not work.")
-            except Exception as e:
-                print(f"Warning: Could not download Fabric API: {e}")
+            download_fabric_api(minecraft_version, os.path.join(build_context_dir, "mods"))
             
             return server_launcher
         else:
@@ -296,7 +434,35 @@ def install_fabric_server(minecraft_version: str, build_context_dir: str) -> Opt
         return None
 
 
-def install_neoforge_server(minecraft_version: str, build_context_dir: str) -> Optional[str]:
+def download_fabric_api(minecraft_version: str, mods_dir: str) -> Optional[str]:
+    """
+    Download Fabric API (required by most Fabric mods) into a mods directory.
+    
+    Args:
+        minecraft_version: Minecraft version
+        mods_dir: Directory to save the Fabric API JAR
+    
+    Returns:
+        Path to the Fabric API JAR or None if failed
+    """
+    print("Downloading Fabric API...")
+    os.makedirs(mods_dir, exist_ok=True)
+    
+    try:
+        from mod_platforms import ModrinthClient
+        modrinth = ModrinthClient()
+        fabric_api_path = modrinth.download_mod("fabric-api", minecraft_version, "fabric", mods_dir)
+        if fabric_api_path:
+            print("Fabric API downloaded successfully")
+        else:
+            print("Warning: Could not download Fabric API. Some mods may not work.")
+        return fabric_api_path
+    except Exception as e:
+        print(f"Warning: Could not download Fabric API: {e}")
+        return None
+
+
+def install_neoforge_server(minecraft_version: str, build_context_dir: str, neoforge_version: Optional[str] = None) -> Optional[str]:
     """
     Download and install NeoForge server.
     
@@ -306,6 +472,7 @@ def install_neoforge_server(minecraft_version: str, build_context_dir: str) -> O
     Args:
         minecraft_version: Minecraft version
         build_context_dir: Directory to install server files
+        neoforge_version: Exact NeoForge version to install (latest matching if not given)
     
     Returns:
         Path to server marker or None if failed
@@ -313,7 +480,7 @@ def install_neoforge_server(minecraft_version: str, build_context_dir: str) -> O
     print(f"Installing NeoForge server for Minecraft {minecraft_version}...")
     
     # Get installer URL
-    installer_url = get_neoforge_installer_url(minecraft_version)
+    installer_url = get_neoforge_installer_url(minecraft_version, neoforge_version)
     if not installer_url:
         return None
     
@@ -1,7 +1,41 @@
+import json
 import requests
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Union
 from tqdm import tqdm
 import os
+from http_client import get_session
+from json_stream import iter_json_array
+
+# Size of the chunks API listings are streamed and decoded in
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Fields kept from API results; everything else is dropped as soon as it is decoded
+MODRINTH_PROJECT_FIELDS = ("id", "slug", "title", "server_side", "client_side")
+MODRINTH_VERSION_FIELDS = ("id", "project_id", "version_number", "files")
+MODRINTH_FILE_FIELDS = ("url", "filename", "primary", "hashes", "size")
+CURSEFORGE_MOD_FIELDS = ("id", "slug", "name")
+CURSEFORGE_FILE_FIELDS = (
+    "id", "modId", "fileName", "fileDate", "downloadUrl", "hashes", "fileFingerprint", "fileLength", "gameVersions"
+)
+
+
+def compact_record(data: Dict[str, Any], fields) -> Dict[str, Any]:
+    """Keep only the given fields of an API result."""
+    return {key: data[key] for key in fields if key in data}
+
+
+def is_compatible_curseforge_file(file: Dict[str, Any], game_version: str, mod_loader: str) -> bool:
+    """Check whether a CurseForge file lists both the game version and the mod loader."""
+    game_versions = file.get("gameVersions", [])
+    return game_version in game_versions and mod_loader.lower() in [v.lower() for v in game_versions]
+
+
+def compact_modrinth_version(version: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep only the fields of a Modrinth version (and its files) needed to download it."""
+    compact = compact_record(version, MODRINTH_VERSION_FIELDS)
+    compact["files"] = [compact_record(f, MODRINTH_FILE_FIELDS) for f in version.get("files", [])]
+    return compact
+
 
 class ModrinthClient:
     """Client for interacting with the Modrinth API to download Minecraft mods."""
@@ -10,17 +44,17 @@ class ModrinthClient:
     USER_AGENT = "Minecraft-Server-Management/0.0.1"
     
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({"User-Agent": self.USER_AGENT})
+        self.session = get_session({"User-Agent": self.USER_AGENT})
     
-    def search_mod(self, slug: str, game_version: str, mod_loader: str) -> Optional[Dict[str, Any]]:
+    def search_mod(self, slug: str, game_version: str, mod_loader: Union[str, List[str]]) -> Optional[Dict[str, Any]]:
         """
         Search for a mod by slug and filter by game version and mod loader.
         
         Args:
             slug: The mod's slug (e.g., 'sodium', 'fabric-api')
             game_version: Minecraft version (e.g., '1.21.1')
-            mod_loader: Mod loader type ('fabric' or 'forge')
+            mod_loader: Mod loader type ('fabric' or 'forge'), or a list of accepted
+                loaders (e.g., ['paper', 'spigot'] for plugins)
         
         Returns:
             Dict containing project info and matching version, or None if not found
@@ -30,31 +64,29 @@ class ModrinthClient:
             project_url = f"{self.BASE_URL}/project/{slug}"
             project_response = self.session.get(project_url)
             project_response.raise_for_status()
-            project_data = project_response.json()
+            project_data = compact_record(project_response.json(), MODRINTH_PROJECT_FIELDS)
             
-            # Get project versions
+            # Get project versions (newest first); only the first one is decoded
             versions_url = f"{self.BASE_URL}/project/{slug}/version"
+            loaders = mod_loader if isinstance(mod_loader, list) else [mod_loader]
             params = {
-                "game_versions": f'["{game_version}"]',
-                "loaders": f'["{mod_loader}"]'
+                "game_versions": json.dumps([game_version]),
+                "loaders": json.dumps(loaders)
             }
-            versions_response = self.session.get(versions_url, params=params)
-            versions_response.raise_for_status()
-            versions_data = versions_response.json()
+            with self.session.get(versions_url, params=params, stream=True) as versions_response:
+                versions_response.raise_for_status()
+                latest_version = next(iter_json_array(versions_response.iter_content(STREAM_CHUNK_SIZE)), None)
             
-            if not versions_data:
+            if not latest_version:
                 print(f"No compatible version found for {slug} (MC {game_version}, {mod_loader})")
                 return None
             
-            # Get the latest compatible version
-            latest_version = versions_data[0]
-            
             return {
                 "project": project_data,
-                "version": latest_version
+                "version": compact_modrinth_version(latest_version)
             }
         
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, ValueError) as e:
             print(f"Error searching for mod '{slug}' on Modrinth: {e}")
             return None
     
@@ -100,6 +132,20 @@ class ModrinthClient:
         if not mod_data:
             return None
         
+        return self.download_version(slug, mod_data, output_dir)
+    
+    def download_version(self, slug: str, mod_data: Dict[str, Any], output_dir: str) -> Optional[str]:
+        """
+        Download the primary file of a version returned by search_mod.
+        
+        Args:
+            slug: The mod's slug
+            mod_data: Result of search_mod
+            output_dir: Directory to save the mod file
+        
+        Returns:
+            Path to downloaded file or None if failed
+        """
         download_url = self.get_mod_download_url(mod_data["version"])
         if not download_url:
             print(f"No download URL found for {slug}")
@@ -131,6 +177,35 @@ class ModrinthClient:
         except requests.exceptions.RequestException as e:
             print(f"Error downloading mod: {e}")
             return None
+    
+    def get_latest_versions_from_hashes(self, hashes: List[str], game_version: str, mod_loader: str,
+                                        algorithm: str = "sha1") -> Dict[str, Dict[str, Any]]:
+        """
+        Get the latest compatible version of many installed files in a single request.
+        
+        Args:
+            hashes: File hashes of installed files
+            game_version: Minecraft version
+            mod_loader: Mod loader type
+            algorithm: Hash algorithm of the given hashes ('sha1' or 'sha512')
+        
+        Returns:
+            Dict mapping each known hash to its latest version data (unknown files are omitted)
+        """
+        try:
+            url = f"{self.BASE_URL}/version_files/update"
+            response = self.session.post(url, json={
+                "hashes": hashes,
+                "algorithm": algorithm,
+                "loaders": [mod_loader],
+                "game_versions": [game_version]
+            })
+            response.raise_for_status()
+            return response.json()
+        
+        except requests.exceptions.RequestException as e:
+            print(f"Error checking Modrinth updates: {e}")
+            return {}
 
 
 class CurseForgeClient:
@@ -150,8 +225,7 @@ class CurseForgeClient:
         if not api_key:
             raise ValueError("CurseForge API key is required")
         
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.session = get_session({
             "User-Agent": self.USER_AGENT,
             "x-api-key": api_key
         })
@@ -177,49 +251,39 @@ class CurseForgeClient:
                 "classId": 6  # Mods class
             }
             
-            search_response = self.session.get(search_url, params=params)
-            search_response.raise_for_status()
-            search_data = search_response.json()
+            with self.session.get(search_url, params=params, stream=True) as search_response:
+                search_response.raise_for_status()
+                mod = next(iter_json_array(search_response.iter_content(STREAM_CHUNK_SIZE), "data"), None)
             
-            if not search_data.get("data"):
+            if not mod:
                 print(f"Mod '{slug}' not found on CurseForge")
                 return None
             
-            mod = search_data["data"][0]
+            mod = compact_record(mod, CURSEFORGE_MOD_FIELDS)
             mod_id = mod["id"]
             
-            # Get mod files
+            # Stream the mod's file list, keeping only the newest file that
+            # matches the game version and mod loader
             files_url = f"{self.BASE_URL}/mods/{mod_id}/files"
-            files_response = self.session.get(files_url)
-            files_response.raise_for_status()
-            files_data = files_response.json()
+            latest_file = None
+            with self.session.get(files_url, stream=True) as files_response:
+                files_response.raise_for_status()
+                for file in iter_json_array(files_response.iter_content(STREAM_CHUNK_SIZE), "data"):
+                    if is_compatible_curseforge_file(file, game_version, mod_loader) and (
+                        latest_file is None or file.get("fileDate", "") > latest_file.get("fileDate", "")
+                    ):
+                        latest_file = compact_record(file, CURSEFORGE_FILE_FIELDS)
             
-            # Filter files by game version and mod loader
-            compatible_files = []
-            for file in files_data.get("data", []):
-                game_versions = file.get("gameVersions", [])
-                
-                # Check if file matches game version and mod loader
-                has_version = game_version in game_versions
-                has_loader = mod_loader.lower() in [v.lower() for v in game_versions]
-                
-                if has_version and has_loader:
-                    compatible_files.append(file)
-            
-            if not compatible_files:
+            if not latest_file:
                 print(f"No compatible files found for {slug} (MC {game_version}, {mod_loader})")
                 return None
             
-            # Sort by file date (newest first)
-            compatible_files.sort(key=lambda x: x.get("fileDate", ""), reverse=True)
-            latest_file = compatible_files[0]
-            
             return {
                 "mod": mod,
                 "file": latest_file
             }
         
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, ValueError) as e:
             print(f"Error searching for mod '{slug}' on CurseForge: {e}")
             return None
     
@@ -244,6 +308,49 @@ class CurseForgeClient:
             print(f"Error getting download URL: {e}")
             return None
     
+    def get_files(self, file_ids: List[int]) -> List[Dict[str, Any]]:
+        """
+        Get metadata for many files in a single request.
+        
+        Args:
+            file_ids: CurseForge file IDs
+        
+        Returns:
+            List of file data dicts (files that do not exist are omitted)
+        """
+        try:
+            url = f"{self.BASE_URL}/mods/files"
+            with self.session.post(url, json={"fileIds": file_ids}, stream=True) as response:
+                response.raise_for_status()
+                return [
+                    compact_record(file, CURSEFORGE_FILE_FIELDS)
+                    for file in iter_json_array(response.iter_content(STREAM_CHUNK_SIZE), "data")
+                ]
+        
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Error getting CurseForge files: {e}")
+            return []
+    
+    def get_fingerprint_matches(self, fingerprints: List[int]) -> List[Dict[str, Any]]:
+        """
+        Identify many installed files by their fingerprints in a single request.
+        
+        Args:
+            fingerprints: CurseForge (MurmurHash2) fingerprints of installed files
+        
+        Returns:
+            List of exact matches, each with 'id' (mod ID), 'file' and 'latestFiles'
+        """
+        try:
+            url = f"{self.BASE_URL}/fingerprints/{self.MINECRAFT_GAME_ID}"
+            response = self.session.post(url, json={"fingerprints": fingerprints})
+            response.raise_for_status()
+            return response.json().get("data", {}).get("exactMatches", [])
+        
+        except requests.exceptions.RequestException as e:
+            print(f"Error matching CurseForge fingerprints: {e}")
+            return []
+    
     def download_mod(self, slug: str, game_version: str, mod_loader: str, output_dir: str) -> Optional[str]:
         """
         Download a mod from CurseForge.
@@ -0,0 +1,229 @@
+import os
+import shlex
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+from docker_manager import container_action, get_data_volume, run_in_volume
+from downloader import DownloadJob, download_files, resolve_mod_files
+from mod_config import ModEntry, load_mod_config
+from mod_environment import remove_client_only_jars
+from modpacks import PackFile, load_modpack, resolve_curseforge_files
+
+# Script listing the SHA-1 of every jar in the server's mods folder
+LIST_MODS_SCRIPT = 'cd /app/mods 2>/dev/null || exit 0; for f in *.jar; do [ -f "$f" ] && sha1sum "$f"; done; true'
+
+# Script building the new mods folder next to the current one. Kept jars are
+# hardlinked, new jars are copied from the staging mount, and non-jar entries
+# (mod config folders etc.) are carried over
+STAGE_MODS_SCRIPT = """
+set -e
+cd /app
+rm -rf .mods-new .mods-old
+mkdir -p mods .mods-new
+while IFS= read -r f; do [ -n "$f" ] && ln "mods/$f" ".mods-new/$f"; done < /staging/keep.txt
+for f in /staging/jars/*; do [ -f "$f" ] && cp "$f" .mods-new/; done
+for f in mods/* mods/.[!.]*; do
+    [ -e "$f" ] || continue
+    case "$f" in *.jar) ;; *) cp -a "$f" .mods-new/ ;; esac
+done
+"""
+
+# Swap the staged folder in with two renames on the same filesystem
+SWAP_MODS_SCRIPT = "set -e; cd /app; mv mods .mods-old; mv .mods-new mods; rm -rf .mods-old"
+
+
+def get_installed_mods(server_data_volume: str) -> Optional[Dict[str, str]]:
+    """
+    Hash the jars in a server's mods folder.
+
+    Args:
+        server_data_volume: Data volume of the server
+
+    Returns:
+        Dict mapping SHA-1 hashes to jar file names, or None if the volume could not be read
+    """
+    output = run_in_volume(server_data_volume, LIST_MODS_SCRIPT)
+    if output is None:
+        return None
+
+    installed = {}
+    for line in output.splitlines():
+        digest, _, filename = line.partition("  ")
+        if filename:
+            installed[digest] = filename
+    return installed
+
+
+def diff_mods(desired: List[PackFile], installed: Dict[str, str]) -> Tuple[List[PackFile], List[str], List[str]]:
+    """
+    Compare the resolved mod set with the installed jars by SHA-1.
+
+    Args:
+        desired: Resolved mod files (paths under 'mods/')
+        installed: SHA-1 -> file name of installed jars
+
+    Returns:
+        Tuple of (files to download, installed file names to keep, installed file names to remove)
+    """
+    to_download = []
+    keep = []
+    for pack_file in desired:
+        digest = pack_file.hashes.get("sha1")
+        if digest and digest in installed:
+            keep.append(installed[digest])
+        else:
+            to_download.append(pack_file)
+
+    remove = [filename for filename in installed.values() if filename not in keep]
+    return to_download, keep, remove
+
+
+def update_server_mods(server_name: str, desired: List[PackFile], keep_unlisted: bool = False,
+                       restart: bool = True, exclude_client_only: bool = True) -> bool:
+    """
+    Bring the mods of a running server in line with a resolved mod set.
+
+    Only changed jars are downloaded. The new mods folder is staged inside
+    the data volume while the server keeps running, then swapped in with
+    renames while the container is stopped, so downtime is a restart.
+
+    Args:
+        server_name: Server container name
+        desired: Resolved mod files
+        keep_unlisted: Keep installed jars that are not part of the mod set
+        restart: Stop the server for the swap and start it again
+        exclude_client_only: Leave out downloaded jars whose metadata declares them client-only
+
+    Returns:
+        True if the update was applied
+    """
+    server_data_volume = get_data_volume(server_name)
+    if not server_data_volume:
+        print(f"Server '{server_name}' uses the split data layout; its mods are part of the image. Recreate it to change mods.")
+        return False
+    desired = [f for f in desired if f.path.startswith("mods/") and f.path.endswith(".jar")]
+
+    print(f"Reading installed mods from volume '{server_data_volume}'...")
+    installed = get_installed_mods(server_data_volume)
+    if installed is None:
+        return False
+
+    to_download, keep, remove = diff_mods(desired, installed)
+    if keep_unlisted:
+        keep += remove
+        remove = []
+
+    print(f"\n{'='*50}")
+    print(f"Unchanged: {len(keep)}  Add/update: {len(to_download)}  Remove: {len(remove)}")
+    for pack_file in to_download:
+        print(f"  + {os.path.basename(pack_file.path)}")
+    for filename in remove:
+        print(f"  - {filename}")
+    print(f"{'='*50}\n")
+
+    if not to_download and not remove:
+        print("Mods are already up to date.")
+        return True
+
+    with tempfile.TemporaryDirectory(prefix="mcsm-update-") as staging_dir:
+        jars_dir = os.path.join(staging_dir, "jars")
+        os.makedirs(jars_dir)
+
+        jobs = []
+        for pack_file in to_download:
+            algorithm = "sha512" if "sha512" in pack_file.hashes else "sha1"
+            jobs.append(DownloadJob(pack_file.url, os.path.join(jars_dir, os.path.basename(pack_file.path)),
+                                    pack_file.hashes.get(algorithm), algorithm))
+
+        downloaded = download_files(jobs)
+        if len(downloaded) < len(jobs):
+            print("Some mods failed to download; the server was not changed.")
+            return False
+        if exclude_client_only:
+            remove_client_only_jars(downloaded)
+
+        with open(os.path.join(staging_dir, "keep.txt"), "w") as f:
+            f.writelines(f"{filename}\n" for filename in keep)
+
+        print("Staging new mods folder in the data volume...")
+        if run_in_volume(server_data_volume, STAGE_MODS_SCRIPT, {staging_dir: "/staging:ro"}) is None:
+            return False
+
+    if not restart:
+        print(f"New mods staged in /app/.mods-new of '{server_data_volume}'.")
+        print(f"Apply later with: docker stop {server_name} && "
+              f"docker run --rm -v {server_data_volume}:/app alpine sh -c {shlex.quote(SWAP_MODS_SCRIPT)} && "
+              f"docker start {server_name}")
+        return True
+
+    print(f"Restarting '{server_name}' with the new mods...")
+    if not container_action("stop", server_name):
+        return False
+    swapped = run_in_volume(server_data_volume, SWAP_MODS_SCRIPT) is not None
+    if not container_action("start", server_name):
+        return False
+
+    if swapped:
+        print("Mods updated successfully.")
+    return swapped
+
+
+def resolve_desired_mods(args) -> Optional[List[PackFile]]:
+    """
+    Resolve the mod set of a mod config or modpack given on the command line.
+
+    Args:
+        args: Parsed command line arguments (mod_config / modpack, curseforge_api_key)
+
+    Returns:
+        List of resolved mod files, or None if resolution failed
+    """
+    cf_api_key = args.curseforge_api_key or os.environ.get("CF_API_KEY")
+
+    if args.modpack:
+        print(f"\nLoading modpack from {args.modpack}...")
+        modpack = load_modpack(args.modpack)
+        if not modpack:
+            print("Failed to load modpack")
+            return None
+
+        if any(f.curseforge_file_id for f in modpack.files):
+            from mod_platforms import CurseForgeClient
+
+            if not cf_api_key:
+                print("Error: CurseForge modpacks require --curseforge-api-key or CF_API_KEY")
+                return None
+            resolve_curseforge_files(modpack, CurseForgeClient(cf_api_key))
+
+        unresolved = [f.curseforge_file_id for f in modpack.files if not f.url]
+        if unresolved:
+            print(f"Error: Could not resolve CurseForge file(s): {', '.join(map(str, unresolved))}")
+            return None
+        return modpack.files
+
+    print(f"\nLoading mod configuration from {args.mod_config}...")
+    mod_config = load_mod_config(args.mod_config)
+    if not mod_config:
+        print("Failed to load mod configuration")
+        return None
+
+    # Servers created from a Fabric mod config always get Fabric API
+    if mod_config.mod_loader == "fabric" and not any(m.slug == "fabric-api" for m in mod_config.mods):
+        mod_config.mods.append(ModEntry("modrinth", "fabric-api", "latest"))
+
+    files, unresolved = resolve_mod_files(mod_config, cf_api_key, not args.keep_client_mods)
+    if unresolved:
+        # Never remove a mod from the server because its lookup failed
+        print(f"Error: Could not resolve mod(s): {', '.join(unresolved)}")
+        return None
+    return files
+
+
+def update_mods(args) -> None:
+    """Entry point for the 'update-mods' command."""
+    desired = resolve_desired_mods(args)
+    if desired is None:
+        return
+
+    update_server_mods(args.server_name, desired, args.keep_unlisted, restart=not args.no_restart,
+                       exclude_client_only=not args.keep_client_mods)
@@ -0,0 +1,276 @@
+import json
+import os
+import posixpath
+import shutil
+import zipfile
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from downloader import DownloadJob
+
+# Modrinth dependency keys for each supported mod loader
+MRPACK_LOADERS = {
+    "fabric-loader": "fabric",
+    "forge": "forge",
+    "neoforge": "neoforge",
+}
+
+# Folders inside a .mrpack whose contents are copied onto the server
+MRPACK_OVERRIDE_FOLDERS = ["overrides", "server-overrides"]
+
+# CurseForge hash algorithm IDs
+CURSEFORGE_SHA1 = 1
+
+# CurseForge files fetched per bulk request
+CURSEFORGE_BATCH_SIZE = 500
+
+
+@dataclass(slots=True)
+class PackFile:
+    """A single file pinned by a modpack."""
+    path: str                                        # Destination path relative to the server root
+    url: Optional[str] = None                        # Download URL (resolved later for CurseForge files)
+    hashes: Dict[str, str] = field(default_factory=dict)
+    curseforge_file_id: Optional[int] = None
+
+
+@dataclass
+class Modpack:
+    """Represents an imported modpack."""
+    name: str
+    pack_path: str                  # Path to the .mrpack / CurseForge zip or manifest.json
+    mod_loader: str                 # 'forge', 'fabric' or 'neoforge'
+    loader_version: Optional[str]   # Loader version pinned by the pack
+    minecraft_version: str
+    files: List[PackFile]
+    override_folders: List[str]     # Folders inside the pack zip copied onto the server
+
+
+def _safe_path(path: str) -> Optional[str]:
+    """Normalize a pack-relative path, rejecting absolute paths and '..' components."""
+    normalized = posixpath.normpath(path.replace("\\", "/"))
+    if normalized.startswith("/") or normalized == ".." or normalized.startswith("../"):
+        return None
+    return normalized
+
+
+def load_mrpack(pack_path: str) -> Optional[Modpack]:
+    """
+    Load a Modrinth .mrpack modpack.
+
+    Files marked as unsupported on servers are skipped. Each file keeps the
+    download URL and hashes pinned in modrinth.index.json, so no search or
+    version lookup is needed.
+
+    Args:
+        pack_path: Path to the .mrpack file
+
+    Returns:
+        Modpack object or None if loading failed
+    """
+    try:
+        with zipfile.ZipFile(pack_path) as archive:
+            index = json.loads(archive.read("modrinth.index.json"))
+    except (OSError, KeyError, zipfile.BadZipFile, json.JSONDecodeError) as e:
+        print(f"Invalid .mrpack file: {e}")
+        return None
+
+    dependencies = index.get("dependencies", {})
+    if "minecraft" not in dependencies:
+        print("Modpack does not specify a Minecraft version")
+        return None
+
+    loader_key = next((key for key in MRPACK_LOADERS if key in dependencies), None)
+    if not loader_key:
+        print(f"Unsupported modpack loader: {', '.join(k for k in dependencies if k != 'minecraft')}")
+        return None
+
+    files = []
+    skipped = 0
+    for file_data in index.get("files", []):
+        if file_data.get("env", {}).get("server") == "unsupported":
+            skipped += 1
+            continue
+
+        path = _safe_path(file_data["path"])
+        if not path or not file_data.get("downloads"):
+            print(f"Skipping invalid modpack entry: {file_data.get('path')}")
+            continue
+
+        files.append(PackFile(path=path, url=file_data["downloads"][0], hashes=file_data.get("hashes", {})))
+
+    if skipped:
+        print(f"Skipping {skipped} client-only file(s)")
+
+    return Modpack(
+        name=index.get("name", os.path.basename(pack_path)),
+        pack_path=pack_path,
+        mod_loader=MRPACK_LOADERS[loader_key],
+        loader_version=dependencies[loader_key],
+        minecraft_version=dependencies["minecraft"],
+        files=files,
+        override_folders=MRPACK_OVERRIDE_FOLDERS
+    )
+
+
+def load_curseforge_manifest(pack_path: str) -> Optional[Modpack]:
+    """
+    Load a CurseForge modpack (exported zip or bare manifest.json).
+
+    Args:
+        pack_path: Path to the CurseForge zip or manifest.json
+
+    Returns:
+        Modpack object or None if loading failed
+    """
+    try:
+        if zipfile.is_zipfile(pack_path):
+            with zipfile.ZipFile(pack_path) as archive:
+                manifest = json.loads(archive.read("manifest.json"))
+        else:
+            with open(pack_path, "r") as f:
+                manifest = json.load(f)
+    except (OSError, KeyError, json.JSONDecodeError) as e:
+        print(f"Invalid CurseForge manifest: {e}")
+        return None
+
+    minecraft = manifest.get("minecraft", {})
+    loaders = minecraft.get("modLoaders", [])
+    primary_loader = next((l for l in loaders if l.get("primary")), loaders[0] if loaders else None)
+    if not minecraft.get("version") or not primary_loader:
+        print("CurseForge manifest does not specify a Minecraft version and mod loader")
+        return None
+
+    # Loader IDs look like 'forge-47.2.0' or 'neoforge-21.1.77'
+    mod_loader, _, loader_version = primary_loader["id"].partition("-")
+    if mod_loader not in ["forge", "fabric", "neoforge"]:
+        print(f"Unsupported modpack loader: {mod_loader}")
+        return None
+
+    files = [
+        PackFile(path="", curseforge_file_id=file_data["fileID"])
+        for file_data in manifest.get("files", [])
+        if file_data.get("required", True)
+    ]
+
+    return Modpack(
+        name=manifest.get("name", os.path.basename(pack_path)),
+        pack_path=pack_path,
+        mod_loader=mod_loader,
+        loader_version=loader_version or None,
+        minecraft_version=minecraft["version"],
+        files=files,
+        override_folders=[manifest.get("overrides", "overrides")] if zipfile.is_zipfile(pack_path) else []
+    )
+
+
+def load_modpack(pack_path: str) -> Optional[Modpack]:
+    """
+    Load a Modrinth (.mrpack) or CurseForge (zip / manifest.json) modpack.
+
+    Args:
+        pack_path: Path to the modpack file
+
+    Returns:
+        Modpack object or None if loading failed
+    """
+    if not os.path.exists(pack_path):
+        print(f"Modpack file not found: {pack_path}")
+        return None
+
+    if pack_path.endswith(".mrpack"):
+        return load_mrpack(pack_path)
+    return load_curseforge_manifest(pack_path)
+
+
+def resolve_curseforge_files(pack: Modpack, curseforge_client) -> None:
+    """
+    Fill in file names, URLs and hashes of CurseForge pack files with bulk requests.
+
+    Args:
+        pack: Modpack whose files have CurseForge file IDs
+        curseforge_client: CurseForgeClient instance
+    """
+    pending = {f.curseforge_file_id: f for f in pack.files if f.curseforge_file_id and not f.url}
+    file_ids = list(pending)
+
+    for start in range(0, len(file_ids), CURSEFORGE_BATCH_SIZE):
+        for file_data in curseforge_client.get_files(file_ids[start:start + CURSEFORGE_BATCH_SIZE]):
+            pack_file = pending.get(file_data["id"])
+            if not pack_file:
+                continue
+
+            file_name = file_data["fileName"]
+            pack_file.path = posixpath.join("mods", file_name)
+            # Files whose authors disabled third-party downloads have no downloadUrl;
+            # they are still served from the CDN under their ID-based path
+            pack_file.url = file_data.get("downloadUrl") or (
+                f"https://edge.forgecdn.net/files/{file_data['id'] // 1000}/{file_data['id'] % 1000}/{file_name}"
+            )
+            pack_file.hashes = {
+                "sha1": h["value"] for h in file_data.get("hashes", []) if h.get("algo") == CURSEFORGE_SHA1
+            }
+
+
+def get_modpack_download_jobs(pack: Modpack, output_dir: str) -> List[DownloadJob]:
+    """
+    Build download jobs for every resolved modpack file, verified with the pack's pinned hashes.
+
+    Args:
+        pack: Modpack object
+        output_dir: Server root directory
+
+    Returns:
+        List of DownloadJob entries
+    """
+    jobs = []
+    for pack_file in pack.files:
+        if not pack_file.url:
+            print(f"Could not resolve CurseForge file {pack_file.curseforge_file_id}")
+            continue
+
+        output_path = os.path.join(output_dir, pack_file.path)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+        algorithm = "sha512" if "sha512" in pack_file.hashes else "sha1"
+        jobs.append(DownloadJob(pack_file.url, output_path, pack_file.hashes.get(algorithm), algorithm))
+
+    return jobs
+
+
+def extract_overrides(pack: Modpack, output_dir: str) -> int:
+    """
+    Stream the pack's override folders onto the server root without unpacking the zip.
+
+    Args:
+        pack: Modpack object
+        output_dir: Server root directory
+
+    Returns:
+        Number of files extracted
+    """
+    if not pack.override_folders:
+        return 0
+
+    extracted = 0
+    with zipfile.ZipFile(pack.pack_path) as archive:
+        entries = [info for info in archive.infolist() if not info.is_dir()]
+
+        # Later folders win (server-overrides are applied over overrides)
+        for override_folder in pack.override_folders:
+            for info in entries:
+                folder, _, relative_path = info.filename.partition("/")
+                if folder != override_folder:
+                    continue
+
+                target = _safe_path(relative_path)
+                if not target:
+                    continue
+
+                output_path = os.path.join(output_dir, target)
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                with archive.open(info) as src, open(output_path, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                extracted += 1
+
+    return extracted
@@ -0,0 +1,118 @@
+import json
+import os
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+@dataclass(slots=True)
+class PluginEntry:
+    """Represents a single plugin to be downloaded."""
+    platform: str                 # 'modrinth' or 'url'
+    slug: str                     # Plugin slug, or file name for 'url' entries
+    version: str = "latest"       # Version constraint (e.g., 'latest')
+    url: Optional[str] = None     # Direct download URL for 'url' entries
+    sha256: Optional[str] = None  # Optional expected hash for 'url' entries
+
+    def __post_init__(self):
+        """Validate plugin entry fields."""
+        if self.platform not in ['modrinth', 'url']:
+            raise ValueError(f"Invalid platform: {self.platform}. Must be 'modrinth' or 'url'")
+        if not self.slug:
+            raise ValueError("Plugin slug cannot be empty")
+        if self.platform == 'url' and not self.url:
+            raise ValueError(f"Plugin '{self.slug}' uses platform 'url' but has no 'url' field")
+
+
+@dataclass
+class PluginConfig:
+    """Represents the complete plugin configuration."""
+    server_software: str          # 'paper' or 'purpur'
+    minecraft_version: str        # Minecraft version (e.g., '1.21.1')
+    plugins: List[PluginEntry]    # List of plugins to download
+
+    def __post_init__(self):
+        """Validate configuration fields."""
+        if self.server_software not in ['paper', 'purpur']:
+            raise ValueError(f"Invalid server software: {self.server_software}. Must be 'paper' or 'purpur'")
+        if not self.minecraft_version:
+            raise ValueError("Minecraft version cannot be empty")
+
+
+def load_plugin_config(config_path: str) -> Optional[PluginConfig]:
+    """
+    Load and parse a plugin configuration file.
+
+    Args:
+        config_path: Path to the JSON configuration file
+
+    Returns:
+        PluginConfig object or None if loading failed
+    """
+    if not os.path.exists(config_path):
+        print(f"Configuration file not found: {config_path}")
+        return None
+
+    try:
+        with open(config_path, 'r') as f:
+            data = json.load(f)
+
+        return validate_plugin_config(data)
+
+    except json.JSONDecodeError as e:
+        print(f"Invalid JSON in configuration file: {e}")
+        return None
+    except Exception as e:
+        print(f"Error loading configuration: {e}")
+        return None
+
+
+def validate_plugin_config(config_data: dict) -> Optional[PluginConfig]:
+    """
+    Validate and convert configuration data to PluginConfig object.
+
+    Args:
+        config_data: Dictionary containing configuration data
+
+    Returns:
+        PluginConfig object or None if validation failed
+    """
+    for field in ['server_software', 'minecraft_version', 'plugins']:
+        if field not in config_data:
+            print(f"Missing required field: '{field}'")
+            return None
+
+    plugin_entries = []
+    for idx, plugin_data in enumerate(config_data['plugins']):
+        if not isinstance(plugin_data, dict):
+            print(f"Invalid plugin entry at index {idx}: must be an object")
+            return None
+
+        if 'platform' not in plugin_data:
+            print(f"Plugin at index {idx} missing 'platform' field")
+            return None
+
+        if 'slug' not in plugin_data:
+            print(f"Plugin at index {idx} missing 'slug' field")
+            return None
+
+        try:
+            plugin_entries.append(PluginEntry(
+                platform=plugin_data['platform'],
+                slug=plugin_data['slug'],
+                version=plugin_data.get('version', 'latest'),
+                url=plugin_data.get('url'),
+                sha256=plugin_data.get('sha256')
+            ))
+        except ValueError as e:
+            print(f"Invalid plugin entry at index {idx}: {e}")
+            return None
+
+    try:
+        return PluginConfig(
+            server_software=config_data['server_software'],
+            minecraft_version=config_data['minecraft_version'],
+            plugins=plugin_entries
+        )
+    except ValueError as e:
+        print(f"Invalid configuration: {e}")
+        return None
@@ -0,0 +1,124 @@
+import os
+from typing import Optional, Dict, Any
+from cache import get_json_cached, get_cached_artifact
+
+PAPER_API_URL = "https://api.papermc.io/v2/projects/paper"
+PURPUR_API_URL = "https://api.purpurmc.org/v2/purpur"
+
+# Build lists change a few times a day; one hour keeps repeat runs offline-fast
+BUILD_LIST_MAX_AGE = 60 * 60
+
+
+def get_paper_build(minecraft_version: str) -> Optional[Dict[str, Any]]:
+    """
+    Resolve the latest stable Paper build for a Minecraft version.
+
+    Args:
+        minecraft_version: Minecraft version (e.g., '1.21.1')
+
+    Returns:
+        Dict with 'build', 'filename', 'url', 'hash' and 'hash_algorithm', or None if not found
+    """
+    builds_data = get_json_cached(
+        f"{PAPER_API_URL}/versions/{minecraft_version}/builds",
+        f"paper-builds-{minecraft_version}",
+        BUILD_LIST_MAX_AGE
+    )
+    if not builds_data or not builds_data.get("builds"):
+        print(f"No Paper build found for Minecraft {minecraft_version}")
+        return None
+
+    builds = builds_data["builds"]
+    # Prefer the 'default' (stable) channel over experimental builds
+    stable_builds = [b for b in builds if b.get("channel", "default") == "default"]
+    build = (stable_builds or builds)[-1]
+
+    application = build["downloads"]["application"]
+    filename = application["name"]
+
+    return {
+        "build": build["build"],
+        "filename": filename,
+        "url": f"{PAPER_API_URL}/versions/{minecraft_version}/builds/{build['build']}/downloads/{filename}",
+        "hash": application.get("sha256"),
+        "hash_algorithm": "sha256"
+    }
+
+
+def get_purpur_build(minecraft_version: str) -> Optional[Dict[str, Any]]:
+    """
+    Resolve the latest Purpur build for a Minecraft version.
+
+    Args:
+        minecraft_version: Minecraft version (e.g., '1.21.1')
+
+    Returns:
+        Dict with 'build', 'filename', 'url', 'hash' and 'hash_algorithm', or None if not found
+    """
+    version_data = get_json_cached(
+        f"{PURPUR_API_URL}/{minecraft_version}",
+        f"purpur-builds-{minecraft_version}",
+        BUILD_LIST_MAX_AGE
+    )
+    if not version_data or not version_data.get("builds", {}).get("latest"):
+        print(f"No Purpur build found for Minecraft {minecraft_version}")
+        return None
+
+    build = version_data["builds"]["latest"]
+
+    # Build details never change once published, so cache them indefinitely
+    build_data = get_json_cached(
+        f"{PURPUR_API_URL}/{minecraft_version}/{build}",
+        f"purpur-build-{minecraft_version}-{build}",
+        max_age=None
+    )
+    if not build_data:
+        return None
+
+    return {
+        "build": build,
+        "filename": f"purpur-{minecraft_version}-{build}.jar",
+        "url": f"{PURPUR_API_URL}/{minecraft_version}/{build}/download",
+        "hash": build_data.get("md5"),
+        "hash_algorithm": "md5"
+    }
+
+
+def get_plugin_server_jar(server_software: str, minecraft_version: str) -> Optional[str]:
+    """
+    Get a Paper or Purpur server JAR from the artifact cache, downloading it once.
+
+    Server JARs are cached keyed by build number, so repeated builds of the
+    same version do not download them again.
+
+    Args:
+        server_software: 'paper' or 'purpur'
+        minecraft_version: Minecraft version
+
+    Returns:
+        Path to the cached, hash-verified server JAR or None if failed
+    """
+    print(f"Resolving latest {server_software.capitalize()} build for Minecraft {minecraft_version}...")
+
+    if server_software == "paper":
+        build_info = get_paper_build(minecraft_version)
+    elif server_software == "purpur":
+        build_info = get_purpur_build(minecraft_version)
+    else:
+        print(f"Unsupported server software: {server_software}")
+        return None
+
+    if not build_info:
+        return None
+
+    print(f"Found {server_software.capitalize()} build {build_info['build']}")
+
+    cached_jar = get_cached_artifact(
+        build_info["url"],
+        os.path.join(server_software, build_info["filename"]),
+        build_info["hash"],
+        build_info["hash_algorithm"]
+    )
+    if not cached_jar:
+        print(f"Failed to download {server_software.capitalize()} server JAR")
+    return cached_jar
@@ -0,0 +1,340 @@
+import fcntl
+import os
+import secrets
+import shlex
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from cache import get_cache_path, load_cached_json, save_cached_json
+from docker_manager import (
+    SERVER_STOP_TIMEOUT,
+    container_action,
+    ensure_network,
+    image_exists,
+    inspect_container,
+    list_containers,
+    rename_container,
+    run_container,
+    run_in_volume,
+    wait_for_log,
+)
+from rcon import RCON_PORT, RconClient, RconError, generate_rcon_password
+
+# Network shared by standby containers and their port sidecars
+POOL_NETWORK = "mcsm-pool"
+
+# Standby containers are named '<prefix><template>-<id>' and labelled with their template
+POOL_PREFIX = "mcsm-pool-"
+POOL_LABEL = "mcsm.pool"
+RCON_PASSWORD_LABEL = "mcsm.rcon-password"
+
+# Image of the sidecar publishing a handed-out server on its final host port
+SOCAT_IMAGE = "alpine/socat:1.8.0.0"
+
+# Templates whose image has this prefix run Bedrock Dedicated Server (see main.py), others a Java server
+BEDROCK_IMAGE_PREFIX = "minecraft-bedrock-server:"
+
+# Per template type: the console line printed once the world is loaded, and the
+# port and protocol the server listens on
+BOOT_MESSAGES = {"java": "Done (", "bedrock": "Server started."}
+SERVER_PORTS = {"java": (25565, "tcp"), "bedrock": (19132, "udp")}
+
+# Cache key of the template definitions
+TEMPLATES_KEY = "pool-templates"
+
+# Standbys booted at the same time while filling a pool (world generation is CPU heavy)
+FILL_WORKERS = 2
+
+# Maximum time a standby may take to boot
+BOOT_TIMEOUT = 600
+
+
+def load_templates() -> Dict[str, Dict]:
+    """Load the pool template definitions."""
+    return dict(load_cached_json(TEMPLATES_KEY) or {})
+
+
+def get_template_type(template: Dict) -> str:
+    """Server type of a template's image: 'bedrock' or 'java'."""
+    return "bedrock" if template["image"].startswith(BEDROCK_IMAGE_PREFIX) else "java"
+
+
+def get_standbys(template_name: str) -> List[Dict[str, str]]:
+    """
+    List the standby containers of a template.
+
+    Args:
+        template_name: Template name
+
+    Returns:
+        List of container dicts ('name', 'state', 'labels'); handed-out servers are excluded
+    """
+    prefix = f"{POOL_PREFIX}{template_name}-"
+    return [c for c in list_containers(f"{POOL_LABEL}={template_name}") if c["name"].startswith(prefix)]
+
+
+def create_standby(template_name: str, template: Dict) -> Optional[str]:
+    """
+    Create, boot and pause one standby server.
+
+    The container is created first so Docker populates its data volume from
+    the image, then RCON is enabled in server.properties before the first
+    boot. Once the world is loaded, the container is paused: it keeps its
+    memory but uses no CPU.
+
+    Args:
+        template_name: Template name
+        template: Template definition
+
+    Returns:
+        Standby container name, or None if it failed to boot
+    """
+    name = f"{POOL_PREFIX}{template_name}-{secrets.token_hex(4)}"
+    password = generate_rcon_password()
+
+    if not run_container(
+        name, template["image"],
+        ports=[],  # Published at hand-out through a sidecar
+        env={"EULA": "TRUE", "XMX": template["xmx"], "XMS": template["xms"]},
+        volumes={f"{name}-data": "/app"},
+        extra_args=["--network", POOL_NETWORK, "--stop-timeout", str(SERVER_STOP_TIMEOUT),
+                    "--label", f"{POOL_LABEL}={template_name}",
+                    "--label", f"{RCON_PASSWORD_LABEL}={password}"],
+        start=False
+    ):
+        return None
+
+    properties = {"enable-rcon": "true", "rcon.port": RCON_PORT, "rcon.password": password, **template["properties"]}
+    lines = " ".join(shlex.quote(f"{key}={value}") for key, value in properties.items())
+    if run_in_volume(f"{name}-data", f"printf '%s\\n' {lines} >> /app/server.properties") is None:
+        remove_standby(name)
+        return None
+
+    boot_message = BOOT_MESSAGES[get_template_type(template)]
+    if not container_action("start", name) or not wait_for_log(name, boot_message, BOOT_TIMEOUT):
+        print(f"Standby '{name}' did not boot")
+        remove_standby(name)
+        return None
+
+    if not container_action("pause", name):
+        remove_standby(name)
+        return None
+
+    print(f"Standby '{name}' is ready")
+    return name
+
+
+def remove_standby(name: str) -> None:
+    """Remove a standby container and its data volume."""
+    subprocess.run(["docker", "rm", "-f", name], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    subprocess.run(["docker", "volume", "rm", f"{name}-data"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def fill_pool(template_name: str) -> int:
+    """
+    Boot standbys until a template's pool has its configured size.
+
+    Args:
+        template_name: Template name
+
+    Returns:
+        Number of standbys created
+    """
+    template = load_templates().get(template_name)
+    if not template:
+        print(f"Unknown pool template: {template_name}")
+        return 0
+
+    if not image_exists(template["image"]):
+        print(f"Image '{template['image']}' does not exist; create a server with it first")
+        return 0
+
+    if not ensure_network(POOL_NETWORK):
+        print(f"Failed to create network '{POOL_NETWORK}'")
+        return 0
+
+    # Pull the sidecar image now so hand-outs never wait for it
+    if not image_exists(SOCAT_IMAGE):
+        subprocess.run(["docker", "pull", SOCAT_IMAGE], stdout=subprocess.DEVNULL)
+
+    # Only one fill per template at a time, so hand-outs in quick succession do not overfill the pool
+    with open(get_cache_path("locks", f"pool-{template_name}.lock"), "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            print(f"Pool '{template_name}' is already being filled")
+            return 0
+
+        # Standbys that are not paused were left behind by an interrupted fill
+        standbys = []
+        for container in get_standbys(template_name):
+            if container["state"] == "paused":
+                standbys.append(container)
+            else:
+                remove_standby(container["name"])
+
+        missing = template["size"] - len(standbys)
+        if missing <= 0:
+            print(f"Pool '{template_name}' is full ({len(standbys)} standby server(s))")
+            return 0
+
+        print(f"Booting {missing} standby server(s) for pool '{template_name}'...")
+        with ThreadPoolExecutor(max_workers=FILL_WORKERS) as executor:
+            created = [name for name in executor.map(lambda _: create_standby(template_name, template), range(missing)) if name]
+
+    print(f"Pool '{template_name}': {len(standbys) + len(created)}/{template['size']} standby server(s)")
+    return len(created)
+
+
+def refill_in_background(template_name: str) -> None:
+    """Start a detached 'pool fill' process for a template."""
+    log_path = get_cache_path("logs", f"pool-{template_name}.log")
+    with open(log_path, "a") as log:
+        subprocess.Popen(
+            [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py"),
+             "pool", "fill", "--template", template_name],
+            stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL, start_new_session=True
+        )
+    print(f"Refilling pool '{template_name}' in the background (log: {log_path})")
+
+
+def run_commands(server_name: str, commands: List[str]) -> bool:
+    """
+    Run console commands on a pooled server over RCON.
+
+    Args:
+        server_name: Container name
+        commands: Commands without the leading slash
+
+    Returns:
+        True if every command was sent
+    """
+    host = inspect_container(server_name, f'{{{{(index .NetworkSettings.Networks "{POOL_NETWORK}").IPAddress}}}}')
+    password = inspect_container(server_name, f'{{{{index .Config.Labels "{RCON_PASSWORD_LABEL}"}}}}')
+    try:
+        with RconClient(host, RCON_PORT, password) as rcon:
+            for command in commands:
+                output = rcon.command(command)
+                print(f"> {command}" + (f"\n{output}" if output else ""))
+        return True
+    except RconError as e:
+        print(f"Failed to configure '{server_name}': {e}")
+        return False
+
+
+def release_standby(standby_name: str, server_name: str) -> None:
+    """
+    Return a claimed standby to the pool after a failed hand-out.
+
+    Its port sidecar is removed, and it gets its standby name back and is
+    paused again. A standby that cannot be restored is removed, so the pool
+    refills it.
+    """
+    subprocess.run(["docker", "rm", "-f", f"{server_name}-port"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if not rename_container(server_name, standby_name):
+        remove_standby(server_name)
+        return
+    if inspect_container(standby_name, "{{.State.Status}}") != "paused" and not container_action("pause", standby_name):
+        remove_standby(standby_name)
+
+
+def hand_out(template_name: str, server_name: str, port: int, commands: Optional[List[str]] = None) -> bool:
+    """
+    Turn a paused standby into a named server on its final port.
+
+    The standby is claimed by renaming it, so concurrent hand-outs never get
+    the same container. It is then resumed, published through a small socat
+    sidecar (a running container's ports cannot be changed), configured over
+    RCON, and the pool is refilled in the background. If resuming or
+    publishing fails, the standby is returned to the pool.
+
+    Args:
+        template_name: Template name
+        server_name: Final container name
+        port: Host port players connect to
+        commands: Console commands to run once the server is handed out
+
+    Returns:
+        True if a server was handed out
+    """
+    template = load_templates().get(template_name)
+    if not template:
+        print(f"Unknown pool template: {template_name}")
+        return False
+
+    template_type = get_template_type(template)
+    if commands and template_type == "bedrock":
+        print("Bedrock servers have no RCON; --pool-command is only supported for Java templates")
+        return False
+    server_port, protocol = SERVER_PORTS[template_type]
+
+    for standby in get_standbys(template_name):
+        if standby["state"] != "paused" or not rename_container(standby["name"], server_name):
+            continue
+
+        if not container_action("unpause", server_name):
+            release_standby(standby["name"], server_name)
+            return False
+
+        host = inspect_container(server_name, f'{{{{(index .NetworkSettings.Networks "{POOL_NETWORK}").IPAddress}}}}')
+        result = subprocess.run(
+            ["docker", "run", "-d", "--name", f"{server_name}-port", "--network", POOL_NETWORK,
+             "--restart", "unless-stopped", "-p", f"{port}:{server_port}/{protocol}", SOCAT_IMAGE,
+             f"{protocol.upper()}-LISTEN:{server_port},fork,reuseaddr", f"{protocol.upper()}:{host}:{server_port}"],
+            capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            print(f"Failed to publish port {port}: {result.stderr.strip()}")
+            release_standby(standby["name"], server_name)
+            return False
+
+        if commands:
+            run_commands(server_name, commands)
+
+        print(f"Server '{server_name}' is ready on port {port} (from standby '{standby['name']}')")
+        refill_in_background(template_name)
+        return True
+
+    print(f"No standby server available in pool '{template_name}'")
+    refill_in_background(template_name)
+    return False
+
+
+def drain_pool(template_name: str) -> None:
+    """Remove every standby of a template."""
+    for standby in get_standbys(template_name):
+        remove_standby(standby["name"])
+        print(f"Removed standby '{standby['name']}'")
+
+
+def manage_pool(args) -> None:
+    """Entry point for the 'pool' command."""
+    templates = load_templates()
+
+    if args.subcommand == "fill":
+        if args.image:
+            properties = dict(p.split("=", 1) for p in args.property or [])
+            templates[args.template] = {
+                "image": args.image,
+                "size": args.pool_size,
+                "xmx": args.xmx,
+                "xms": args.xms,
+                "properties": properties,
+            }
+            save_cached_json(TEMPLATES_KEY, templates)
+        fill_pool(args.template)
+
+    elif args.subcommand == "get":
+        hand_out(args.template, args.server_name, args.port, args.pool_command)
+
+    elif args.subcommand == "drain":
+        drain_pool(args.template)
+
+    elif args.subcommand == "status":
+        for template_name, template in templates.items():
+            standbys = get_standbys(template_name)
+            ready = sum(1 for c in standbys if c["state"] == "paused")
+            print(f"{template_name}: {ready} ready, {len(standbys) - ready} booting, "
+                  f"target {template['size']} ({template['image']}, {template['xmx']})")
@@ -0,0 +1,117 @@
+import secrets
+import socket
+import struct
+from typing import Optional
+
+# Default RCON port of the Java Edition server
+RCON_PORT = 25575
+
+# Packet types of the RCON protocol
+_TYPE_RESPONSE = 0
+_TYPE_COMMAND = 2
+_TYPE_LOGIN = 3
+
+
+class RconError(Exception):
+    """Raised when an RCON connection or login fails."""
+
+
+class RconClient:
+    """
+    Minimal client for the Minecraft (Source-style) RCON protocol.
+
+    Usage:
+        with RconClient(host, port, password) as rcon:
+            print(rcon.command("list"))
+    """
+
+    def __init__(self, host: str, port: int = RCON_PORT, password: str = "", timeout: float = 10.0):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.timeout = timeout
+        self.sock: Optional[socket.socket] = None
+        self._request_id = 0
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def connect(self) -> None:
+        """Open the connection and log in."""
+        try:
+            self.sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        except OSError as e:
+            raise RconError(f"Could not connect to RCON at {self.host}:{self.port}: {e}")
+
+        request_id = self._send(_TYPE_LOGIN, self.password)
+        response_id, _, _ = self._receive()
+        if response_id == -1 or response_id != request_id:
+            self.close()
+            raise RconError("RCON login failed (wrong password?)")
+
+    def close(self) -> None:
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+
+    def command(self, command: str) -> str:
+        """
+        Run a console command and return its output.
+
+        Args:
+            command: Command without the leading slash (e.g., 'list')
+
+        Returns:
+            Command output
+        """
+        request_id = self._send(_TYPE_COMMAND, command)
+        # Long outputs are split over several packets; an empty command after
+        # the real one marks the end of the response
+        end_id = self._send(_TYPE_RESPONSE, "")
+
+        output = []
+        while True:
+            response_id, _, payload = self._receive()
+            if response_id == end_id:
+                break
+            if response_id == request_id:
+                output.append(payload)
+        return "".join(output)
+
+    def _send(self, packet_type: int, payload: str) -> int:
+        if not self.sock:
+            raise RconError("RCON is not connected")
+        self._request_id += 1
+        body = struct.pack("<ii", self._request_id, packet_type) + payload.encode("utf-8") + b"\x00\x00"
+        try:
+            self.sock.sendall(struct.pack("<i", len(body)) + body)
+        except OSError as e:
+            raise RconError(f"RCON connection lost: {e}")
+        return self._request_id
+
+    def _receive(self):
+        (length,) = struct.unpack("<i", self._read(4))
+        data = self._read(length)
+        request_id, packet_type = struct.unpack("<ii", data[:8])
+        return request_id, packet_type, data[8:-2].decode("utf-8", errors="replace")
+
+    def _read(self, size: int) -> bytes:
+        data = b""
+        while len(data) < size:
+            try:
+                chunk = self.sock.recv(size - len(data))
+            except OSError as e:
+                raise RconError(f"RCON connection lost: {e}")
+            if not chunk:
+                raise RconError("RCON connection closed by the server")
+            data += chunk
+        return data
+
+
+def generate_rcon_password() -> str:
+    """Generate a random RCON password."""
+    return secrets.token_urlsafe(18)
@@ -0,0 +1,312 @@
+import fcntl
+import hashlib
+import math
+import os
+import subprocess
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from cache import get_cache_path
+from utils import parse_memory_size
+
+# Resource profiles of a server container:
+#   none       no limits (Docker's default)
+#   shared     memory limit from the heap, and a CPU quota on the cores not dedicated to other servers
+#   dedicated  memory limit from the heap, and whole cores no other managed server runs on
+RESOURCE_PROFILES = ("none", "shared", "dedicated")
+
+# Label recording a container's profile, so the allocator can find managed servers
+PROFILE_LABEL = "mcsm.resource-profile"
+
+# CPUs of a server when --cpus is not given (the main thread, plus GC and network threads)
+DEFAULT_CPUS = 2
+
+# JVM memory outside the heap (metaspace, code cache, thread stacks, direct buffers): a share of the heap, at least the minimum
+OFF_HEAP_FRACTION = 0.25
+MIN_OFF_HEAP = 768 * 1024 * 1024
+
+# Cores never dedicated to a server, left to the OS, Docker and shared servers
+RESERVED_CORES = 1
+
+# Host memory never committed to servers
+HOST_MEMORY_RESERVE = 1024 * 1024 * 1024
+
+
+@dataclass(slots=True)
+class Allocation:
+    """Resources granted to a server container."""
+    profile: str
+    memory: int
+    cpus: float
+    cores: List[int] = field(default_factory=list)
+
+    def docker_args(self) -> List[str]:
+        """'docker run' arguments applying the allocation."""
+        memory = f"{self.memory // (1024 * 1024)}m"
+        # No swap: a server over its limit is stopped by its own cgroup instead of slowing the host down
+        args = ["--memory", memory, "--memory-swap", memory, "--label", f"{PROFILE_LABEL}={self.profile}"]
+        if self.profile == "shared":
+            args += ["--cpus", str(self.cpus)]
+        if self.cores:
+            args += ["--cpuset-cpus", format_cpuset(self.cores)]
+        return args
+
+
+def parse_cpuset(cpuset: str) -> Set[int]:
+    """Parse a cpuset list such as '0-3,6' into core numbers."""
+    cores = set()
+    for part in cpuset.split(","):
+        if "-" in part:
+            first, last = part.split("-", 1)
+            cores.update(range(int(first), int(last) + 1))
+        elif part.strip():
+            cores.add(int(part))
+    return cores
+
+
+def format_cpuset(cores) -> str:
+    """Format core numbers as a cpuset list, e.g. [0, 1, 2, 3, 6] -> '0-3,6'."""
+    ranges = []
+    for core in sorted(cores):
+        if ranges and core == ranges[-1][1] + 1:
+            ranges[-1][1] = core
+        else:
+            ranges.append([core, core])
+    return ",".join(f"{first}-{last}" if last > first else str(first) for first, last in ranges)
+
+
+def get_memory_limit(xmx: str, world_tmpfs: Optional[str] = None) -> Optional[int]:
+    """
+    Container memory limit for a heap size: the heap, its off-heap headroom, and a tmpfs world (which counts as container memory).
+
+    Returns:
+        Limit in bytes, or None if a size cannot be parsed
+    """
+    heap = parse_memory_size(xmx)
+    tmpfs = parse_memory_size(world_tmpfs) if world_tmpfs else 0
+    if heap is None or tmpfs is None:
+        return None
+    return heap + max(MIN_OFF_HEAP, int(heap * OFF_HEAP_FRACTION)) + tmpfs
+
+
+def get_host_resources(env: Optional[Dict[str, str]] = None) -> Optional[Tuple[int, int]]:
+    """
+    Get the Docker host's CPU count and memory.
+
+    Args:
+        env: Environment of the docker commands (its DOCKER_HOST selects the host); this process's if None
+
+    Returns:
+        Tuple of (CPUs, memory in bytes), or None if Docker is not reachable
+    """
+    result = subprocess.run(["docker", "info", "--format", "{{.NCPU}} {{.MemTotal}}"],
+                            capture_output=True, text=True, env=env)
+    if result.returncode != 0:
+        return None
+    cpus, memory = result.stdout.split()
+    return int(cpus), int(memory)
+
+
+def get_container_allocations(env: Optional[Dict[str, str]] = None) -> Dict[str, Allocation]:
+    """
+    Read the resources of every container on the host, managed or not.
+
+    Containers that are not running are included: they get their resources
+    back when they start.
+
+    Args:
+        env: Environment of the docker commands (its DOCKER_HOST selects the host); this process's if None
+
+    Returns:
+        Dict mapping container name to its Allocation ('none' for unmanaged containers)
+    """
+    names = subprocess.run(["docker", "ps", "-aq"], capture_output=True, text=True, env=env).stdout.split()
+    if not names:
+        return {}
+    result = subprocess.run(
+        ["docker", "inspect", "-f",
+         f'{{{{.Name}}}}\t{{{{.HostConfig.Memory}}}}\t{{{{.HostConfig.NanoCpus}}}}\t{{{{.HostConfig.CpusetCpus}}}}\t'
+         f'{{{{index .Config.Labels "{PROFILE_LABEL}"}}}}'] + names,
+        capture_output=True, text=True, env=env
+    )
+    allocations = {}
+    for line in result.stdout.splitlines():
+        name, memory, nano_cpus, cpuset, profile = (line.split("\t") + [""] * 5)[:5]
+        profile = profile if profile in RESOURCE_PROFILES else "none"
+        cores = sorted(parse_cpuset(cpuset)) if profile != "none" else []
+        allocations[name.lstrip("/")] = Allocation(profile, int(memory or 0), int(nano_cpus or 0) / 1e9, cores)
+    return allocations
+
+
+def _pick_cores(free: List[int], count: int) -> List[int]:
+    """Pick `count` free cores, preferring a contiguous block (neighbouring cores usually share caches)."""
+    for start in range(len(free) - count + 1):
+        block = free[start:start + count]
+        if block[-1] - block[0] == count - 1:
+            return block
+    return free[:count]
+
+
+@contextmanager
+def allocate_resources(server_name: str, profile: str, cpus: Optional[float], memory: Optional[str],
+                       xmx: str, world_tmpfs: Optional[str] = None) -> Iterator[Optional[Allocation]]:
+    """
+    Allocate resources for a new server without overcommitting the host.
+
+    Allocations are serialised with a lock per Docker host, held until the block
+    exits, so the container should be created inside it:
+
+        with allocate_resources(...) as allocation:
+            if allocation:
+                run_container(..., extra_args=allocation.docker_args())
+
+    Args:
+        server_name: Container name
+        profile: 'shared' or 'dedicated'
+        cpus: CPUs (a quota for 'shared', whole cores for 'dedicated'); DEFAULT_CPUS if None
+        memory: Memory limit; derived from the heap if None
+        xmx: Maximum heap size of the server
+        world_tmpfs: Size of a tmpfs world, if any
+
+    Yields:
+        Allocation, or None if the host has no room (the reason is printed)
+    """
+    # One lock per Docker host (DOCKER_HOST selects a remote one)
+    endpoint = hashlib.sha1(os.environ.get("DOCKER_HOST", "local").encode()).hexdigest()[:12]
+    with open(get_cache_path("locks", f"resources-{endpoint}.lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield _allocate(server_name, profile, cpus or DEFAULT_CPUS, memory, xmx, world_tmpfs)
+
+
+def get_server_memory(xmx: str, world_tmpfs: Optional[str], memory: Optional[str]) -> Optional[int]:
+    """
+    Memory limit of a server: --memory if given, otherwise derived from the heap.
+
+    Returns:
+        Limit in bytes, or None if a size is invalid (the reason is printed)
+    """
+    needed_memory = get_memory_limit(xmx, world_tmpfs)
+    if needed_memory is None:
+        print(f"Invalid heap or tmpfs size: {xmx}, {world_tmpfs}")
+        return None
+    if not memory:
+        return needed_memory
+    limit = parse_memory_size(memory)
+    if limit is None:
+        print(f"Invalid --memory: {memory}")
+        return None
+    if limit < needed_memory:
+        print(f"Warning: --memory {memory} is below the {needed_memory // (1024 * 1024)} MiB the {xmx} heap "
+              f"needs with its off-heap memory (and world tmpfs); the server may be OOM-killed")
+    return limit
+
+
+@dataclass(slots=True)
+class HostCapacity:
+    """A Docker host's resources and what its containers have committed of them."""
+    cpus: int
+    memory: int
+    committed_memory: int = 0
+    dedicated: Set[int] = field(default_factory=set)
+    shared_quota: float = 0.0
+
+    @property
+    def free_memory(self) -> int:
+        return self.memory - HOST_MEMORY_RESERVE - self.committed_memory
+
+    @property
+    def free_cores(self) -> List[int]:
+        """Cores that can still be dedicated."""
+        return [core for core in range(RESERVED_CORES, self.cpus) if core not in self.dedicated]
+
+    @property
+    def shared_cores(self) -> List[int]:
+        return [core for core in range(self.cpus) if core not in self.dedicated]
+
+    def check(self, profile: str, cpus: float, memory: int) -> Optional[str]:
+        """
+        Check whether a server fits.
+
+        Returns:
+            None if it fits, otherwise the reason it does not
+        """
+        if memory > self.free_memory:
+            return (f"Not enough memory on the host: {memory // (1024 * 1024)} MiB needed, "
+                    f"{max(0, self.free_memory) // (1024 * 1024)} MiB not committed to other containers")
+        if profile == "dedicated":
+            count = math.ceil(cpus)
+            if count > len(self.free_cores):
+                return f"Not enough free cores on the host: {count} needed, {len(self.free_cores)} not dedicated to other servers"
+            if self.shared_quota > len(self.shared_cores) - count:
+                return f"Dedicating {count} more core(s) would leave shared servers ({self.shared_quota:g} CPUs) too few cores"
+        elif self.shared_quota + cpus > len(self.shared_cores):
+            return (f"Not enough shared CPU on the host: {cpus:g} needed, "
+                    f"{max(0.0, len(self.shared_cores) - self.shared_quota):g} of {len(self.shared_cores)} shared core(s) uncommitted")
+        return None
+
+    def reserve(self, profile: str, cpus: float, memory: int) -> Allocation:
+        """Commit resources for a server that fits (see check)."""
+        allocation = Allocation(profile, memory, cpus)
+        self.committed_memory += memory
+        if profile == "dedicated":
+            allocation.cores = _pick_cores(self.free_cores, math.ceil(cpus))
+            self.dedicated.update(allocation.cores)
+        else:
+            allocation.cores = self.shared_cores
+            self.shared_quota += cpus
+        return allocation
+
+
+def get_host_capacity(exclude: Optional[str] = None, env: Optional[Dict[str, str]] = None) -> Optional[HostCapacity]:
+    """
+    Read the capacity of the Docker host (DOCKER_HOST, or the local daemon).
+
+    Args:
+        exclude: Container whose resources are not counted (e.g. one being replaced)
+        env: Environment of the docker commands (its DOCKER_HOST selects the host); this process's if None
+
+    Returns:
+        HostCapacity, or None if Docker is not reachable
+    """
+    host = get_host_resources(env)
+    if host is None:
+        return None
+    capacity = HostCapacity(*host)
+    for name, allocation in get_container_allocations(env).items():
+        if name == exclude:
+            continue
+        capacity.committed_memory += allocation.memory
+        if allocation.profile == "dedicated":
+            capacity.dedicated.update(allocation.cores)
+        elif allocation.profile == "shared":
+            capacity.shared_quota += allocation.cpus
+    return capacity
+
+
+def _allocate(server_name: str, profile: str, cpus: float, memory: Optional[str],
+              xmx: str, world_tmpfs: Optional[str]) -> Optional[Allocation]:
+    needed_memory = get_server_memory(xmx, world_tmpfs, memory)
+    if needed_memory is None:
+        return None
+    capacity = get_host_capacity(exclude=server_name)
+    if capacity is None:
+        print("Could not read the Docker host's resources")
+        return None
+    reason = capacity.check(profile, cpus, needed_memory)
+    if reason:
+        print(reason)
+        return None
+    return capacity.reserve(profile, cpus, needed_memory)
+
+
+def rebalance_shared_servers() -> None:
+    """Move shared servers off cores that have since been dedicated to a server."""
+    capacity = get_host_capacity()
+    if capacity is None:
+        return
+    shared_cores = format_cpuset(capacity.shared_cores)
+
+    for name, allocation in get_container_allocations().items():
+        if allocation.profile == "shared" and format_cpuset(allocation.cores) != shared_cores:
+            subprocess.run(["docker", "update", "--cpuset-cpus", shared_cores, name], stdout=subprocess.DEVNULL)
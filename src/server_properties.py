@@ -0,0 +1,61 @@
+import os
+from typing import Dict
+
+
+def read_properties(properties_path: str) -> Dict[str, str]:
+    """
+    Read a server.properties file into a dictionary.
+
+    Args:
+        properties_path: Path to the server.properties file
+
+    Returns:
+        Dict of property names to values (empty if the file does not exist)
+    """
+    properties = {}
+    if not os.path.exists(properties_path):
+        return properties
+
+    with open(properties_path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#") or "=" not in line:
+                continue
+            key, value = line.split("=", 1)
+            properties[key.strip()] = value.strip()
+
+    return properties
+
+
+def update_properties(properties_path: str, overrides: Dict[str, object]) -> None:
+    """
+    Set properties in a server.properties file, keeping comments and ordering.
+
+    Keys that are not present yet are appended. The file is replaced
+    atomically, so a hardlinked source file is never modified in place.
+
+    Args:
+        properties_path: Path to the server.properties file (created if missing)
+        overrides: Properties to set
+    """
+    remaining = {key: str(value).lower() if isinstance(value, bool) else str(value)
+                 for key, value in overrides.items()}
+    lines = []
+
+    if os.path.exists(properties_path):
+        with open(properties_path, "r") as f:
+            for line in f:
+                stripped = line.strip()
+                if stripped and not stripped.startswith("#") and "=" in stripped:
+                    key = stripped.split("=", 1)[0].strip()
+                    if key in remaining:
+                        line = f"{key}={remaining.pop(key)}\n"
+                lines.append(line if line.endswith("\n") else f"{line}\n")
+
+    for key, value in remaining.items():
+        lines.append(f"{key}={value}\n")
+
+    tmp_path = f"{properties_path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.writelines(lines)
+    os.replace(tmp_path, properties_path)
@@ -0,0 +1,195 @@
+import os
+from typing import Dict, List, Optional, Tuple
+
+from cache import get_cache_path, get_file_hashes
+from docker_manager import get_data_volume, run_in_volume
+from mod_platforms import CurseForgeClient, ModrinthClient, is_compatible_curseforge_file
+
+# Script listing size, modification time and name of every jar in the server's mods folder
+STAT_MODS_SCRIPT = 'cd /app/mods 2>/dev/null || exit 0; for f in *.jar; do [ -f "$f" ] && stat -c "%s %Y %n" "$f"; done; true'
+
+# Script copying the listed jars (with their modification times) into the host mirror
+COPY_MODS_SCRIPT = 'cd /app/mods; while IFS= read -r f; do [ -n "$f" ] && cp -p "$f" /mirror/; done < /mirror/.pending; {chown}rm /mirror/.pending'
+
+
+def mirror_volume_mods(server_name: str) -> Optional[List[str]]:
+    """
+    Keep a host copy of a server's mods folder in the cache, copying only changed jars.
+
+    Jars are compared by size and modification time, so after the first run
+    only added or replaced jars leave the volume.
+
+    Args:
+        server_name: Server container name
+
+    Returns:
+        Paths of the mirrored jars, or None if the volume could not be read
+    """
+    server_data_volume = get_data_volume(server_name)
+    if not server_data_volume:
+        print(f"Server '{server_name}' has no data volume (split data layout); use --mods-dir instead")
+        return None
+    output = run_in_volume(server_data_volume, STAT_MODS_SCRIPT)
+    if output is None:
+        return None
+
+    mirror_dir = get_cache_path("volumes", server_data_volume, "mods", "")
+    installed = {}
+    for line in output.splitlines():
+        size, mtime, filename = line.split(" ", 2)
+        installed[filename] = (int(size), int(mtime))
+
+    for filename in os.listdir(mirror_dir):
+        if filename not in installed:
+            os.remove(os.path.join(mirror_dir, filename))
+
+    pending = []
+    for filename, (size, mtime) in installed.items():
+        mirror_path = os.path.join(mirror_dir, filename)
+        if os.path.exists(mirror_path):
+            stat = os.stat(mirror_path)
+            if stat.st_size == size and int(stat.st_mtime) == mtime:
+                continue
+        pending.append(filename)
+
+    if pending:
+        print(f"Copying {len(pending)} changed jar(s) from volume '{server_data_volume}'...")
+        with open(os.path.join(mirror_dir, ".pending"), "w") as f:
+            f.writelines(f"{filename}\n" for filename in pending)
+
+        # Files copied by the helper container are owned by root; hand them back to the host user
+        chown = f"chown {os.getuid()}:{os.getgid()} /mirror/*.jar; " if hasattr(os, "getuid") else ""
+        if run_in_volume(server_data_volume, COPY_MODS_SCRIPT.format(chown=chown), {mirror_dir: "/mirror"}) is None:
+            return None
+
+    return [os.path.join(mirror_dir, filename) for filename in installed]
+
+
+def check_modrinth_updates(sha1_hashes: Dict[str, str], game_version: str, mod_loader: str) -> Dict[str, Tuple[str, str]]:
+    """
+    Check installed jars for Modrinth updates with one bulk request.
+
+    Args:
+        sha1_hashes: Jar path -> SHA-1
+        game_version: Minecraft version
+        mod_loader: Mod loader type
+
+    Returns:
+        Dict mapping jar paths known to Modrinth to (latest version, status)
+    """
+    latest_versions = ModrinthClient().get_latest_versions_from_hashes(
+        list(set(sha1_hashes.values())), game_version, mod_loader
+    )
+
+    results = {}
+    for path, sha1 in sha1_hashes.items():
+        version = latest_versions.get(sha1)
+        if not version:
+            continue
+
+        files = version.get("files", [])
+        up_to_date = any(f.get("hashes", {}).get("sha1") == sha1 for f in files)
+        results[path] = (version.get("version_number", "?"), "up to date" if up_to_date else "update available")
+    return results
+
+
+def check_curseforge_updates(fingerprints: Dict[str, str], game_version: str, mod_loader: str,
+                             curseforge_client: CurseForgeClient) -> Dict[str, Tuple[str, str]]:
+    """
+    Check installed jars for CurseForge updates with one bulk fingerprint request.
+
+    Args:
+        fingerprints: Jar path -> CurseForge fingerprint
+        game_version: Minecraft version
+        mod_loader: Mod loader type
+        curseforge_client: CurseForgeClient instance
+
+    Returns:
+        Dict mapping jar paths known to CurseForge to (latest file name, status)
+    """
+    matches = curseforge_client.get_fingerprint_matches([int(f) for f in set(fingerprints.values())])
+    by_fingerprint = {str(match["file"]["fileFingerprint"]): match for match in matches}
+
+    results = {}
+    for path, fingerprint in fingerprints.items():
+        match = by_fingerprint.get(fingerprint)
+        if not match:
+            continue
+
+        compatible_files = [
+            f for f in match.get("latestFiles", []) if is_compatible_curseforge_file(f, game_version, mod_loader)
+        ]
+        if not compatible_files:
+            results[path] = ("-", f"no {mod_loader} {game_version} file")
+            continue
+
+        latest_file = max(compatible_files, key=lambda f: f.get("fileDate", ""))
+        up_to_date = latest_file["id"] == match["file"]["id"]
+        results[path] = (latest_file["fileName"], "up to date" if up_to_date else "update available")
+    return results
+
+
+def print_update_table(rows: List[Tuple[str, str, str, str]]) -> None:
+    """Print (installed jar, platform, latest, status) rows as an aligned table, updates first."""
+    headers = ("Installed", "Platform", "Latest", "Status")
+    rows = sorted(rows, key=lambda row: (row[3] == "up to date", row[3] == "unknown", row[0].lower()))
+    widths = [max(len(str(row[i])) for row in [headers, *rows]) for i in range(len(headers))]
+
+    def format_row(row):
+        return "  ".join(str(value).ljust(width) for value, width in zip(row, widths))
+
+    print(format_row(headers))
+    print("  ".join("-" * width for width in widths))
+    for row in rows:
+        print(format_row(row))
+
+
+def check_updates(args) -> None:
+    """Entry point for the 'check-updates' command."""
+    if args.mods_dir:
+        jar_paths = [
+            os.path.join(args.mods_dir, filename)
+            for filename in os.listdir(args.mods_dir)
+            if filename.endswith(".jar")
+        ]
+    else:
+        jar_paths = mirror_volume_mods(args.server_name)
+        if jar_paths is None:
+            return
+
+    if not jar_paths:
+        print("No installed mods found.")
+        return
+
+    print(f"Hashing {len(jar_paths)} installed jar(s)...")
+    sha1_hashes = get_file_hashes(jar_paths, "sha1")
+
+    print("Checking Modrinth for updates...")
+    results = check_modrinth_updates(sha1_hashes, args.server_version, args.mod_loader)
+    platforms = {path: "modrinth" for path in results}
+
+    # Only jars Modrinth does not know need the (slower) CurseForge fingerprint
+    unmatched = [path for path in jar_paths if path not in results]
+    cf_api_key = args.curseforge_api_key or os.environ.get("CF_API_KEY")
+    if unmatched and cf_api_key:
+        print(f"Checking CurseForge for {len(unmatched)} jar(s)...")
+        fingerprints = get_file_hashes(unmatched, "murmur2")
+        curseforge_results = check_curseforge_updates(
+            fingerprints, args.server_version, args.mod_loader, CurseForgeClient(cf_api_key)
+        )
+        results.update(curseforge_results)
+        platforms.update({path: "curseforge" for path in curseforge_results})
+
+    rows = []
+    for path in jar_paths:
+        latest, status = results.get(path, ("-", "unknown"))
+        rows.append((os.path.basename(path), platforms.get(path, "-"), latest, status))
+
+    print()
+    print_update_table(rows)
+
+    updates = sum(1 for row in rows if row[3] == "update available")
+    unknown = sum(1 for row in rows if row[3] == "unknown")
+    print(f"\n{updates} update(s) available, {len(rows) - updates - unknown} up to date, {unknown} unknown")
+    if unknown and not cf_api_key:
+        print("Set --curseforge-api-key or CF_API_KEY to also check CurseForge.")
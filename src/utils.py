@@ -1,6 +1,12 @@
 import platform
 
+# Answer every confirmation with yes (set by --yes and by the daemon, which has no terminal)
+ASSUME_YES = False
+
 def confirm_action(message):
+    if ASSUME_YES:
+        print(f"{message} (y/n): y")
+        return True
     while True:
         choice = input(f"{message} (y/n): ").lower()
         if choice in ["y", "yes"]:
@@ -18,3 +24,20 @@ def get_operating_system():
         return "linux"
     else:
         return os_name
+
+# Binary unit multipliers of JVM (-Xmx1024M) and Docker (1.5GiB, 512m) memory sizes
+_MEMORY_UNITS = {"": 1, "B": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+def parse_memory_size(size):
+    """
+    Convert a memory size such as '1024M', '2g', '1.5GiB' or '512MB' to bytes.
+
+    Returns:
+        Size in bytes, or None if the size cannot be parsed
+    """
+    text = str(size).strip().upper().replace("IB", "").rstrip("B") or "0"
+    number, unit = (text[:-1], text[-1]) if text[-1].isalpha() else (text, "")
+    try:
+        return int(float(number) * _MEMORY_UNITS[unit])
+    except (ValueError, KeyError):
+        return None